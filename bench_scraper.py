@@ -0,0 +1,571 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the profile scraper.
+Serves generated HTML corpora from a local HTTP server and times fetching,
+parsing and rendering, writing the results as JSON for later comparison.
+
+Examples:
+    python bench_scraper.py --quick
+    python bench_scraper.py --output bench.json --compare baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Callable, List, Optional
+
+from scrape_profile import ProfileScraper
+from scrape_result import ScrapeResult
+
+
+KB = 1024
+MB = 1024 * KB
+
+FULL_PAGE_SIZES = [10 * KB, 100 * KB, MB, 10 * MB]
+FULL_PAGE_COUNTS = [1, 10, 100, 1000, 10000]
+QUICK_PAGE_SIZES = [10 * KB, 100 * KB]
+QUICK_PAGE_COUNTS = [1, 10, 100]
+
+# Size of the pages used by the page-count benchmarks
+BATCH_PAGE_SIZE = 10 * KB
+
+# Size and number of the pages used by the parse scaling benchmark; large
+# enough that parsing, not fetching, dominates
+SCALING_PAGE_SIZE = 100 * KB
+FULL_SCALING_PAGES = 200
+QUICK_SCALING_PAGES = 40
+
+# Records built by the record memory benchmark, and the headings and links of each
+FULL_RECORD_COUNT = 10000
+QUICK_RECORD_COUNT = 2000
+RECORD_HEADINGS = 20
+RECORD_LINKS = 50
+
+# Sources whose Jekyll notes are generated in the note volume benchmark
+FULL_NOTE_COUNT = 50000
+QUICK_NOTE_COUNT = 5000
+
+# Programs timed by the startup benchmark; the scraping one also loads the
+# network stack and parsers, as every run did before they were imported lazily
+STARTUP_PROGRAMS = {
+    'python': 'pass',
+    'render-only': 'import scrape_profile; scrape_profile.ProfileScraper()',
+    'scraping': ('import scrape_profile, bs4, lxml.etree; '
+                 'scrape_profile.ProfileScraper().session')
+}
+
+WORDS = ('profile data cloud pipeline software engineer dotnet aurelia azure '
+         'backend store register service package nuget blog notes open source').split()
+
+
+def generate_page(size: int, index: int = 0) -> bytes:
+    """
+    Generate a deterministic HTML page of roughly size bytes.
+    
+    Pages look like a blog: a head with title, description, script and style,
+    then sections of headings, paragraphs and links inside <main>.
+    """
+    rng = random.Random(size * 100003 + index)
+    head = (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>Benchmark page {index}</title>'
+            f'<meta name="description" content="Generated page {index} of {size} bytes">'
+            '<style>body { font-family: sans-serif }</style>'
+            '<script>window.analytics = { enabled: false };</script></head><body>'
+            '<nav><a href="/">Home</a><a href="/about">About</a></nav><main>')
+    tail = '</main><footer>Footer text</footer></body></html>'
+    parts = [head]
+    length = len(head) + len(tail)
+    section = 0
+    while length < size:
+        section += 1
+        words = ' '.join(rng.choice(WORDS) for _ in range(60))
+        chunk = (f'<h2>Section {section}</h2><p>{words}</p>'
+                 f'<p>{words[:200]} <a href="/posts/{index}-{section}">read more</a></p>')
+        parts.append(chunk)
+        length += len(chunk)
+    parts.append(tail)
+    return ''.join(parts).encode('utf-8')
+
+
+class CorpusHandler(BaseHTTPRequestHandler):
+    """Serves /page/<size>/<index> with generated HTML."""
+    
+    protocol_version = 'HTTP/1.1'
+    # Keep-alive responses are written as headers then body; without this the
+    # second small write waits on a delayed ACK and every fetch looks 40ms slower.
+    disable_nagle_algorithm = True
+    _cache: Dict[int, bytes] = {}
+    _lock = threading.Lock()
+    
+    def do_GET(self):
+        try:
+            _, kind, size, index = self.path.split('/')
+            size, index = int(size), int(index)
+            if kind != 'page':
+                raise ValueError(kind)
+        except ValueError:
+            self.send_error(404)
+            return
+        
+        # Pages of one size share a body so generating HTML never bottlenecks the server.
+        with self._lock:
+            if size not in self._cache:
+                self._cache[size] = generate_page(size)
+        body = self._cache[size]
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def corpus_server():
+    """Run the corpus server on a free local port and yield its base URL."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), CorpusHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the pct-th percentile of values using linear interpolation."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def measure(name: str, fn: Callable[[], Any], items: int, nbytes: int = 0,
+            latencies: Optional[List[float]] = None) -> Dict[str, Any]:
+    """
+    Time one run of fn, then run it again under tracemalloc for peak memory.
+    
+    Args:
+        name: Benchmark name
+        fn: Callable performing the work; it may append per-item latencies
+        items: Number of items (pages or sources) processed per run
+        nbytes: Number of input bytes processed per run
+        latencies: List fn appends per-item latencies to, if any
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        if latencies is not None:
+            latencies.clear()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        samples = list(latencies) if latencies else [elapsed / max(items, 1)]
+        
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    
+    result = {
+        'name': name,
+        'items': items,
+        'seconds': round(elapsed, 6),
+        'items_per_second': round(items / elapsed, 2) if elapsed else None,
+        'mb_per_second': round(nbytes / MB / elapsed, 2) if elapsed and nbytes else None,
+        'latency_ms': {
+            'p50': round(percentile(samples, 50) * 1000, 3),
+            'p90': round(percentile(samples, 90) * 1000, 3),
+            'p99': round(percentile(samples, 99) * 1000, 3)
+        },
+        'peak_memory_mb': round(peak / MB, 3)
+    }
+    print(f"  {name:<40} {elapsed:8.3f}s  {result['items_per_second'] or 0:10.1f}/s  "
+          f"p50 {result['latency_ms']['p50']:8.2f}ms  peak {result['peak_memory_mb']:8.2f} MB")
+    return result
+
+
+def bench_page_sizes(base_url: str, sizes: List[int], scraper: ProfileScraper) -> List[Dict[str, Any]]:
+    """Time scrape_website on single pages of each size."""
+    results = []
+    for size in sizes:
+        url = f'{base_url}/page/{size}/0'
+        repeats = max(1, min(20, MB // size))
+        latencies: List[float] = []
+        
+        def run():
+            for _ in range(repeats):
+                start = time.perf_counter()
+                scraper.scrape_website(url)
+                latencies.append(time.perf_counter() - start)
+        
+        results.append(measure(f'scrape_website[{size // KB}KB]', run, repeats,
+                               size * repeats, latencies))
+    return results
+
+
+def bench_page_counts(base_url: str, counts: List[int], scraper: ProfileScraper) -> List[Dict[str, Any]]:
+    """Time scrape_all over batches of pages, plus the writers on the resulting records."""
+    results = []
+    for count in counts:
+        urls = {f'page {i}': f'{base_url}/page/{BATCH_PAGE_SIZE}/{i}' for i in range(count)}
+        latencies: List[float] = []
+        lock = threading.Lock()
+        
+        def scrape_one(name, url):
+            start = time.perf_counter()
+            record = scraper.scrape_website(url)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+            return record
+        
+        records: Dict[str, Any] = {}
+        
+        def run():
+            records.update(scraper.scrape_all(urls, scrape_one))
+        
+        results.append(measure(f'scrape_all[{count} pages]', run, count,
+                               BATCH_PAGE_SIZE * count, latencies))
+        results.extend(bench_render(records, f'{count} sources'))
+    return results
+
+
+def bench_parse_scaling(base_url: str, count: int, worker_counts: List[int], fetch_workers: int,
+                        extractor: str) -> List[Dict[str, Any]]:
+    """Time scrape_all over the same batch of large pages, parsed inline and in pools of each size."""
+    urls = {f'page {i}': f'{base_url}/page/{SCALING_PAGE_SIZE}/{i}' for i in range(count)}
+    results = []
+    for parse_workers in worker_counts:
+        scraper = ProfileScraper(max_workers=max(fetch_workers, parse_workers),
+                                 per_host_limit=max(fetch_workers, parse_workers),
+                                 extractor=extractor, rate_limit=0, parse_workers=parse_workers)
+        try:
+            if parse_workers:
+                # Start the worker processes outside the timed run
+                scraper.parse_pool.extract(generate_page(KB))
+            label = f'{parse_workers} parse workers' if parse_workers else 'inline parse'
+            results.append(measure(f'scrape_all[{count}x{SCALING_PAGE_SIZE // KB}KB, {label}]',
+                                   lambda: scraper.scrape_all(urls), count, SCALING_PAGE_SIZE * count))
+        finally:
+            scraper.close()
+    
+    inline = results[0]['seconds']
+    for result in results[1:]:
+        print(f"  {result['name']:<40} speedup {inline / result['seconds']:.2f}x over inline")
+    return results
+
+
+def synthetic_fields(index: int) -> Dict[str, Any]:
+    """Extractor output for one page, shaped like a typical crawled page."""
+    return {
+        'title': f'Page {index} - {WORDS[index % len(WORDS)]}',
+        'description': f'Description of page {index}',
+        'headings': [{'level': f'h{1 + i % 3}', 'text': f'Heading {i} of page {index}'} for i in range(RECORD_HEADINGS)],
+        'links': [{'text': f'Link {i}', 'href': f'/page/{index}/{i}'} for i in range(RECORD_LINKS)],
+        'content': f'{index} ' + ' '.join(WORDS) * 4
+    }
+
+
+def bench_record_memory(count: int) -> List[Dict[str, Any]]:
+    """Compare the memory held by count scraped records as plain dicts and as ScrapeResult."""
+    builders = {
+        'dict': lambda index, fields: {'url': f'https://example.com/{index}', **fields,
+                                       'scraped_at': datetime.now().isoformat()},
+        'ScrapeResult': lambda index, fields: ScrapeResult.from_fields(
+            f'https://example.com/{index}', fields, datetime.now().isoformat())
+    }
+    results = []
+    for label, build in builders.items():
+        tracemalloc.start()
+        start = time.perf_counter()
+        records = [build(index, synthetic_fields(index)) for index in range(count)]
+        elapsed = time.perf_counter() - start
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result = {
+            'name': f'records[{count} {label}]',
+            'items': count,
+            'seconds': round(elapsed, 6),
+            'items_per_second': round(count / elapsed, 3) if elapsed else None,
+            'mb_per_second': None,
+            'latency_ms': None,
+            'peak_memory_mb': round(peak / MB, 3),
+            'retained_memory_mb': round(retained / MB, 3),
+            'bytes_per_record': round(retained / count)
+        }
+        print(f"  {result['name']:<40} {elapsed:8.3f}s  retained {result['retained_memory_mb']:8.2f} MB  "
+              f"({result['bytes_per_record']} bytes/record)")
+        results.append(result)
+        del records
+    
+    saved = 1 - results[1]['retained_memory_mb'] / results[0]['retained_memory_mb']
+    print(f"  ScrapeResult holds {saved * 100:.0f}% less memory than dict records")
+    return results
+
+
+def bench_archive(archive_file: str, workers: int, extractor: str) -> List[Dict[str, Any]]:
+    """Time scrape_all over every page of a recorded HTTP archive, replayed without the network."""
+    from http_archive import HttpArchive, entry_body
+    
+    archive = HttpArchive(archive_file, 'replay')
+    urls = {url: url for url in archive.urls()}
+    nbytes = sum(len(entry_body(archive.lookup('GET', url))) for url in urls)
+    scraper = ProfileScraper(max_workers=workers, per_host_limit=workers, extractor=extractor,
+                             rate_limit=0, archive=archive)
+    records: Dict[str, Any] = {}
+    
+    def run():
+        records.update(scraper.scrape_all(urls))
+    
+    results = [measure(f'scrape_all[archive {len(urls)} pages]', run, len(urls), nbytes)]
+    results.extend(bench_render(records, 'archive'))
+    return results
+
+
+def bench_render(records: Dict[str, Any], label: str) -> List[Dict[str, Any]]:
+    """
+    Time save_results, render_pages, and writing the Markdown report and the
+    Jekyll pages from the rendered pages, in a scratch directory.
+    """
+    scraper = ProfileScraper()
+    rendered = scraper.render_pages(records)
+    results = []
+    work_dir = tempfile.mkdtemp(prefix='bench_render_')
+    original_dir = os.getcwd()
+    try:
+        os.chdir(work_dir)
+        results.append(measure(f'save_results[{label}]',
+                               lambda: scraper.save_results(records), len(records)))
+        results.append(measure(f'render_pages[{label}]',
+                               lambda: scraper.render_pages(records), len(records)))
+        results.append(measure(f'create_markdown_report[{label}]',
+                               lambda: scraper.create_markdown_report(records, rendered=rendered), len(records)))
+        results.append(measure(f'create_jekyll_pages[{label}]',
+                               lambda: scraper.create_jekyll_pages(records, rendered=rendered), len(records)))
+    finally:
+        os.chdir(original_dir)
+        shutil.rmtree(work_dir)
+    return results
+
+
+def bench_notes(count: int) -> List[Dict[str, Any]]:
+    """
+    Time create_jekyll_pages for count sources in a scratch directory, flat
+    and in subdirectories: a cold build, a rebuild that rewrites every note,
+    and an incremental run with nothing changed.
+    """
+    records = {f'example.com/page {index}': ScrapeResult.from_fields(
+                   f'https://example.com/page/{index}', synthetic_fields(index), '2026-01-01T00:00:00')
+               for index in range(count)}
+    results = []
+    for note_subdirs in (False, True):
+        scraper = ProfileScraper(note_subdirs=note_subdirs)
+        rendered = scraper.render_pages(records)
+        layout = 'nested' if note_subdirs else 'flat'
+        work_dir = tempfile.mkdtemp(prefix='bench_notes_')
+        original_dir = os.getcwd()
+        try:
+            os.chdir(work_dir)
+            for label, incremental in (('cold', False), ('rewrite', False), ('unchanged', True)):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    scraper.create_jekyll_pages(records, incremental=incremental, rendered=rendered)
+                    elapsed = time.perf_counter() - start
+                result = {
+                    'name': f'notes[{count} {layout} {label}]',
+                    'items': count,
+                    'seconds': round(elapsed, 6),
+                    'items_per_second': round(count / elapsed, 2) if elapsed else None,
+                    'mb_per_second': None,
+                    'latency_ms': None,
+                    'peak_memory_mb': None
+                }
+                print(f"  {result['name']:<40} {elapsed:8.3f}s  {result['items_per_second'] or 0:10.1f}/s")
+                results.append(result)
+        finally:
+            os.chdir(original_dir)
+            shutil.rmtree(work_dir)
+    return results
+
+
+def bench_startup(runs: int) -> List[Dict[str, Any]]:
+    """Time cold starts of fresh interpreters importing the scraper for rendering or scraping."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for label, program in STARTUP_PROGRAMS.items():
+        check = "; import sys; print('requests' in sys.modules)"
+        loaded = subprocess.run([sys.executable, '-c', program + check], cwd=script_dir,
+                                capture_output=True, text=True, check=True).stdout.strip() == 'True'
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', program], cwd=script_dir, check=True)
+            samples.append(time.perf_counter() - start)
+        
+        result = {
+            'name': f'startup[{label}]',
+            'items': runs,
+            'seconds': round(percentile(samples, 50), 6),
+            'items_per_second': None,
+            'mb_per_second': None,
+            'latency_ms': {
+                'p50': round(percentile(samples, 50) * 1000, 3),
+                'p90': round(percentile(samples, 90) * 1000, 3),
+                'p99': round(percentile(samples, 99) * 1000, 3)
+            },
+            'peak_memory_mb': None,
+            'network_stack_loaded': loaded
+        }
+        print(f"  {result['name']:<40} p50 {result['latency_ms']['p50']:8.2f}ms  "
+              f"requests imported: {'yes' if loaded else 'no'}")
+        results.append(result)
+    
+    render, scraping = results[1]['seconds'], results[2]['seconds']
+    print(f"  Render-only start saves {(scraping - render) * 1000:.1f}ms "
+          f"({(1 - render / scraping) * 100:.0f}%) over loading the scraping stack")
+    return results
+
+
+def parse_worker_counts() -> List[int]:
+    """Powers of two up to the CPU count, plus the CPU count itself."""
+    cpus = os.cpu_count() or 1
+    counts = [1 << i for i in range(cpus.bit_length()) if 1 << i < cpus]
+    return counts + [cpus]
+
+
+def environment() -> Dict[str, Any]:
+    """Describe where the benchmark ran, so results are compared like for like."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'commit': commit
+    }
+
+
+def compare(current: Dict[str, Any], baseline_file: str, threshold: float) -> List[str]:
+    """
+    Compare a run against a baseline file.
+    
+    Returns:
+        Descriptions of benchmarks that got slower or used more memory than
+        threshold allows
+    """
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = {b['name']: b for b in json.load(f)['benchmarks']}
+    
+    regressions = []
+    for bench in current['benchmarks']:
+        old = baseline.get(bench['name'])
+        if not old:
+            continue
+        for key, label in (('seconds', 'time'), ('peak_memory_mb', 'peak memory'),
+                           ('retained_memory_mb', 'retained memory')):
+            if old.get(key) and bench.get(key) and bench[key] > old[key] * (1 + threshold):
+                regressions.append(f"{bench['name']}: {label} {old[key]} -> {bench[key]} "
+                                   f"(+{(bench[key] / old[key] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description='Benchmark fetching, parsing and rendering.')
+    parser.add_argument('--quick', action='store_true',
+                        help='run a small subset of sizes and page counts')
+    parser.add_argument('--sizes', type=int, nargs='+', metavar='KB',
+                        help='page sizes to benchmark, in KB')
+    parser.add_argument('--counts', type=int, nargs='+', metavar='N',
+                        help='page counts to benchmark')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='concurrent fetches for the page-count benchmarks (default: 8)')
+    parser.add_argument('--parse-workers', type=int, nargs='+', metavar='N',
+                        help='parse pool sizes for the scaling benchmark (default: 1, 2, 4, ... up to the CPU count)')
+    parser.add_argument('--extractor', default='bs4', help='extraction backend (default: bs4)')
+    parser.add_argument('--replay', metavar='ARCHIVE',
+                        help='also benchmark the pages of an archive recorded with scrape_profile.py --record')
+    parser.add_argument('--output', default='bench_results.json',
+                        help='file the JSON results are written to (default: bench_results.json)')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='earlier results file to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='relative slowdown counted as a regression (default: 0.10)')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark suite."""
+    args = parse_args(argv)
+    sizes = [kb * KB for kb in args.sizes] if args.sizes else (
+        QUICK_PAGE_SIZES if args.quick else FULL_PAGE_SIZES)
+    counts = args.counts or (QUICK_PAGE_COUNTS if args.quick else FULL_PAGE_COUNTS)
+    
+    # No per-host pacing: the local server is the only host and should be saturated
+    scraper = ProfileScraper(max_workers=args.workers, per_host_limit=args.workers,
+                             extractor=args.extractor, rate_limit=0)
+    benchmarks = []
+    print("Startup:")
+    benchmarks.extend(bench_startup(5 if args.quick else 20))
+    print("\nRecord memory:")
+    benchmarks.extend(bench_record_memory(QUICK_RECORD_COUNT if args.quick else FULL_RECORD_COUNT))
+    print("\nNote volume:")
+    benchmarks.extend(bench_notes(QUICK_NOTE_COUNT if args.quick else FULL_NOTE_COUNT))
+    
+    with corpus_server() as base_url:
+        print(f"Serving benchmark corpus at {base_url}")
+        print("\nPage sizes:")
+        benchmarks.extend(bench_page_sizes(base_url, sizes, scraper))
+        print("\nPage counts:")
+        benchmarks.extend(bench_page_counts(base_url, counts, scraper))
+        print("\nParse scaling:")
+        benchmarks.extend(bench_parse_scaling(base_url, QUICK_SCALING_PAGES if args.quick else FULL_SCALING_PAGES,
+                                              [0] + (args.parse_workers or parse_worker_counts()),
+                                              args.workers, args.extractor))
+    
+    if args.replay:
+        print(f"\nRecorded pages ({args.replay}):")
+        benchmarks.extend(bench_archive(args.replay, args.workers, args.extractor))
+    
+    report = {'environment': environment(), 'benchmarks': benchmarks}
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+    
+    if args.compare:
+        regressions = compare(report, args.compare, args.threshold)
+        if regressions:
+            print(f"\n✗ {len(regressions)} regression(s) against {args.compare}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print(f"\n✓ No regressions against {args.compare}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Same-domain crawler for the profile scraper.
+Follows the links that scrape_website extracts from each page, so a whole
+site (not just its home page) can be turned into Jekyll notes.
+"""
+
+import hashlib
+import posixpath
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit
+
+from url_utils import normalize_url
+
+
+# Links to these kinds of files are never fetched as pages
+SKIPPED_EXTENSIONS = {
+    '.pdf', '.zip', '.gz', '.tar', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp',
+    '.ico', '.mp3', '.mp4', '.mov', '.css', '.js', '.xml', '.json', '.rss', '.atom'
+}
+
+
+def site_host(url: str) -> str:
+    """Return the host of url without a leading 'www.' for same-site checks."""
+    host = urlsplit(url).netloc
+    return host[4:] if host.startswith('www.') else host
+
+
+class SeenSet:
+    """
+    Set of visited URLs that stores an 8-byte digest per URL instead of the
+    URL string, keeping large crawls small in memory.
+    """
+    
+    def __init__(self):
+        self._digests = set()
+    
+    @staticmethod
+    def _digest(url: str) -> int:
+        return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'big')
+    
+    def add(self, url: str) -> bool:
+        """Add url and return True if it had not been seen before."""
+        digest = self._digest(url)
+        if digest in self._digests:
+            return False
+        self._digests.add(digest)
+        return True
+    
+    def __contains__(self, url: str) -> bool:
+        return self._digest(url) in self._digests
+    
+    def __len__(self) -> int:
+        return len(self._digests)
+
+
+class SiteCrawler:
+    """Breadth-first crawler that scrapes every page of one site."""
+    
+    def __init__(self, scraper, max_depth: int = 2, max_pages: int = 50, respect_robots: bool = True):
+        """
+        Args:
+            scraper: ProfileScraper used to fetch and extract each page
+            max_depth: Number of link hops followed from the start page
+            max_pages: Maximum number of pages fetched
+            respect_robots: Skip URLs disallowed by the site's robots.txt
+        """
+        self.scraper = scraper
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.respect_robots = respect_robots
+        self._robots: Dict[str, Any] = {}
+    
+    def crawl(self, name: str, start_url: str,
+              start_record: Optional[Dict[str, Any]] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Crawl a site starting from start_url.
+        
+        Each depth level of the frontier is fetched concurrently through
+        scraper.scrape_all, so the scraper's worker and per-host caps apply.
+        
+        Args:
+            name: Source name of the start page; other pages are named after it
+            start_url: URL to start crawling from
+            start_record: Already scraped record of the start page, which is
+                then used as the first frontier instead of being fetched again
+        
+        Returns:
+            Dictionary of source name to scraped data, one entry per page
+        """
+        start = normalize_url(start_url)
+        if start is None:
+            print(f"Cannot crawl {start_url}: not an http(s) URL")
+            return {name: start_record}
+        
+        host = site_host(start)
+        seen = SeenSet()
+        seen.add(start)
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        
+        frontier = [start]
+        first_depth = 0
+        if start_record is not None:
+            results[name] = start_record
+            frontier = self._discover(start_record, start, host, seen)
+            first_depth = 1
+        
+        for depth in range(first_depth, self.max_depth + 1):
+            batch = {}
+            for url in frontier:
+                if len(results) + len(batch) >= self.max_pages:
+                    break
+                if self.allowed(url):
+                    source = self._source_name(name, start, url)
+                    if source in results or source in batch:
+                        source = f'{name} {url}'
+                    batch[source] = url
+                else:
+                    print(f"  Skipping {url} (disallowed by robots.txt)")
+            if not batch:
+                break
+            
+            fetched = self.scraper.scrape_all(batch)
+            results.update(fetched)
+            
+            if depth == self.max_depth:
+                break
+            frontier = []
+            for source, url in batch.items():
+                frontier.extend(self._discover(fetched[source], url, host, seen))
+        
+        print(f"Crawled {len(results)} pages from {start} ({len(seen)} URLs discovered)")
+        return results
+    
+    def _discover(self, record: Optional[Dict[str, Any]], url: str, host: str,
+                  seen: SeenSet) -> List[str]:
+        """Return the unseen same-site page URLs linked from a scraped record."""
+        found = []
+        if not record:
+            return found
+        for link in record.get('links', []):
+            target = normalize_url(link.get('href', ''), url)
+            if (target and site_host(target) == host and not self._skipped_file(target)
+                    and seen.add(target)):
+                found.append(target)
+        return found
+    
+    def allowed(self, url: str) -> bool:
+        """Check url against the robots.txt of its host."""
+        if not self.respect_robots:
+            return True
+        parts = urlsplit(url)
+        root = f'{parts.scheme}://{parts.netloc}'
+        if root not in self._robots:
+            self._robots[root] = self._fetch_robots(f'{root}/robots.txt')
+        return self._robots[root].can_fetch(self.scraper.session.headers.get('User-Agent', '*'), url)
+    
+    def _fetch_robots(self, robots_url: str):
+        # robotparser pulls in urllib.request, http.client and ssl, so it is only loaded to crawl
+        from urllib.robotparser import RobotFileParser
+        
+        parser = RobotFileParser(robots_url)
+        try:
+            response = self.scraper.session.get(robots_url, timeout=10)
+        except Exception as e:
+            print(f"Could not fetch {robots_url}: {e}")
+            parser.allow_all = True
+            return parser
+        
+        if response.status_code in (401, 403):
+            parser.disallow_all = True
+        elif response.status_code >= 400:
+            parser.allow_all = True
+        else:
+            parser.parse(response.text.splitlines())
+        return parser
+    
+    @staticmethod
+    def _skipped_file(url: str) -> bool:
+        return posixpath.splitext(urlsplit(url).path)[1].lower() in SKIPPED_EXTENSIONS
+    
+    @staticmethod
+    def _source_name(name: str, start: str, url: str) -> str:
+        """Name a crawled page after the start page's source name and its path."""
+        if url == start:
+            return name
+        parts = urlsplit(url)
+        suffix = parts.path.rstrip('/') or '/'
+        if parts.query:
+            suffix = f'{suffix}?{parts.query}'
+        return f'{name}{suffix}'
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+HTML extraction backends for the profile scraper.
+Each backend turns a page into the title, description, headings, links and
+main content fields of a scraped record. BeautifulSoup and lxml are imported
+on first parse, so importing this module stays cheap.
+"""
+
+import re
+from typing import Dict, Any, List, Optional, Union
+
+
+# Maximum number of characters of main content kept per page
+CONTENT_LIMIT = 5000
+
+HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+
+# Tags inside which BeautifulSoup keeps whitespace-only strings verbatim
+PRESERVE_WHITESPACE_TAGS = ('pre', 'textarea')
+
+# Tags whose strings BeautifulSoup stores as a separate string class, which
+# get_text() on any other tag leaves out
+STRING_CONTAINER_TAGS = ('rt', 'rp', 'template')
+
+_ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+# Main content candidates, in order of preference; the body is the fallback
+MAIN_CONTENT_SELECTORS = ['main', 'article', 'div[role="main"]', '.content', '#content']
+
+_META_CHARSET_RE = re.compile(rb'charset=["\']?([\w.:-]+)', re.IGNORECASE)
+
+# lxml refuses a str that still carries an XML declaration naming an encoding
+_XML_DECLARATION_RE = re.compile(r'^\ufeff?\s*<\?xml[^>]*\?>')
+
+
+def _join_limited(parts: List[str]) -> str:
+    return '\n'.join(parts)[:CONTENT_LIMIT]
+
+
+class BeautifulSoupExtractor:
+    """Extracts page fields with BeautifulSoup over the lxml parser."""
+    
+    name = 'bs4'
+    
+    def extract(self, markup: Union[str, bytes], max_headings: Optional[int] = None,
+                max_links: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Extract page fields from HTML.
+        
+        Args:
+            markup: Page HTML; bytes are decoded by BeautifulSoup's detection
+            max_headings: Stop collecting headings after this many
+            max_links: Stop collecting links after this many
+        
+        Returns:
+            Dictionary with title, description, headings, links and content
+        """
+        return self.extract_tree(self.parse(markup), max_headings, max_links)
+    
+    def parse(self, markup: Union[str, bytes]):
+        """Parse HTML into a BeautifulSoup tree."""
+        from bs4 import BeautifulSoup
+        
+        return BeautifulSoup(markup, 'lxml')
+    
+    def extract_tree(self, soup, max_headings: Optional[int] = None,
+                     max_links: Optional[int] = None) -> Dict[str, Any]:
+        """Extract page fields from a tree returned by parse (which it modifies)."""
+        # Remove script and style elements
+        for script in soup(['script', 'style']):
+            script.decompose()
+        
+        # Extract basic information
+        title = soup.find('title')
+        title_text = title.get_text().strip() if title else 'No title'
+        
+        # Extract meta description
+        meta_desc = soup.find('meta', attrs={'name': 'description'})
+        description = meta_desc.get('content', '').strip() if meta_desc else ''
+        
+        # Extract main content
+        # Try to find main content areas
+        main_content = None
+        for tag in MAIN_CONTENT_SELECTORS:
+            main_content = soup.select_one(tag)
+            if main_content:
+                break
+        
+        if not main_content:
+            main_content = soup.find('body')
+        
+        # Stop collecting text once the content budget is filled
+        parts = []
+        if main_content:
+            length = 0
+            for text in main_content.stripped_strings:
+                parts.append(text)
+                length += len(text) + 1
+                if length > CONTENT_LIMIT:
+                    break
+        
+        # Extract all headings
+        headings = []
+        for heading in soup.find_all(list(HEADING_TAGS), limit=max_headings):
+            headings.append({
+                'level': heading.name,
+                'text': heading.get_text().strip()
+            })
+        
+        # Extract all links
+        links = []
+        for link in soup.find_all('a', href=True, limit=max_links):
+            links.append({
+                'text': link.get_text().strip(),
+                'href': link['href']
+            })
+        
+        return {
+            'title': title_text,
+            'description': description,
+            'headings': headings,
+            'links': links,
+            'content': _join_limited(parts)
+        }
+
+
+class _TextCollector:
+    """Accumulates the text of one element while the tree is walked."""
+    
+    __slots__ = ('parts', 'length', 'strip', 'container')
+    
+    def __init__(self, tag: str, strip: bool = False):
+        self.parts: List[str] = []
+        self.length = 0
+        self.strip = strip
+        # Only strings whose innermost string container matches this are kept
+        self.container = tag if tag in STRING_CONTAINER_TAGS else None
+    
+    def add(self, text: str):
+        if self.strip:
+            if self.length > CONTENT_LIMIT:
+                return
+            text = text.strip()
+            if not text:
+                return
+            self.length += len(text) + 1
+        self.parts.append(text)
+    
+    def text(self) -> str:
+        if self.strip:
+            return _join_limited(self.parts)
+        return ''.join(self.parts).strip()
+
+
+class LxmlExtractor:
+    """
+    Extracts page fields in a single traversal of a native lxml tree.
+    
+    Produces the same output as BeautifulSoupExtractor: script and style
+    subtrees and comments are skipped, and the main content candidate is
+    chosen with the same order of preference.
+    """
+    
+    name = 'lxml'
+    
+    def extract(self, markup: Union[str, bytes], max_headings: Optional[int] = None,
+                max_links: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Extract page fields from HTML.
+        
+        Args:
+            markup: Page HTML; bytes are decoded as UTF-8, then with the
+                charset from a <meta> tag, then as Windows-1252
+            max_headings: Stop collecting headings after this many
+            max_links: Stop collecting links after this many
+        
+        Returns:
+            Dictionary with title, description, headings, links and content
+        """
+        return self.extract_tree(self.parse(markup), max_headings, max_links)
+    
+    def parse(self, markup: Union[str, bytes]):
+        """Parse HTML into an lxml tree, returning its root or None for an empty document."""
+        from lxml import etree
+        
+        if isinstance(markup, bytes):
+            markup = self._decode(markup)
+        # XHTML pages start with one; the text is already decoded, so it says nothing lxml needs
+        markup = _XML_DECLARATION_RE.sub('', markup, count=1)
+        
+        try:
+            return etree.fromstring(markup, etree.HTMLParser())
+        except (etree.ParserError, etree.XMLSyntaxError, ValueError):
+            return None
+    
+    def extract_tree(self, root, max_headings: Optional[int] = None,
+                     max_links: Optional[int] = None) -> Dict[str, Any]:
+        """Extract page fields in one traversal of a tree returned by parse."""
+        title = None
+        description = None
+        candidates: List[Optional[_TextCollector]] = [None] * (len(MAIN_CONTENT_SELECTORS) + 1)
+        headings: List[Dict[str, str]] = []
+        links: List[Dict[str, str]] = []
+        
+        # Collectors opened by each element on the current path; text is fed
+        # to every collector that is open when it is encountered.
+        active: List[_TextCollector] = []
+        opened: Dict[Any, List[_TextCollector]] = {}
+        pending: Dict[Any, Dict[str, Any]] = {}
+        preserve = 0
+        containers: List[Optional[str]] = [None]
+        
+        stack = [(root, False)] if root is not None else []
+        while stack:
+            element, closing = stack.pop()
+            
+            if closing:
+                for collector in opened.pop(element, ()):
+                    active.remove(collector)
+                    if element in pending:
+                        pending.pop(element)['text'] = collector.text()
+                if element.tag in PRESERVE_WHITESPACE_TAGS:
+                    preserve -= 1
+                if element.tag in STRING_CONTAINER_TAGS:
+                    containers.pop()
+                self._emit(active, element.tail, preserve, containers[-1])
+                continue
+            
+            tag = element.tag
+            if not isinstance(tag, str) or tag in ('script', 'style'):
+                # Comments, processing instructions and removed elements
+                # contribute nothing but their trailing text.
+                self._emit(active, element.tail, preserve, containers[-1])
+                continue
+            
+            collectors = []
+            
+            if tag == 'title' and title is None:
+                title = _TextCollector(tag)
+                collectors.append(title)
+            elif tag == 'meta' and description is None and element.get('name') == 'description':
+                description = element.get('content', '').strip()
+            elif tag in HEADING_TAGS and (max_headings is None or len(headings) < max_headings):
+                entry = {'level': tag, 'text': ''}
+                headings.append(entry)
+                pending[element] = entry
+                collectors.append(_TextCollector(tag))
+            elif tag == 'a' and 'href' in element.attrib and (max_links is None or len(links) < max_links):
+                entry = {'text': '', 'href': element.get('href')}
+                links.append(entry)
+                pending[element] = entry
+                collectors.append(_TextCollector(tag))
+            
+            for index in self._candidate_indexes(element, tag):
+                if candidates[index] is None:
+                    candidates[index] = _TextCollector(tag, strip=True)
+                    collectors.append(candidates[index])
+            
+            if collectors:
+                opened[element] = collectors
+                active.extend(collectors)
+            if tag in PRESERVE_WHITESPACE_TAGS:
+                preserve += 1
+            if tag in STRING_CONTAINER_TAGS:
+                containers.append(tag)
+            self._emit(active, element.text, preserve, containers[-1])
+            
+            stack.append((element, True))
+            for child in reversed(element):
+                stack.append((child, False))
+        
+        main_content = next((c for c in candidates if c is not None), None)
+        
+        return {
+            'title': title.text() if title is not None else 'No title',
+            'description': description or '',
+            'headings': headings,
+            'links': links,
+            'content': main_content.text() if main_content is not None else ''
+        }
+    
+    @staticmethod
+    def _emit(active: List[_TextCollector], text: Optional[str], preserve: int,
+              container: Optional[str]):
+        if text and active:
+            # Like BeautifulSoup, collapse whitespace-only strings to a single
+            # newline or space outside <pre> and <textarea>.
+            if not preserve and not text.strip(_ASCII_SPACES):
+                text = '\n' if '\n' in text else ' '
+            for collector in active:
+                if collector.container == container:
+                    collector.add(text)
+    
+    @staticmethod
+    def _candidate_indexes(element, tag: str) -> List[int]:
+        """Return the positions in MAIN_CONTENT_SELECTORS (or body) that element matches."""
+        indexes = []
+        if tag == 'main':
+            indexes.append(0)
+        elif tag == 'article':
+            indexes.append(1)
+        elif tag == 'div' and element.get('role') == 'main':
+            indexes.append(2)
+        elif tag == 'body':
+            indexes.append(5)
+        if 'content' in element.get('class', '').split():
+            indexes.append(3)
+        if element.get('id') == 'content':
+            indexes.append(4)
+        return indexes
+    
+    @staticmethod
+    def _decode(body: bytes) -> str:
+        try:
+            return body.decode('utf-8')
+        except UnicodeDecodeError:
+            pass
+        match = _META_CHARSET_RE.search(body[:1024])
+        if match:
+            try:
+                return body.decode(match.group(1).decode('ascii'), errors='replace')
+            except LookupError:
+                pass
+        return body.decode('cp1252', errors='replace')
+
+
+EXTRACTORS = {
+    BeautifulSoupExtractor.name: BeautifulSoupExtractor,
+    LxmlExtractor.name: LxmlExtractor
+}
+
+
+def get_extractor(name: str):
+    """
+    Return an extractor backend by name.
+    
+    Args:
+        name: One of the keys of EXTRACTORS
+    
+    Raises:
+        ValueError: If no backend has that name
+    """
+    try:
+        return EXTRACTORS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown extractor '{name}' (choose from {', '.join(EXTRACTORS)})")
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Content fingerprints for the profile scraper.
+Each page's content gets an exact hash and a 64-bit simhash over its word
+shingles. Pages whose simhashes differ in only a few bits are near
+duplicates, so a re-scrape that only changed a footer or a date can be told
+apart from a real update, and mirrored pages can be grouped by splitting
+the simhash into bands instead of comparing every pair.
+"""
+
+import hashlib
+import re
+from typing import Dict, Any, Iterable, List, Set, Tuple
+
+# Words per shingle; three-word shingles make a changed word touch only a few of them
+SHINGLE_SIZE = 3
+
+FINGERPRINT_BITS = 64
+
+# Simhash bits two pages may differ in and still count as the same content. A
+# footer date change on a page at the content limit flips about 2 bits (at most
+# 5), while unrelated pages differ in 20 or more
+DEFAULT_MAX_DISTANCE = 6
+
+_WORD_RE = re.compile(r'\w+')
+
+# Record fields a minor change may not touch; only the content may differ
+_STABLE_FIELDS = ('url', 'title', 'description', 'headings', 'links')
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """Return the distinct runs of size consecutive lowercase words in text."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _hash64(shingle: str) -> int:
+    # Python's hash() is salted per process, so fingerprints would not match across runs
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def simhash(text: str) -> int:
+    """
+    Return the 64-bit simhash of text's shingles.
+    
+    Each bit is set when more than half of the shingle hashes have it set,
+    so changing a few shingles flips few bits. Empty text hashes to 0.
+    """
+    hashes = [format(_hash64(shingle), '064b') for shingle in shingles(text)]
+    if not hashes:
+        return 0
+    half = len(hashes) / 2
+    value = 0
+    # Transposing the bit strings counts each bit position in C rather than per hash
+    for column in zip(*hashes):
+        value = (value << 1) | (column.count('1') > half)
+    return value
+
+
+def content_hash(text: str) -> str:
+    """Return the SHA-256 of text, for exact comparisons."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def hamming(a: int, b: int) -> int:
+    """Return the number of bits two fingerprints differ in."""
+    return bin(a ^ b).count('1')
+
+
+def fingerprint(record: Dict[str, Any]) -> Tuple[int, str]:
+    """
+    Return the (simhash, content hash) of a scraped record's content.
+    
+    ScrapeResult records carry both; they are computed for plain dicts
+    (e.g. records loaded from the result store).
+    """
+    if hasattr(record, 'simhash'):
+        return record.simhash, record.content_hash
+    content = record.get('content') or ''
+    return simhash(content), content_hash(content)
+
+
+def is_minor_change(old: Dict[str, Any], new: Dict[str, Any],
+                    max_distance: int = DEFAULT_MAX_DISTANCE) -> bool:
+    """
+    Check whether new differs from old only by a small content change.
+    
+    Every field but the content (and the scrape time) must be unchanged, and
+    the content's simhash may differ in at most max_distance bits. Identical
+    content is not a change at all, so it is not reported as a minor one.
+    """
+    if any(old.get(field) != new.get(field) for field in _STABLE_FIELDS):
+        return False
+    old_simhash, old_hash = fingerprint(old)
+    new_simhash, new_hash = fingerprint(new)
+    return old_hash != new_hash and hamming(old_simhash, new_simhash) <= max_distance
+
+
+class SimhashIndex:
+    """
+    Locality-sensitive index of simhashes for finding near duplicates.
+    
+    A fingerprint is split into max_distance + 1 bands. Two fingerprints
+    within max_distance bits of each other must agree on at least one band,
+    so only the keys sharing a band are compared.
+    """
+    
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE):
+        """
+        Args:
+            max_distance: Bits two fingerprints may differ in to be near duplicates
+        
+        Raises:
+            ValueError: If max_distance leaves no bits per band
+        """
+        if not 0 <= max_distance < FINGERPRINT_BITS:
+            raise ValueError(f"max_distance must be between 0 and {FINGERPRINT_BITS - 1}")
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        width = FINGERPRINT_BITS // bands
+        # The last band takes the bits left over by the division
+        self._bands = [(i * width, FINGERPRINT_BITS - i * width if i == bands - 1 else width)
+                       for i in range(bands)]
+        self._buckets: Dict[Tuple[int, int], Set[Any]] = {}
+        self._fingerprints: Dict[Any, int] = {}
+    
+    def _keys(self, value: int) -> List[Tuple[int, int]]:
+        return [(band, (value >> shift) & ((1 << width) - 1))
+                for band, (shift, width) in enumerate(self._bands)]
+    
+    def add(self, key: Any, value: int):
+        """Index key under its fingerprint, replacing any fingerprint it had."""
+        if key in self._fingerprints:
+            self.remove(key)
+        self._fingerprints[key] = value
+        for bucket in self._keys(value):
+            self._buckets.setdefault(bucket, set()).add(key)
+    
+    def remove(self, key: Any):
+        """Drop key from the index."""
+        value = self._fingerprints.pop(key)
+        for bucket in self._keys(value):
+            members = self._buckets[bucket]
+            members.discard(key)
+            if not members:
+                del self._buckets[bucket]
+    
+    def near(self, value: int) -> Set[Any]:
+        """Return the keys whose fingerprints are within max_distance bits of value."""
+        candidates = set()
+        for bucket in self._keys(value):
+            candidates.update(self._buckets.get(bucket, ()))
+        return {key for key in candidates
+                if hamming(self._fingerprints[key], value) <= self.max_distance}
+    
+    def groups(self) -> List[List[Any]]:
+        """
+        Return the groups of keys connected by near-duplicate fingerprints.
+        
+        Groups are sorted and only groups of two or more keys are returned.
+        """
+        # Keys with identical fingerprints are grouped outright; only distinct values are compared
+        by_value: Dict[int, List[Any]] = {}
+        for key, value in self._fingerprints.items():
+            by_value.setdefault(value, []).append(key)
+        parent = {value: value for value in by_value}
+        
+        def find(value):
+            while parent[value] != value:
+                parent[value] = parent[parent[value]]
+                value = parent[value]
+            return value
+        
+        for members in self._buckets.values():
+            values = sorted({self._fingerprints[key] for key in members})
+            for i, a in enumerate(values):
+                for b in values[i + 1:]:
+                    if find(a) != find(b) and hamming(a, b) <= self.max_distance:
+                        parent[find(a)] = find(b)
+        
+        grouped: Dict[int, List[Any]] = {}
+        for value, keys in by_value.items():
+            grouped.setdefault(find(value), []).extend(keys)
+        return sorted((sorted(group, key=str) for group in grouped.values() if len(group) > 1),
+                      key=lambda group: str(group[0]))
+    
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+
+def near_duplicate_groups(records: Iterable[Tuple[str, Dict[str, Any]]],
+                          max_distance: int = DEFAULT_MAX_DISTANCE) -> List[List[str]]:
+    """
+    Group sources whose content is identical or nearly so.
+    
+    Args:
+        records: (source name, record) pairs; None records and records
+            without content are left out
+        max_distance: Simhash bits two sources may differ in
+    """
+    index = SimhashIndex(max_distance)
+    for name, record in records:
+        if record and record.get('content'):
+            index.add(name, fingerprint(record)[0])
+    return index.groups()
\ No newline at end of file
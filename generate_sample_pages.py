@@ -4,8 +4,10 @@ Generate sample profile pages using mock scraped data.
 This demonstrates the page generation functionality without requiring actual web scraping.
 """
 
+import argparse
 from datetime import datetime
-from scrape_profile import ProfileScraper
+from typing import List, Optional
+from scrape_profile import ProfileScraper, finish_profile
 
 
 def create_sample_data():
@@ -60,8 +62,14 @@ Skills
     }
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """Generate sample Jekyll pages using mock data."""
+    parser = argparse.ArgumentParser(description="Generate sample profile pages from mock data.")
+    parser.add_argument('--profile', nargs='?', const='profile', metavar='DIR',
+                        help='profile every stage and write CPU profiles, flame graph stacks '
+                             'and top allocations to DIR (default: profile)')
+    args = parser.parse_args(argv)
+    
     print("="*60)
     print("Generating Sample Profile Pages")
     print("="*60)
@@ -72,16 +80,23 @@ def main():
     sample_data = create_sample_data()
     
     # Initialize scraper
-    scraper = ProfileScraper()
+    profiler = None
+    if args.profile:
+        from stage_profiler import StageProfiler
+        profiler = StageProfiler(args.profile)
+        profiler.start()
+    scraper = ProfileScraper(profiler=profiler)
     
     # Save sample results
     print("\nSaving sample data...")
     scraper.save_results(sample_data)
-    scraper.create_markdown_report(sample_data)
+    rendered = scraper.render_pages(sample_data)
+    scraper.create_markdown_report(sample_data, rendered=rendered)
     
     # Create Jekyll pages
     print("\nCreating Jekyll pages...")
-    scraper.create_jekyll_pages(sample_data)
+    scraper.create_jekyll_pages(sample_data, rendered=rendered)
+    finish_profile(profiler)
     
     print("\n" + "="*60)
     print("✓ Sample pages generated successfully!")
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Per-host latency and failure history for the profile scraper.
+Persists recent fetch latencies and failures across runs to derive adaptive
+timeouts and hedging delays, and opens a circuit for hosts that keep failing
+so their fallback data is used without waiting on them.
+"""
+
+import json
+import math
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from page_manifest import atomic_open
+
+
+# Statuses that mean the host is refusing us rather than the page being missing
+BLOCKED_STATUSES = {401, 403, 429, 999}
+
+
+def is_failure_status(status_code: int) -> bool:
+    """Check whether a response status counts as a failure of the host."""
+    return status_code in BLOCKED_STATUSES or status_code >= 500
+
+
+def percentile(values, fraction: float) -> float:
+    """Return the nearest-rank percentile of values (fraction between 0 and 1)."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+class HostHealth:
+    """
+    On-disk latency and failure history, keyed by host.
+    
+    Timeouts are a multiple of a high latency percentile, clamped between
+    min_timeout and max_timeout; hosts without enough history get max_timeout.
+    After failure_threshold consecutive failures the host's circuit opens and
+    allow() refuses it until cooldown has passed, when a single probe request
+    is let through to decide whether to close it again.
+    """
+    
+    def __init__(self, health_file: str = '.host_health.json', window: int = 50,
+                 min_samples: int = 5, timeout_percentile: float = 0.99, timeout_factor: float = 3.0,
+                 min_timeout: float = 2.0, max_timeout: float = 30.0, hedge_percentile: float = 0.95,
+                 failure_threshold: int = 3, cooldown: float = 12 * 3600):
+        """
+        Args:
+            health_file: Path of the JSON file holding the history
+            window: Number of recent latencies kept per host
+            min_samples: Latencies needed before timeouts and hedging adapt
+            timeout_percentile: Latency percentile the timeout is derived from
+            timeout_factor: Multiple of that percentile used as the timeout
+            min_timeout: Lower bound of an adaptive timeout in seconds
+            max_timeout: Upper bound, and the timeout of hosts without history
+            hedge_percentile: Latency percentile after which a hedged request is sent
+            failure_threshold: Consecutive failures that open a host's circuit
+            cooldown: Seconds an open circuit refuses requests before a probe
+        """
+        self.health_file = health_file
+        self.window = window
+        self.min_samples = min_samples
+        self.timeout_percentile = timeout_percentile
+        self.timeout_factor = timeout_factor
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.hedge_percentile = hedge_percentile
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+        self.load()
+    
+    def load(self):
+        """Load the history from disk, ignoring a missing or corrupt file."""
+        try:
+            with open(self.health_file, 'r', encoding='utf-8') as f:
+                self._hosts = json.load(f).get('hosts', {})
+        except (OSError, ValueError):
+            self._hosts = {}
+    
+    def save(self):
+        """Write the history to disk atomically."""
+        with self._lock:
+            data = {'hosts': self._hosts}
+            try:
+                with atomic_open(self.health_file) as f:
+                    json.dump(data, f, indent=2, sort_keys=True)
+            except OSError as e:
+                print(f"Error saving host health: {e}")
+    
+    def _host(self, host: str) -> Dict[str, Any]:
+        if host not in self._hosts:
+            self._hosts[host] = {'latencies': [], 'failures': 0, 'opened_at': None}
+        return self._hosts[host]
+    
+    def timeout(self, host: str) -> float:
+        """Return the timeout in seconds for the next request to host."""
+        with self._lock:
+            latencies = self._hosts.get(host, {}).get('latencies', [])
+            if len(latencies) < self.min_samples:
+                return self.max_timeout
+            timeout = percentile(latencies, self.timeout_percentile) * self.timeout_factor
+        return min(self.max_timeout, max(self.min_timeout, timeout))
+    
+    def hedge_delay(self, host: str) -> Optional[float]:
+        """
+        Return how long to wait for a response from host before sending a
+        duplicate request, or None if there is not enough history to tell.
+        """
+        with self._lock:
+            latencies = self._hosts.get(host, {}).get('latencies', [])
+            if len(latencies) < self.min_samples:
+                return None
+            return percentile(latencies, self.hedge_percentile)
+    
+    def allow(self, host: str) -> bool:
+        """
+        Check whether a request to host may be sent.
+        
+        Once an open circuit's cooldown has passed, the first caller is let
+        through as a probe and the cooldown restarts for everyone else.
+        """
+        with self._lock:
+            state = self._hosts.get(host)
+            if not state or state.get('opened_at') is None:
+                return True
+            if time.time() - state['opened_at'] < self.cooldown:
+                return False
+            state['opened_at'] = time.time()
+            return True
+    
+    def is_open(self, host: str) -> bool:
+        """Check whether the circuit of host is open."""
+        with self._lock:
+            return self._hosts.get(host, {}).get('opened_at') is not None
+    
+    def record_success(self, host: str, seconds: float):
+        """Record a response from host that took seconds to arrive, closing its circuit."""
+        with self._lock:
+            state = self._host(host)
+            state['latencies'] = (state['latencies'] + [round(seconds, 4)])[-self.window:]
+            state['failures'] = 0
+            state['opened_at'] = None
+    
+    def record_failure(self, host: str) -> bool:
+        """
+        Record a failed request to host.
+        
+        Returns:
+            True if this failure opened (or re-opened) the host's circuit
+        """
+        with self._lock:
+            state = self._host(host)
+            state['failures'] += 1
+            if state['failures'] >= self.failure_threshold:
+                state['opened_at'] = time.time()
+                return True
+            return False
+    
+    def summary(self) -> str:
+        """Return a one-line summary of the tracked hosts and open circuits."""
+        with self._lock:
+            open_hosts = sorted(host for host, state in self._hosts.items()
+                                if state.get('opened_at') is not None)
+        summary = f"Host health: {len(self._hosts)} hosts tracked"
+        if open_hosts:
+            summary += f", circuit open for {', '.join(open_hosts)}"
+        return summary
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+HTTP archive for deterministic offline runs of the profile scraper.
+In record mode every response the scraper's session receives is appended to
+a JSON Lines archive; in replay mode the session is answered from the
+archive without touching the network.
+"""
+
+import base64
+import io
+import json
+import threading
+import zlib
+from typing import Dict, Any, List, Optional, Tuple
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+
+MODES = ('record', 'replay')
+
+# Headers describing the encoding on the wire; the archive keeps the decoded body
+TRANSFER_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length'}
+
+# Bytes read from a streamed body at a time while recording
+RECORD_CHUNK_SIZE = 64 * 1024
+
+
+class NotArchivedError(requests.exceptions.RequestException):
+    """A request replay has no archived response for; unlike a connection error it is not retried."""
+
+
+def entry_body(entry: Dict[str, Any]) -> bytes:
+    """Return the decoded response body of an archive entry."""
+    return zlib.decompress(base64.b64decode(entry['body']))
+
+
+def _key(method: str, url: str) -> Tuple[str, str]:
+    return method.upper(), url
+
+
+class HttpArchive:
+    """JSON Lines file of archived responses, the latest per method and URL."""
+    
+    def __init__(self, archive_file: str = 'http_archive.jsonl', mode: str = 'replay'):
+        """
+        Args:
+            archive_file: Path of the archive
+            mode: 'record' to archive live responses, 'replay' to serve archived ones
+        
+        Raises:
+            ValueError: If mode is not one of MODES
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown archive mode '{mode}' (choose from {', '.join(MODES)})")
+        self.archive_file = archive_file
+        self.mode = mode
+        self.recorded = 0
+        self.replayed = 0
+        self.missed = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.load()
+    
+    def load(self):
+        """Read the archive, ignoring a missing file and skipping corrupt lines."""
+        try:
+            with open(self.archive_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self._entries[_key(entry['method'], entry['url'])] = entry
+                    except (ValueError, KeyError):
+                        continue
+        except OSError:
+            pass
+    
+    def adapter(self, pool_connections: int = 10, pool_maxsize: int = 10,
+                max_bytes: Optional[int] = None) -> BaseAdapter:
+        """
+        Return the transport adapter to mount on the session for this archive's mode.
+        
+        Args:
+            pool_connections: Connection pools kept by a recording adapter
+            pool_maxsize: Connections kept per pool by a recording adapter
+            max_bytes: Bytes of a streamed body a recording adapter reads and
+                archives; the rest is never downloaded
+        """
+        if self.mode == 'record':
+            return RecordingAdapter(self, max_bytes=max_bytes, pool_connections=pool_connections,
+                                    pool_maxsize=pool_maxsize)
+        return ReplayAdapter(self)
+    
+    def record(self, request: requests.PreparedRequest, response: requests.Response,
+               truncated: bool = False):
+        """
+        Append a live response to the archive.
+        
+        A 304 is only archived for a URL that has no full response yet, so
+        replay can still serve the body to a run without a cache.
+        
+        Args:
+            request: The request sent
+            response: Its response, whose body is read if it was not yet
+            truncated: The body was cut short at the recording cap
+        """
+        key = _key(request.method, request.url)
+        with self._lock:
+            if response.status_code == 304 and key in self._entries:
+                return
+            entry = {
+                'method': key[0],
+                'url': request.url,
+                'status': response.status_code,
+                'reason': response.reason,
+                'headers': {name: value for name, value in response.headers.items()
+                            if name.lower() not in TRANSFER_HEADERS},
+                'body': base64.b64encode(zlib.compress(response.content)).decode('ascii')
+            }
+            if truncated:
+                entry['truncated'] = True
+            self._entries[key] = entry
+            with open(self.archive_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+            self.recorded += 1
+    
+    def lookup(self, method: str, url: str) -> Optional[Dict[str, Any]]:
+        """Return the archived entry for a request, or None, counting replays and misses."""
+        entry = self._entries.get(_key(method, url))
+        with self._lock:
+            if entry is None:
+                self.missed += 1
+            else:
+                self.replayed += 1
+        return entry
+    
+    def urls(self) -> List[str]:
+        """Return the URLs of every archived GET, in the order they were first recorded."""
+        return [url for method, url in self._entries if method == 'GET']
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def summary(self) -> str:
+        """Return a one-line summary of this run's use of the archive."""
+        if self.mode == 'record':
+            return f"HTTP archive: {self.recorded} responses recorded to {self.archive_file}"
+        return (f"HTTP archive: {self.replayed} responses replayed from {self.archive_file}, "
+                f"{self.missed} not archived")
+
+
+class RecordingAdapter(HTTPAdapter):
+    """HTTPAdapter that archives every response it receives."""
+    
+    def __init__(self, archive: HttpArchive, max_bytes: Optional[int] = None, **kwargs):
+        self.archive = archive
+        self.max_bytes = max_bytes
+        super().__init__(**kwargs)
+    
+    def send(self, request, stream=False, **kwargs):
+        response = super().send(request, stream=stream, **kwargs)
+        truncated = False
+        if stream and self.max_bytes is not None:
+            truncated = self._read_capped(response)
+        # Reading the body here leaves it in memory, where iter_content finds it
+        self.archive.record(request, response, truncated)
+        return response
+    
+    def _read_capped(self, response: requests.Response) -> bool:
+        """
+        Read at most max_bytes of a streamed body into the response, as the
+        scraper would, and return whether the rest was left unread.
+        """
+        body = bytearray()
+        truncated = False
+        try:
+            for chunk in response.iter_content(chunk_size=RECORD_CHUNK_SIZE):
+                body += chunk
+                if len(body) > self.max_bytes:
+                    truncated = True
+                    break
+        finally:
+            response.close()
+        response._content = bytes(body[:self.max_bytes])
+        response._content_consumed = True
+        return truncated
+
+
+class ReplayAdapter(BaseAdapter):
+    """Transport adapter that answers requests from an archive, never the network."""
+    
+    def __init__(self, archive: HttpArchive):
+        super().__init__()
+        self.archive = archive
+    
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        entry = self.archive.lookup(request.method, request.url)
+        if entry is None:
+            raise NotArchivedError(
+                f"No archived response for {request.method} {request.url}", request=request)
+        
+        headers = CaseInsensitiveDict(entry['headers'])
+        status = entry['status']
+        body = entry_body(entry)
+        if status == 200 and self._not_modified(request, headers):
+            status, body = 304, b''
+        
+        response = requests.Response()
+        response.status_code = status
+        response.reason = entry.get('reason')
+        response.headers = headers
+        response.encoding = get_encoding_from_headers(headers)
+        response.url = request.url
+        response.request = request
+        response.raw = io.BytesIO(body)
+        return response
+    
+    @staticmethod
+    def _not_modified(request, headers: CaseInsensitiveDict) -> bool:
+        """Check a conditional request against the validators of the archived response."""
+        etag = request.headers.get('If-None-Match')
+        if etag is not None:
+            return etag == headers.get('ETag')
+        since = request.headers.get('If-Modified-Since')
+        return since is not None and since == headers.get('Last-Modified')
+    
+    def close(self):
+        pass
\ No newline at end of file
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Link graph across all scraped sources.
+The links extracted from every page are resolved against the page URL,
+normalized and deduplicated into an outbound edge set per source, and
+inverted indexes of inbound links, outbound domains and unreachable targets
+are kept up to date as individual sources are re-scraped.
+"""
+
+import json
+import threading
+from collections import Counter
+from typing import Dict, Any, Optional, Set
+from urllib.parse import urlsplit
+
+from page_manifest import atomic_open
+from url_utils import normalize_url
+
+
+def link_targets(record: Dict[str, Any], page_url: str) -> Set[str]:
+    """
+    Return the normalized http(s) URLs a scraped record links to.
+    
+    Relative hrefs are resolved against page_url; links back to the page
+    itself (e.g. #anchors) and non-http(s) links are left out.
+    """
+    page = normalize_url(page_url)
+    targets = set()
+    for link in record.get('links') or ():
+        target = normalize_url(link.get('href', ''), page_url)
+        if target and target != page:
+            targets.add(target)
+    return targets
+
+
+class LinkGraph:
+    """Outbound links per source with inverted indexes for constant-time lookups."""
+    
+    def __init__(self, graph_file: str = '.link_graph.json'):
+        """
+        Args:
+            graph_file: Path of the JSON file the graph is persisted to
+        """
+        self.graph_file = graph_file
+        self._lock = threading.Lock()
+        self._pages: Dict[str, str] = {}
+        self._outbound: Dict[str, Set[str]] = {}
+        self._inbound: Dict[str, Set[str]] = {}
+        self._domains: Dict[str, Counter] = {}
+        self._unreachable: Set[str] = set()
+        self.load()
+    
+    def load(self):
+        """Load the graph from disk and rebuild the indexes, ignoring a missing or corrupt file."""
+        try:
+            with open(self.graph_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            sources = data.get('sources', {})
+            unreachable = data.get('unreachable', [])
+        except (OSError, ValueError):
+            sources, unreachable = {}, []
+        
+        self._pages, self._outbound, self._inbound, self._domains = {}, {}, {}, {}
+        self._unreachable = set(unreachable)
+        for source, entry in sources.items():
+            self._set_links(source, entry['url'], set(entry['links']))
+    
+    def save(self):
+        """Write the graph to disk atomically."""
+        with self._lock:
+            data = {
+                'sources': {source: {'url': self._pages[source], 'links': sorted(links)}
+                            for source, links in self._outbound.items()},
+                'unreachable': sorted(self._unreachable)
+            }
+            try:
+                with atomic_open(self.graph_file) as f:
+                    json.dump(data, f, indent=2, sort_keys=True)
+            except OSError as e:
+                print(f"Error saving link graph: {e}")
+    
+    def update(self, source: str, url: str, record: Optional[Dict[str, Any]]):
+        """
+        Replace the outbound links of source with those of its latest scrape.
+        
+        Only the edges that changed are touched in the indexes. A failed
+        scrape (record None) marks url unreachable and keeps the links the
+        source had when it was last scraped.
+        
+        Args:
+            source: Source name
+            url: URL the source was scraped from
+            record: Scraped record, or None if the scrape failed
+        """
+        page = normalize_url(url)
+        with self._lock:
+            if record is None:
+                if page:
+                    self._unreachable.add(page)
+                return
+            self._unreachable.discard(page)
+            self._set_links(source, url, link_targets(record, url))
+    
+    def remove(self, source: str):
+        """Drop a source and its outbound links from the graph."""
+        with self._lock:
+            self._set_links(source, None, set())
+    
+    def _set_links(self, source: str, url: Optional[str], targets: Set[str]):
+        old = self._outbound.get(source, set())
+        domains = self._domains.setdefault(source, Counter())
+        for target in old - targets:
+            inbound = self._inbound[target]
+            inbound.discard(source)
+            if not inbound:
+                del self._inbound[target]
+            domains[_domain(target)] -= 1
+        for target in targets - old:
+            self._inbound.setdefault(target, set()).add(source)
+            domains[_domain(target)] += 1
+        
+        if url is None:
+            self._pages.pop(source, None)
+            self._outbound.pop(source, None)
+            self._domains.pop(source, None)
+            return
+        self._pages[source] = url
+        self._outbound[source] = targets
+        # Drop domains whose last link went away
+        for domain in [domain for domain, count in domains.items() if count <= 0]:
+            del domains[domain]
+    
+    def linking_to(self, url: str) -> Set[str]:
+        """Return the sources that link to url (resolved and normalized like the graph)."""
+        target = normalize_url(url)
+        with self._lock:
+            return set(self._inbound.get(target, ()))
+    
+    def outbound_domains(self, source: str) -> Dict[str, int]:
+        """Return the domains source links to, with the number of distinct links to each."""
+        with self._lock:
+            return dict(self._domains.get(source, {}))
+    
+    def broken(self) -> Dict[str, Set[str]]:
+        """
+        Return the link targets whose last scrape failed, with the sources linking to them.
+        
+        Only targets that were themselves scraped can be known to be
+        unreachable; links to pages the scraper never fetched are not checked.
+        """
+        with self._lock:
+            return {target: set(self._inbound[target])
+                    for target in self._unreachable if target in self._inbound}
+    
+    def __len__(self) -> int:
+        return len(self._outbound)
+    
+    def summary(self) -> str:
+        """Return a one-line summary of the graph."""
+        with self._lock:
+            edges = sum(len(links) for links in self._outbound.values())
+            targets = len(self._inbound)
+            broken = sum(1 for target in self._unreachable if target in self._inbound)
+        return (f"Link graph: {len(self._outbound)} sources, {edges} links to "
+                f"{targets} distinct URLs, {broken} broken")
+
+
+def _domain(url: str) -> str:
+    return urlsplit(url).netloc
\ No newline at end of file
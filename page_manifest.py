@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Incremental page generation support for the profile scraper.
+Keeps a manifest of the hashes of the data that fed each generated page so
+unchanged pages can be skipped and pages for removed sources deleted.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List
+
+
+# Bump when the layout of the generated pages changes so every page is re-rendered
+PAGE_LAYOUT_VERSION = 1
+
+
+@contextmanager
+def atomic_open(path: str):
+    """
+    Open a temporary file next to path for writing and move it over path on success.
+    
+    Readers (and Jekyll's watcher) never see a half-written page, and a failed
+    render leaves the previous version in place. The temporary name is unique
+    per process and thread, so concurrent writers never share one and no
+    random name has to be generated per file.
+    """
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f'.{name}.{os.getpid()}-{threading.get_ident()}.tmp')
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            yield f
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except OSError:
+            mode = None
+        if mode is not None:
+            # Keep the permissions of the file being replaced
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def hash_inputs(inputs: Any) -> str:
+    """Return a stable hash of the JSON-serializable data that feeds a page."""
+    payload = json.dumps([PAGE_LAYOUT_VERSION, inputs], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class PageManifest:
+    """Manifest of input hashes for generated pages, with a per-run report."""
+    
+    def __init__(self, manifest_file: str = '.jekyll_manifest.json', skip_current: bool = True):
+        """
+        Args:
+            manifest_file: Path of the JSON file holding the page hashes
+            skip_current: Report unchanged pages as current so they are
+                skipped; when False every page is rewritten, but the manifest
+                still tracks them so stale pages can be removed
+        """
+        self.manifest_file = manifest_file
+        self.skip_current = skip_current
+        self.skipped: List[str] = []
+        self.written: List[str] = []
+        self.deleted: List[str] = []
+        self._seen = set()
+        try:
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self._hashes: Dict[str, str] = data.get('pages', {})
+        # Source name to note slug, so later builds keep every note at its URL
+        self.slugs: Dict[str, str] = data.get('slugs', {})
+    
+    def is_current(self, path: str, inputs: Any) -> bool:
+        """
+        Check whether path was generated from the same inputs and still exists.
+        
+        A current page is recorded as skipped.
+        """
+        self._seen.add(path)
+        if not self.skip_current:
+            return False
+        if self._hashes.get(path) == hash_inputs(inputs) and os.path.exists(path):
+            self.skipped.append(path)
+            return True
+        return False
+    
+    def record(self, path: str, inputs: Any):
+        """Record that path was written from inputs."""
+        self._seen.add(path)
+        self._hashes[path] = hash_inputs(inputs)
+        self.written.append(path)
+    
+    def keep(self, path: str):
+        """Keep path as it is without re-rendering it (e.g. its source failed this run)."""
+        self._seen.add(path)
+    
+    def remove_stale(self, directory: str):
+        """
+        Delete pages under directory that were generated before but not this run.
+        
+        Subdirectories left empty by the deletions are removed as well.
+        """
+        prefix = os.path.join(directory, '')
+        emptied = set()
+        for path in sorted(self._hashes):
+            if path.startswith(prefix) and path not in self._seen:
+                if os.path.exists(path):
+                    os.remove(path)
+                del self._hashes[path]
+                self.deleted.append(path)
+                emptied.add(os.path.dirname(path))
+        for subdir in sorted(emptied - {os.path.normpath(directory)}, reverse=True):
+            try:
+                os.rmdir(subdir)
+            except OSError:
+                pass
+    
+    def save(self):
+        """Write the manifest to disk."""
+        with atomic_open(self.manifest_file) as f:
+            f.write(json.dumps({'pages': self._hashes, 'slugs': self.slugs}, indent=2, sort_keys=True))
+    
+    def summary(self) -> str:
+        """Return a one-line written/skipped/deleted summary."""
+        return (f"Incremental build: {len(self.written)} written, {len(self.skipped)} skipped, "
+                f"{len(self.deleted)} deleted")
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Template rendering for the profile scraper's reports and Jekyll pages.
+Page layouts are compiled once at import, and every output is rendered from a
+single pass over the results into in-memory buffers so each file can be
+written with one call.
+"""
+
+import hashlib
+import os
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+
+# Headings listed per source in the Markdown report
+REPORT_HEADING_LIMIT = 20
+
+# Characters of content shown per source in the Markdown report
+REPORT_PREVIEW_LIMIT = 2000
+
+# Content lines rendered on the profile data page and in notes
+PROFILE_LINE_LIMIT = 50
+NOTE_LINE_LIMIT = 100
+
+
+class Template:
+    """A layout with {field} slots, parsed once and rendered by keyword."""
+    
+    def __init__(self, text: str):
+        self.text = text
+        self._render = text.format_map
+    
+    def render(self, **fields) -> str:
+        return self._render(fields)
+
+
+REPORT_HEADER = Template("# William Forney - Profile Data\n\n*Generated on {generated}*\n\n")
+REPORT_SOURCE = Template("## {name}\n\n**URL:** {url}\n\n**Title:** {title}\n\n")
+REPORT_DESCRIPTION = Template("**Description:** {description}\n\n")
+REPORT_PREVIEW = Template("### Content Preview\n\n```\n{preview}\n```\n\n")
+REPORT_FAILED = Template("## {name}\n\n*Failed to scrape content*\n\n")
+
+PROFILE_HEADER = Template(
+    "---\n"
+    "layout: page\n"
+    "title: Profile Data\n"
+    "permalink: /profile-data/\n"
+    "---\n\n"
+    "# Profile Data\n\n"
+    "*Last updated: {updated}*\n\n"
+    "This page contains aggregated profile information from various sources.\n\n"
+)
+PROFILE_SOURCE = Template("## {name}\n\n{description}**Source:** [{url}]({href})\n\n")
+PROFILE_MISSING = Template("## {name}\n\n*Content not available*\n\n")
+
+ABOUT_PAGE = Template(
+    "---\n"
+    "layout: page\n"
+    "title: About\n"
+    "permalink: /about/\n"
+    "---\n\n"
+    "# About Me\n\n"
+    "{description}"
+    "## Profile Information\n\n"
+    "This page aggregates information from my various online profiles:\n\n"
+    "{links}"
+    "\n"
+    "For detailed profile data, visit the [Profile Data](/profile-data/) page.\n\n"
+    "## Contact\n\n"
+    "Feel free to reach out through any of the profiles listed above.\n"
+)
+ABOUT_LINK = Template("- **{name}**: [{url}]({href})\n")
+
+NOTE_PAGE = Template(
+    "---\n"
+    "title: {title}\n"
+    "date: {date}\n"
+    "categories: [profile, scraped-content]\n"
+    "{permalink}"
+    "---\n\n"
+    "# {title}\n\n"
+    "{description}"
+    "**Source:** [{url}]({url})\n\n"
+    "*Scraped on: {scraped_at}*\n\n"
+    "{content}"
+)
+
+
+def note_filename(source_name: str) -> str:
+    """Return the base slug of a source's note, the file name (without extension) notes always had."""
+    return source_name.lower().replace(' ', '-').replace('.', '-').replace('/', '-').replace('?', '-')
+
+
+def _name_hash(source_name: str) -> str:
+    return hashlib.sha1(source_name.encode('utf-8')).hexdigest()
+
+
+def _is_slug_of(slug: str, name: str) -> bool:
+    """Check whether slug is the base slug of name or the base with a prefix of its hash."""
+    base = note_filename(name)
+    return slug == base or (slug.startswith(f'{base}-') and
+                            _name_hash(name).startswith(slug[len(base) + 1:]))
+
+
+def note_slugs(source_names: Iterable[str],
+               assigned: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Assign every source a note slug no other source shares.
+    
+    Sources keep the slugs an earlier build assigned them, so published
+    note URLs never move. Names whose base slugs collide (e.g. 'a.b' and
+    'a b') are told apart by a short hash of the name, which only the
+    newcomer gets: the name assigned the plain slug before keeps it, and
+    without earlier assignments the first name in source order does.
+    
+    Args:
+        source_names: Source names, in source order
+        assigned: Source name to slug assigned by an earlier build
+    """
+    names = list(source_names)
+    slugs = {}
+    taken = set()
+    for name in names:
+        slug = (assigned or {}).get(name)
+        if slug is not None and slug not in taken and _is_slug_of(slug, name):
+            slugs[name] = slug
+            taken.add(slug)
+    
+    # A hashed slug must not take the plain slug another name may still claim
+    bases = {note_filename(name) for name in names}
+    for name in names:
+        if name in slugs:
+            continue
+        base = note_filename(name)
+        if base in taken:
+            digest = _name_hash(name)
+            length = 8
+            while f'{base}-{digest[:length]}' in taken or f'{base}-{digest[:length]}' in bases:
+                length += 4
+            base = f'{base}-{digest[:length]}'
+        slugs[name] = base
+        taken.add(base)
+    return slugs
+
+
+def _paragraphs(lines: List[str]) -> str:
+    """Render the non-blank lines as Markdown paragraphs."""
+    kept = [line for line in lines if line and not line.isspace()]
+    return '\n\n'.join(kept) + '\n\n' if kept else ''
+
+
+class RenderedPages:
+    """Every output rendered from one set of results, as complete file contents."""
+    
+    def __init__(self, report: str, profile_data: str, about: Optional[str],
+                 notes: Dict[str, Tuple[str, str]], slugs: Dict[str, str], note_paths: Dict[str, str]):
+        """
+        Args:
+            report: PROFILE_DATA.md
+            profile_data: profile-data.md
+            about: about.md, or None if no source has data
+            notes: Source name to (note path, note text) for every source with data
+            slugs: Source name to note slug for every source, with or without data
+            note_paths: Source name to note path for every source, with or without data
+        """
+        self.report = report
+        self.profile_data = profile_data
+        self.about = about
+        self.notes = notes
+        self.slugs = slugs
+        self.note_paths = note_paths
+
+
+class PageRenderer:
+    """Renders the Markdown report and Jekyll pages in a single pass over the results."""
+    
+    def __init__(self, notes_dir: str = '_notes', note_subdirs: bool = False):
+        """
+        Args:
+            notes_dir: Directory the note paths are rendered under
+            note_subdirs: Spread the notes over 256 subdirectories of notes_dir
+                by a hash of their slug, keeping their URLs at /notes/SLUG/
+        """
+        self.notes_dir = notes_dir
+        self.note_subdirs = note_subdirs
+    
+    def note_path(self, slug: str) -> str:
+        """Return the path of the note with the given slug."""
+        if self.note_subdirs:
+            return os.path.join(self.notes_dir, _name_hash(slug)[:2], f'{slug}.md')
+        return os.path.join(self.notes_dir, f'{slug}.md')
+    
+    def render(self, results: Dict[str, Any], now: Optional[datetime] = None,
+               assigned_slugs: Optional[Dict[str, str]] = None) -> RenderedPages:
+        """
+        Render every output for results.
+        
+        Args:
+            results: Dictionary containing scraped data
+            now: Time stamped on the pages; the current time by default
+            assigned_slugs: Note slugs assigned to sources by an earlier build
+        """
+        now = now or datetime.now()
+        timestamp = now.strftime('%Y-%m-%d %H:%M:%S')
+        date = now.strftime('%Y-%m-%d')
+        
+        report: List[str] = [REPORT_HEADER.render(generated=timestamp)]
+        profile: List[str] = [PROFILE_HEADER.render(updated=timestamp)]
+        about_links: List[str] = []
+        about_description = None
+        has_data = False
+        notes: Dict[str, Tuple[str, str]] = {}
+        slugs = note_slugs(results, assigned_slugs)
+        note_paths = {name: self.note_path(slug) for name, slug in slugs.items()}
+        
+        for name, data in results.items():
+            has_data = has_data or data is not None
+            if not data:
+                report.append(REPORT_FAILED.render(name=name))
+                profile.append(PROFILE_MISSING.render(name=name))
+                continue
+            
+            url = data.get('url', 'N/A')
+            href = data.get('url', '#')
+            description = data.get('description')
+            paragraph = f"{description}\n\n" if description else ''
+            content = data.get('content')
+            
+            # The content is split once and shared by the profile page and the note
+            profile_content = note_content = ''
+            if content:
+                # Lines past the note limit are never rendered, so they are not split out
+                lines = content.split('\n', NOTE_LINE_LIMIT)[:NOTE_LINE_LIMIT]
+                first = _paragraphs(lines[:PROFILE_LINE_LIMIT])
+                rest = _paragraphs(lines[PROFILE_LINE_LIMIT:NOTE_LINE_LIMIT])
+                profile_content = "### Content\n\n" + first
+                if len(lines) > PROFILE_LINE_LIMIT:
+                    profile_content += "*[Content truncated for brevity]*\n\n"
+                note_content = "## Content\n\n" + first + rest
+            
+            report.append(REPORT_SOURCE.render(name=name, url=url, title=data.get('title', 'N/A')))
+            if description:
+                report.append(REPORT_DESCRIPTION.render(description=description))
+            headings = data.get('headings')
+            if headings:
+                report.append("### Headings\n\n")
+                report.extend([f"- **{heading['level']}:** {heading['text']}\n"
+                               for heading in headings[:REPORT_HEADING_LIMIT]])
+                report.append("\n")
+            if content:
+                preview = content[:REPORT_PREVIEW_LIMIT]
+                if len(content) > REPORT_PREVIEW_LIMIT:
+                    preview += "\n... (content truncated)"
+                report.append(REPORT_PREVIEW.render(preview=preview))
+            
+            profile.append(PROFILE_SOURCE.render(name=name, description=paragraph, url=url, href=href))
+            profile.append(profile_content)
+            
+            about_links.append(ABOUT_LINK.render(name=name, url=url, href=href))
+            if about_description is None and description:
+                about_description = paragraph
+            
+            title = data.get('title', name)
+            # Nested notes would otherwise get /notes/SUBDIR/SLUG/ from the collection permalink
+            permalink = f"permalink: /notes/{slugs[name]}/\n" if self.note_subdirs else ''
+            text = NOTE_PAGE.render(title=title, date=date, permalink=permalink, description=paragraph,
+                                    url=data.get('url'), scraped_at=data.get('scraped_at', 'N/A'),
+                                    content=note_content)
+            notes[name] = (note_paths[name], text)
+        
+        about = None
+        if has_data:
+            about = ABOUT_PAGE.render(description=about_description or '', links=''.join(about_links))
+        return RenderedPages(''.join(report), ''.join(profile), about, notes, slugs, note_paths)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Process pool for the CPU-bound HTML extraction stage of the profile scraper.
+Fetch threads hand raw page markup to worker processes, which parse it and
+return the extracted fields, so extraction is not limited to one core by the GIL.
+"""
+
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional, Tuple, Union
+
+from extractors import get_extractor
+
+
+# Extractor of the current worker process, created by _init_worker
+_worker_extractor = None
+
+
+def _init_worker(extractor: str):
+    global _worker_extractor
+    _worker_extractor = get_extractor(extractor)
+
+
+def _extract(markup: Union[str, bytes], max_headings: Optional[int],
+             max_links: Optional[int]) -> Tuple[Dict[str, Any], float, float]:
+    """Parse and extract one page in a worker, returning the fields and the time of each step."""
+    start = time.perf_counter()
+    tree = _worker_extractor.parse(markup)
+    parsed = time.perf_counter()
+    fields = _worker_extractor.extract_tree(tree, max_headings=max_headings, max_links=max_links)
+    return fields, parsed - start, time.perf_counter() - parsed
+
+
+class ParsePool:
+    """
+    Pool of extraction processes with a bounded queue in front of it.
+    
+    At most max_pending pages are queued or being parsed at once; fetch
+    threads that hand over more block in extract() until a slot frees up,
+    so downloads cannot run ahead of parsing and pile up in memory.
+    """
+    
+    def __init__(self, workers: int, extractor: str = 'bs4', max_pending: Optional[int] = None):
+        """
+        Args:
+            workers: Number of worker processes
+            extractor: Name of the extraction backend the workers use
+            max_pending: Pages queued or in progress before extract() blocks;
+                twice the number of workers by default
+        """
+        self.workers = workers
+        self.max_pending = max_pending or 2 * workers
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                             initargs=(extractor,))
+    
+    def extract(self, markup: Union[str, bytes], max_headings: Optional[int] = None,
+                max_links: Optional[int] = None) -> Tuple[Dict[str, Any], float, float]:
+        """
+        Extract the fields of a page in a worker process, waiting for a free slot first.
+        
+        Returns:
+            The extracted fields and the seconds the worker spent parsing and extracting
+        """
+        with self._slots:
+            return self._executor.submit(_extract, markup, max_headings, max_links).result()
+    
+    def close(self):
+        """Shut down the worker processes."""
+        self._executor.shutdown()
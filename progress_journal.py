@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Write-ahead progress journal for the profile scraper.
+Every source is journaled, with its record, as soon as it finishes, and
+the line is synced to disk before the scraper moves on. A run that dies
+partway through leaves the journal behind, and the next run resumes from
+it instead of scraping every source again.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from scrape_result import json_default
+
+
+class ProgressJournal:
+    """JSON Lines journal of the sources a run has finished, cleared when the run completes."""
+    
+    def __init__(self, journal_file: str = '.scrape_journal.jsonl', max_age: float = 3600):
+        """
+        Args:
+            journal_file: Path of the journal
+            max_age: Seconds a journaled source stays fresh enough to be
+                resumed instead of scraped again; 0 never resumes
+        """
+        self.journal_file = journal_file
+        self.max_age = max_age
+        self.resumed = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self.load()
+    
+    def load(self):
+        """Read the journal left by an interrupted run, skipping a torn or corrupt line."""
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self._entries[entry['source']] = entry
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except OSError:
+            pass
+    
+    def resume(self, source: str, url: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return the journaled record of source if an earlier run finished it recently.
+        
+        Sources that failed, were scraped from another URL or finished more
+        than max_age seconds ago are scraped again.
+        """
+        entry = self._entries.get(source)
+        if entry is None or entry.get('data') is None or entry.get('url') != url:
+            return None
+        now = time.time() if now is None else now
+        if now - entry.get('finished_at', 0) > self.max_age:
+            return None
+        with self._lock:
+            self.resumed += 1
+        return entry['data']
+    
+    def record(self, source: str, url: str, data: Optional[Dict[str, Any]]):
+        """Journal a finished source and sync it to disk before returning."""
+        entry = {'source': source, 'url': url, 'finished_at': time.time(), 'data': data}
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':'), default=json_default) + '\n'
+        with self._lock:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._entries[source] = entry
+    
+    def clear(self):
+        """Remove the journal once the run's outputs are written."""
+        with self._lock:
+            self._entries.clear()
+            try:
+                os.remove(self.journal_file)
+            except FileNotFoundError:
+                pass
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def summary(self) -> str:
+        """Return a one-line summary of the sources resumed from an interrupted run."""
+        return f"Progress journal: {self.resumed} sources resumed from an interrupted run"
\ No newline at end of file
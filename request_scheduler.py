@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Rate-limit-aware request scheduling for the profile scraper.
+A requests.Session that paces requests per host with token buckets, honors
+Retry-After and retries idempotent requests with jittered exponential backoff.
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Callable, Optional
+from urllib.parse import urlparse
+
+import requests
+
+
+# Methods that may be repeated without side effects
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+# Statuses that mean "slow down / try again later"
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header into a delay in seconds.
+    
+    Accepts both delta-seconds and HTTP-date forms; returns None if the
+    header is missing or malformed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """Thread-safe token bucket that hands out reservations instead of blocking."""
+    
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens (the allowed burst)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self) -> float:
+        """Take one token and return how many seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class ScheduledSession(requests.Session):
+    """
+    requests.Session that schedules requests per host.
+    
+    Each host gets its own token bucket and "blocked until" time (set from
+    Retry-After), so a throttled host only delays the threads talking to it;
+    requests to other hosts keep going.
+    """
+    
+    def __init__(self, rate: float = 2.0, burst: int = 4, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_cap: float = 30.0, max_retry_after: float = 300.0,
+                 on_retry: Optional[Callable[[str, str, float], None]] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            rate: Requests per second allowed per host (0 disables pacing)
+            burst: Requests a host may receive back to back
+            max_retries: Retries of an idempotent request after throttling or a connection error
+            backoff_base: First backoff delay in seconds, doubled on each retry
+            backoff_cap: Maximum backoff delay in seconds
+            max_retry_after: Longest Retry-After honored; longer ones give up immediately
+            on_retry: Called with (url, reason, delay) before each retry
+            sleep: Function used to wait, replaceable in tests
+        """
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_retry_after = max_retry_after
+        self.on_retry = on_retry
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._blocked_until: Dict[str, float] = {}
+    
+    def request(self, method, url, *args, **kwargs):
+        host = urlparse(url).netloc.lower()
+        retryable = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            self._wait_for_turn(host)
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                reason = type(e).__name__
+                delay = self._backoff(attempt)
+                blocked = False
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if retry_after is not None and retry_after > self.max_retry_after:
+                    return response
+                if retry_after is not None:
+                    # Every thread waits this out in _wait_for_turn, not just this one
+                    self._block(host, retry_after)
+                if not retryable or attempt >= self.max_retries:
+                    return response
+                response.close()
+                reason = str(response.status_code)
+                delay = retry_after if retry_after is not None else self._backoff(attempt)
+                blocked = retry_after is not None
+            
+            attempt += 1
+            if self.on_retry is not None:
+                self.on_retry(url, reason, delay)
+            if not blocked:
+                self.sleep(delay)
+    
+    def _wait_for_turn(self, host: str):
+        """Sleep until host is no longer blocked and a token is available for it."""
+        with self._lock:
+            blocked = self._blocked_until.get(host, 0) - time.monotonic()
+            bucket = None
+            if self.rate > 0:
+                if host not in self._buckets:
+                    self._buckets[host] = TokenBucket(self.rate, self.burst)
+                bucket = self._buckets[host]
+        if blocked > 0:
+            self.sleep(blocked)
+        if bucket is not None:
+            delay = bucket.reserve()
+            if delay > 0:
+                self.sleep(delay)
+    
+    def _block(self, host: str, seconds: float):
+        """Hold back every request to host for seconds (e.g. from Retry-After)."""
+        with self._lock:
+            until = time.monotonic() + seconds
+            self._blocked_until[host] = max(self._blocked_until.get(host, 0), until)
+    
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for a retry attempt."""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
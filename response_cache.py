@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Persistent HTTP conditional-request cache for the profile scraper.
+Stores ETag/Last-Modified validators and the extracted record for each URL
+so unchanged pages can be revalidated with a 304 instead of re-downloaded.
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+
+class ResponseCache:
+    """On-disk cache of response validators and extracted records, keyed by URL."""
+    
+    def __init__(self, cache_file: str = '.scrape_cache.json', max_entries: int = 1000,
+                 max_bytes: int = 50 * 1024 * 1024, max_age: float = 30 * 24 * 3600):
+        """
+        Args:
+            cache_file: Path of the JSON file backing the cache
+            max_entries: Maximum number of URLs kept in the cache
+            max_bytes: Maximum total size of the cached records in bytes
+            max_age: Seconds after which an entry is no longer revalidated
+        """
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self.load()
+    
+    def load(self):
+        """Load cache entries from disk, ignoring a missing or corrupt file."""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f).get('entries', {})
+        except (OSError, ValueError):
+            self._entries = {}
+        self.evict()
+    
+    def save(self):
+        """Write cache entries to disk, replacing the previous file atomically."""
+        with self._lock:
+            self._evict_locked()
+            data = {'entries': self._entries}
+            tmp_file = f'{self.cache_file}.tmp'
+            try:
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+                os.replace(tmp_file, self.cache_file)
+            except OSError as e:
+                print(f"Error saving response cache: {e}")
+    
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Return If-None-Match/If-Modified-Since headers for a cached URL."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if not entry or self._expired(entry):
+                return {}
+            headers = {}
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+            return headers
+    
+    def hit(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Record a 304 revalidation for url.
+        
+        Returns:
+            Copy of the cached record, or None if the entry is gone
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if not entry:
+                return None
+            self.hits += 1
+            self.bytes_saved += entry.get('content_length', 0)
+            entry['last_used'] = time.time()
+            return copy.deepcopy(entry['record'])
+    
+    def peek(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached record for url without revalidating it, or None."""
+        with self._lock:
+            entry = self._entries.get(url)
+            return copy.deepcopy(entry['record']) if entry else None
+    
+    def store(self, url: str, headers: Dict[str, str], record: Dict[str, Any], content_length: int):
+        """
+        Cache the record extracted from a full (non-304) response.
+        
+        Args:
+            url: The URL that was fetched
+            headers: Response headers carrying the validators
+            record: The extracted record
+            content_length: Size of the downloaded body in bytes
+        """
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        with self._lock:
+            self.misses += 1
+            if not etag and not last_modified:
+                # Nothing to revalidate with, so the entry would never be used.
+                self._entries.pop(url, None)
+                return
+            now = time.time()
+            self._entries[url] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'record': copy.deepcopy(record),
+                'content_length': content_length,
+                'size': len(json.dumps(record, ensure_ascii=False)),
+                'stored_at': now,
+                'last_used': now
+            }
+            self._evict_locked()
+    
+    def evict(self):
+        """Drop expired entries, then least recently used ones over the size limits."""
+        with self._lock:
+            self._evict_locked()
+    
+    def _evict_locked(self):
+        for url in [url for url, entry in self._entries.items() if self._expired(entry)]:
+            del self._entries[url]
+        
+        total = sum(entry.get('size', 0) for entry in self._entries.values())
+        if len(self._entries) <= self.max_entries and total <= self.max_bytes:
+            return
+        for url in sorted(self._entries, key=lambda u: self._entries[u].get('last_used', 0)):
+            if len(self._entries) <= self.max_entries and total <= self.max_bytes:
+                break
+            total -= self._entries.pop(url).get('size', 0)
+    
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry.get('stored_at', 0) > self.max_age
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def summary(self) -> str:
+        """Return a one-line hit/miss/bytes-saved summary."""
+        requests_made = self.hits + self.misses
+        rate = (self.hits / requests_made * 100) if requests_made else 0.0
+        return (f"Response cache: {self.hits} hits, {self.misses} misses "
+                f"({rate:.0f}% hit rate), {self.bytes_saved / 1024:.1f} KB saved")
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Append-only JSON Lines store for scrape results.
+Each scrape appends one compact record, an index maps every source to the
+byte offset of its latest record, and compaction drops superseded records.
+profile_data.json is exported from the store on demand.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
+
+from page_manifest import atomic_open
+from scrape_result import json_default
+
+
+def _content(record: Any) -> Any:
+    """Return a record without its scrape timestamp, which changes on every run."""
+    if isinstance(record, dict):
+        return {key: value for key, value in record.items() if key != 'scraped_at'}
+    return record
+
+
+class ResultStore:
+    """JSON Lines file of {"source", "data"} records with an offset index of the latest per source."""
+    
+    def __init__(self, store_file: str = 'profile_data.jsonl', compact_ratio: float = 0.5):
+        """
+        Args:
+            store_file: Path of the JSON Lines file; the index is kept next to it
+            compact_ratio: Fraction of superseded records at which save() compacts the file
+        """
+        self.store_file = store_file
+        self.index_file = f'{store_file}.idx'
+        self.compact_ratio = compact_ratio
+        self._lock = threading.Lock()
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        self._records = 0
+        self._size = 0
+        self.load()
+    
+    def load(self):
+        """Load the index and catch it up with records appended after it was saved."""
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            offsets = {source: tuple(entry) for source, entry in index['offsets'].items()}
+            records, size = index['records'], index['size']
+        except (OSError, ValueError, KeyError):
+            offsets, records, size = {}, 0, 0
+        
+        try:
+            file_size = os.path.getsize(self.store_file)
+        except OSError:
+            file_size = 0
+        if size > file_size:
+            # The store was replaced or truncated behind the index's back
+            offsets, records, size = {}, 0, 0
+        
+        self._offsets, self._records, self._size = offsets, records, size
+        if size < file_size:
+            self._scan(size)
+    
+    def _scan(self, offset: int):
+        """Index the records from offset to the end of the file, dropping a torn last line."""
+        with open(self.store_file, 'rb+') as f:
+            f.seek(offset)
+            for line in iter(f.readline, b''):
+                if not line.endswith(b'\n'):
+                    f.truncate(offset)
+                    print(f"Dropped incomplete record at byte {offset} of {self.store_file}")
+                    break
+                try:
+                    source = json.loads(line)['source']
+                except (ValueError, KeyError, TypeError):
+                    print(f"Skipping corrupt record at byte {offset} of {self.store_file}")
+                else:
+                    self._offsets[source] = (offset, len(line))
+                    self._records += 1
+                offset += len(line)
+        self._size = offset
+    
+    def append(self, source: str, data: Dict[str, Any]) -> bool:
+        """
+        Append the latest record of source.
+        
+        A record that differs from the stored one only in scraped_at is not
+        appended, so unchanged pages add nothing for compaction to remove.
+        
+        Returns:
+            Whether the record was appended
+        """
+        line = json.dumps({'source': source, 'data': data}, ensure_ascii=False,
+                          separators=(',', ':'), default=json_default).encode('utf-8') + b'\n'
+        with self._lock:
+            entry = self._offsets.get(source)
+            if entry is not None:
+                with open(self.store_file, 'rb') as f:
+                    stored = self._read(f, entry)
+                if _content(stored) == _content(json.loads(line)['data']):
+                    return False
+            with open(self.store_file, 'ab') as f:
+                f.write(line)
+            self._offsets[source] = (self._size, len(line))
+            self._records += 1
+            self._size += len(line)
+        return True
+    
+    def get(self, source: str) -> Optional[Dict[str, Any]]:
+        """Return the latest record of source, or None if it has none."""
+        with self._lock:
+            entry = self._offsets.get(source)
+            if entry is None:
+                return None
+            with open(self.store_file, 'rb') as f:
+                return self._read(f, entry)
+    
+    @staticmethod
+    def _read(f, entry: Tuple[int, int]) -> Optional[Dict[str, Any]]:
+        offset, length = entry
+        f.seek(offset)
+        return json.loads(f.read(length))['data']
+    
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (source, latest record) pairs, reading one record at a time."""
+        with self._lock:
+            offsets = dict(self._offsets)
+        if not offsets:
+            return
+        with open(self.store_file, 'rb') as f:
+            for source, entry in offsets.items():
+                yield source, self._read(f, entry)
+    
+    def __contains__(self, source: str) -> bool:
+        return source in self._offsets
+    
+    def __len__(self) -> int:
+        return len(self._offsets)
+    
+    @property
+    def garbage(self) -> int:
+        """Number of superseded records still in the file."""
+        return self._records - len(self._offsets)
+    
+    def compact(self):
+        """Rewrite the store with only the latest record of each source."""
+        with self._lock:
+            offsets = {}
+            size = 0
+            with open(self.store_file, 'a+b') as src, atomic_open(self.store_file) as dst:
+                for source, (offset, length) in self._offsets.items():
+                    src.seek(offset)
+                    line = src.read(length)
+                    dst.write(line.decode('utf-8'))
+                    offsets[source] = (size, length)
+                    size += length
+            removed = self._records - len(offsets)
+            self._offsets, self._records, self._size = offsets, len(offsets), size
+            self._save_index()
+        print(f"Compacted {self.store_file}: {removed} superseded records removed")
+    
+    def save(self):
+        """Persist the index, compacting first when enough records are superseded."""
+        if self._records and self.garbage / self._records >= self.compact_ratio:
+            self.compact()
+            return
+        with self._lock:
+            self._save_index()
+    
+    def _save_index(self):
+        index = {
+            'size': self._size,
+            'records': self._records,
+            'offsets': {source: list(entry) for source, entry in self._offsets.items()}
+        }
+        try:
+            with atomic_open(self.index_file) as f:
+                json.dump(index, f, separators=(',', ':'))
+        except OSError as e:
+            print(f"Error saving result store index: {e}")
+    
+    def export(self, output_file: str = 'profile_data.json', sources: Optional[Iterable[str]] = None,
+               results: Optional[Dict[str, Any]] = None):
+        """
+        Write the latest records as one JSON object, the format of profile_data.json.
+        
+        Records are read and written one at a time, so the store is never
+        loaded into memory as a whole.
+        
+        Args:
+            output_file: Output filename
+            sources: Sources to export and their order; the sources of results,
+                or else every stored source, by default. Sources without a
+                record are exported as null.
+            results: Records of the current run by source: a source that
+                failed (None) is exported as null rather than from the store,
+                and one the store holds no record of is exported from here
+        """
+        with self._lock:
+            offsets = dict(self._offsets)
+        if sources is None:
+            sources = offsets if results is None else results
+        names = list(sources)
+        with open(self.store_file, 'a+b') as src, atomic_open(output_file) as dst:
+            dst.write('{')
+            for i, name in enumerate(names):
+                if results is not None and (name not in offsets or results.get(name) is None):
+                    data = results.get(name)
+                else:
+                    data = self._read(src, offsets[name]) if name in offsets else None
+                value = json.dumps(data, indent=2, ensure_ascii=False,
+                                   default=json_default).replace('\n', '\n  ')
+                dst.write(f'{"," if i else ""}\n  {json.dumps(name, ensure_ascii=False)}: {value}')
+            dst.write('\n}' if names else '}')
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Watch mode for the profile scraper.
+Keeps one ProfileScraper (and its connection pool, cache and host history)
+alive and re-scrapes each source on its own schedule, regenerating the
+output files only when a source's content actually changed.
+"""
+
+import random
+import signal
+import threading
+import time
+from typing import Dict, Any, Callable, List, Optional
+
+from page_manifest import hash_inputs
+
+
+class ScrapeDaemon:
+    """Re-scrapes sources on jittered per-source intervals until stopped."""
+    
+    def __init__(self, scraper, sources: Dict[str, str],
+                 scrape_fn: Optional[Callable[[str, str], Optional[Dict[str, Any]]]] = None,
+                 interval: float = 3600, intervals: Optional[Dict[str, float]] = None,
+                 jitter: float = 0.1, after_cycle: Optional[Callable[[], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            scraper: ProfileScraper used for every fetch and for writing outputs
+            sources: Mapping of source name to URL
+            scrape_fn: Callable taking (name, url) and returning the scraped record
+            interval: Default seconds between scrapes of a source
+            intervals: Per-source overrides of interval
+            jitter: Fraction by which each interval is randomly lengthened or
+                shortened, so sources sharing an interval drift apart
+            after_cycle: Called after every cycle, e.g. to persist caches
+            clock: Monotonic time source, replaceable in tests
+        """
+        self.scraper = scraper
+        self.sources = sources
+        self.scrape_fn = scrape_fn
+        self.interval = interval
+        self.intervals = intervals or {}
+        self.jitter = jitter
+        self.after_cycle = after_cycle
+        self.clock = clock
+        self.results: Dict[str, Optional[Dict[str, Any]]] = {name: None for name in sources}
+        self.cycles = 0
+        self._hashes: Dict[str, str] = {}
+        self._due = {name: clock() for name in sources}
+        self._stop = threading.Event()
+    
+    def stop(self, *_):
+        """Ask the daemon to exit once the current cycle is finished (usable as a signal handler)."""
+        if not self._stop.is_set():
+            print("\nStopping after the current cycle...")
+        self._stop.set()
+    
+    def run(self, max_cycles: Optional[int] = None):
+        """
+        Scrape due sources until stopped by SIGINT/SIGTERM or after max_cycles cycles.
+        
+        Signal handlers are only installed when called from the main thread.
+        """
+        previous = {}
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                previous[signum] = signal.signal(signum, self.stop)
+        try:
+            while not self._stop.is_set():
+                delay = self.poll()
+                if max_cycles is not None and self.cycles >= max_cycles:
+                    break
+                if delay > 0:
+                    print(f"Next scrape in {delay:.0f}s")
+                    self._stop.wait(delay)
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+        print("Watch mode stopped")
+    
+    def poll(self) -> float:
+        """
+        Scrape the sources that are due and regenerate outputs if any changed.
+        
+        Returns:
+            Seconds until the next source is due
+        """
+        now = self.clock()
+        due = {name: url for name, url in self.sources.items() if self._due[name] <= now}
+        if due:
+            self.cycles += 1
+            changed = self._refresh(due)
+            if changed:
+                print(f"Changed: {', '.join(changed)}")
+                self._write_outputs()
+            else:
+                print("No changes")
+            if self.after_cycle is not None:
+                self.after_cycle()
+        return max(0.0, min(self._due.values()) - self.clock())
+    
+    def _refresh(self, due: Dict[str, str]) -> List[str]:
+        """Scrape due sources, schedule their next run and return the names whose content changed."""
+        fetched = self.scraper.scrape_all(due, self.scrape_fn)
+        changed = []
+        for name, data in fetched.items():
+            self._due[name] = self.clock() + self._next_interval(name)
+            if data is None:
+                # Keep serving the last known content of a source that failed
+                continue
+            digest = hash_inputs({key: value for key, value in data.items() if key != 'scraped_at'})
+            if self._hashes.get(name) != digest:
+                self._hashes[name] = digest
+                changed.append(name)
+            self.results[name] = data
+        return changed
+    
+    def _next_interval(self, name: str) -> float:
+        interval = self.intervals.get(name, self.interval)
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+    
+    def _write_outputs(self):
+        """Rewrite the data files and the Jekyll pages whose inputs changed."""
+        self.scraper.save_results(self.results)
+        rendered = self.scraper.render_pages(self.results)
+        self.scraper.create_markdown_report(self.results, rendered=rendered)
+        self.scraper.create_jekyll_pages(self.results, incremental=True, rendered=rendered)
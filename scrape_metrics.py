@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Per-phase timing and metrics for scrape runs.
+Records counters and latency histograms per source and phase, and exports
+them as JSON and in the Prometheus text exposition format.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Phases timed by ProfileScraper
+PHASES = ('connect', 'download', 'parse', 'extract', 'serialize', 'markdown', 'jekyll')
+
+PhaseHook = Callable[[str, str, float, Optional[BaseException]], None]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram."""
+    
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+    
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'buckets': {str(bound): count for bound, count in zip(self.buckets, self.counts)}
+        }
+
+
+class ScrapeMetrics:
+    """
+    Instrumentation surface for ProfileScraper.
+    
+    Phases are timed with the phase() context manager; hooks registered with
+    add_hook are called before and after every phase, e.g. to log slow
+    fetches or forward timings to another system.
+    """
+    
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Args:
+            buckets: Histogram bucket upper bounds in seconds
+        """
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._counters: Dict[Tuple[str, str], float] = {}
+        self._before_hooks: List[Callable[[str, str], None]] = []
+        self._after_hooks: List[PhaseHook] = []
+    
+    def add_hook(self, after: Optional[PhaseHook] = None,
+                 before: Optional[Callable[[str, str], None]] = None):
+        """
+        Register hooks around each phase.
+        
+        Args:
+            after: Called with (phase, source, seconds, error) when a phase ends
+            before: Called with (phase, source) when a phase starts
+        """
+        if before is not None:
+            self._before_hooks.append(before)
+        if after is not None:
+            self._after_hooks.append(after)
+    
+    @contextmanager
+    def phase(self, phase: str, source: str):
+        """Time the enclosed block as one occurrence of phase for source."""
+        for hook in self._before_hooks:
+            hook(phase, source)
+        error = None
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.observe(phase, source, time.perf_counter() - start, error)
+    
+    def observe(self, phase: str, source: str, seconds: float, error: Optional[BaseException] = None):
+        """Record a phase duration measured elsewhere (e.g. from a response)."""
+        with self._lock:
+            key = (source, phase)
+            if key not in self._histograms:
+                self._histograms[key] = Histogram(self.buckets)
+            self._histograms[key].observe(seconds)
+            if error is not None:
+                error_key = (source, f'{phase}_errors')
+                self._counters[error_key] = self._counters.get(error_key, 0) + 1
+        for hook in self._after_hooks:
+            hook(phase, source, seconds, error)
+    
+    def increment(self, name: str, source: str, value: float = 1):
+        """Add value to the counter name for source."""
+        with self._lock:
+            self._counters[(source, name)] = self._counters.get((source, name), 0) + value
+    
+    def counter(self, name: str, source: str) -> float:
+        """Return the current value of a counter."""
+        with self._lock:
+            return self._counters.get((source, name), 0)
+    
+    def histogram(self, phase: str, source: str) -> Optional[Histogram]:
+        """Return the histogram of a phase for a source, if it was observed."""
+        with self._lock:
+            return self._histograms.get((source, phase))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return all metrics grouped by source."""
+        sources: Dict[str, Any] = {}
+        with self._lock:
+            for (source, phase), histogram in sorted(self._histograms.items()):
+                sources.setdefault(source, {'phases': {}, 'counters': {}})['phases'][phase] = histogram.to_dict()
+            for (source, name), value in sorted(self._counters.items()):
+                sources.setdefault(source, {'phases': {}, 'counters': {}})['counters'][name] = value
+        return {'sources': sources}
+    
+    def export_json(self, output_file: str):
+        """Write all metrics as JSON."""
+        try:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+            print(f"Metrics saved to {output_file}")
+        except Exception as e:
+            print(f"Error saving metrics: {e}")
+    
+    def prometheus_text(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = [
+            '# HELP scrape_phase_seconds Time spent in each scrape phase.',
+            '# TYPE scrape_phase_seconds histogram'
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        
+        for (source, phase), histogram in histograms:
+            labels = f'source="{_escape(source)}",phase="{_escape(phase)}"'
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                lines.append(f'scrape_phase_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'scrape_phase_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f'scrape_phase_seconds_sum{{{labels}}} {_format_value(histogram.sum)}')
+            lines.append(f'scrape_phase_seconds_count{{{labels}}} {histogram.count}')
+        
+        names = sorted({name for (_, name), _ in counters})
+        for name in names:
+            metric = f'scrape_{name}_total'
+            lines.append(f'# TYPE {metric} counter')
+            for (source, counter_name), value in counters:
+                if counter_name == name:
+                    lines.append(f'{metric}{{source="{_escape(source)}"}} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+    
+    def export_prometheus(self, output_file: str):
+        """Write all metrics in the Prometheus text format (e.g. for the node exporter textfile collector)."""
+        try:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus_text())
+            print(f"Prometheus metrics saved to {output_file}")
+        except Exception as e:
+            print(f"Error saving Prometheus metrics: {e}")
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    """Return value at full precision; byte counters outgrow the six digits of :g."""
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
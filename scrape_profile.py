@@ -2,133 +2,581 @@
 """
 Web scraper for William Forney's profile content.
 Scrapes content from williamforney.com and LinkedIn profile.
+
+The network stack (requests) and the HTML parsers are imported on first use,
+so rendering pages from existing data does not load them.
 """
 
+import argparse
+import codecs
+import copy
 import json
 import os
+import re
 import sys
-from datetime import datetime
-from typing import Dict, Any, Optional
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import Dict, Any, Callable, Deque, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from extractors import EXTRACTORS, get_extractor
+from fingerprints import DEFAULT_MAX_DISTANCE, FINGERPRINT_BITS, is_minor_change, near_duplicate_groups
+from host_health import HostHealth, is_failure_status
+from link_graph import LinkGraph
+from page_manifest import PageManifest, atomic_open
+from page_renderer import PageRenderer, RenderedPages
+from response_cache import ResponseCache
+from result_store import ResultStore
+from scrape_daemon import ScrapeDaemon
+from scrape_metrics import ScrapeMetrics
+from scrape_result import ScrapeResult, json_default
+from search_index import SearchIndex
+from snapshots import SnapshotRun, SnapshotStore
+from source_registry import (DEFAULT_REGISTRY, Source, load_sources, merge_partials,
+                             parse_shard, select_shard, shard_file)
+
+# Packages only needed to fetch and parse pages
+SCRAPING_PACKAGES = ('requests', 'bs4', 'lxml')
+
 
-try:
-    import requests
-    from bs4 import BeautifulSoup
-except ImportError:
-    print("Error: Required packages not installed.")
-    print("Please run: pip install -r requirements.txt")
-    sys.exit(1)
+def __getattr__(name: str):
+    # Keeps scrape_profile.requests working (e.g. as a patch target) without
+    # importing requests when the module is loaded.
+    if name == 'requests':
+        import requests
+        return requests
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def require_scraping_packages():
+    """Exit with installation instructions if a package needed for scraping is missing."""
+    import importlib
+    
+    try:
+        for package in SCRAPING_PACKAGES:
+            importlib.import_module(package)
+    except ImportError:
+        print("Error: Required packages not installed.")
+        print("Please run: pip install -r requirements.txt")
+        sys.exit(1)
+
+
+# Size of the chunks read from a streamed response
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Threads notes are written by; file creation and renames release the GIL, but
+# on a single core the threads only contend with each other
+NOTE_WRITE_WORKERS = min(8, os.cpu_count() or 1)
+
+# Generated pages listed one by one in the output; larger runs print a count
+PAGE_LOG_LIMIT = 20
+
+_CHARSET_RE = re.compile(r'charset=["\']?([\w.:-]+)', re.IGNORECASE)
+
+
+def _declared_encoding(response, body: bytes) -> str:
+    """
+    Return the charset declared for a response.
+    
+    Uses the Content-Type header, then a <meta charset> in the first 1 KB of
+    the body, and falls back to UTF-8 rather than sniffing the whole document.
+    """
+    for source in (response.headers.get('Content-Type', ''),
+                   body[:1024].decode('ascii', errors='ignore')):
+        match = _CHARSET_RE.search(source)
+        if match:
+            try:
+                return codecs.lookup(match.group(1)).name
+            except LookupError:
+                pass
+    return 'utf-8'
+
+
+class HostLimiter:
+    """
+    Caps the number of in-flight requests per host.
+    
+    Work over a host's cap waits in a queue of that host instead of in a pool
+    thread, so a slow host never holds workers that other hosts could use.
+    """
+    
+    def __init__(self, per_host: int):
+        self.per_host = max(1, per_host)
+        self._lock = threading.Lock()
+        self._running: Dict[str, int] = {}
+        self._waiting: Dict[str, Deque[Tuple[Future, Callable, tuple]]] = {}
+    
+    def submit(self, executor, url: str, fn: Callable, *args) -> Future:
+        """
+        Run fn(*args) on executor as soon as the host of url has a free slot.
+        
+        Returns:
+            Future of the result of fn
+        """
+        host = urlparse(url).netloc.lower()
+        future = Future()
+        with self._lock:
+            start = self._running.get(host, 0) < self.per_host
+            if start:
+                self._running[host] = self._running.get(host, 0) + 1
+            else:
+                self._waiting.setdefault(host, deque()).append((future, fn, args))
+        if start:
+            self._start(executor, host, future, fn, args)
+        return future
+    
+    def _start(self, executor, host: str, future: Future, fn: Callable, args: tuple):
+        def run():
+            try:
+                result = fn(*args)
+            except BaseException as e:
+                self._release(executor, host)
+                future.set_exception(e)
+            else:
+                self._release(executor, host)
+                future.set_result(result)
+        
+        future.set_running_or_notify_cancel()
+        executor.submit(run)
+    
+    def _release(self, executor, host: str):
+        """Hand the slot of a finished task to the next task waiting for host."""
+        with self._lock:
+            waiting = self._waiting.get(host)
+            if not waiting:
+                self._running[host] -= 1
+                return
+            queued = waiting.popleft()
+        self._start(executor, host, *queued)
 
 
 class ProfileScraper:
     """Scraper for William Forney's profile content."""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+    def __init__(self, max_workers: int = 1, per_host_limit: int = 2,
+                 cache: Optional[ResponseCache] = None, max_bytes: Optional[int] = None,
+                 max_headings: Optional[int] = None, max_links: Optional[int] = None,
+                 extractor: str = 'bs4', metrics: Optional[ScrapeMetrics] = None,
+                 rate_limit: float = 2.0, burst: int = 4, max_retries: int = 3,
+                 health: Optional[HostHealth] = None, store: Optional[ResultStore] = None,
+                 snapshot: Optional[SnapshotRun] = None, parse_workers: int = 0,
+                 link_graph: Optional[LinkGraph] = None, archive=None, journal=None,
+                 note_subdirs: bool = False, change_threshold: int = 0, profiler=None):
+        """
+        Args:
+            max_workers: Global cap on concurrent fetches in scrape_all
+            per_host_limit: Cap on concurrent fetches against a single host
+            cache: Optional conditional-request cache used by scrape_website
+            max_bytes: Stream pages and stop downloading after this many bytes
+            max_headings: Stop collecting headings after this many
+            max_links: Stop collecting links after this many
+            extractor: Name of the HTML extraction backend (see EXTRACTORS)
+            metrics: Per-phase timing and counters; a new ScrapeMetrics by default
+            rate_limit: Requests per second allowed per host (0 disables pacing)
+            burst: Requests a host may receive back to back
+            max_retries: Retries of a throttled or failed GET
+            health: Optional per-host history used for adaptive timeouts,
+                hedged requests and skipping hosts whose circuit is open
+            store: Optional append-only store every successful scrape_all
+                result is written to as it completes; save_results then
+                exports the latest record of each source from it
+            snapshot: Optional snapshot run the raw HTML and record of every
+                scraped page are added to
+            parse_workers: Worker processes pages are parsed in; 0 parses
+                them in the fetching thread
+            link_graph: Optional link graph updated with the links of every
+                scrape_all result as it completes
+            archive: Optional http_archive.HttpArchive the session records
+                every response to, or replays every response from
+            journal: Optional progress_journal.ProgressJournal every
+                scrape_all result is journaled to as it completes, and
+                recently finished sources are resumed from
+            note_subdirs: Spread the Jekyll notes over subdirectories of _notes
+            change_threshold: Simhash bits a re-scraped page's content may
+                differ by and still keep its stored record, so minor edits
+                (e.g. a footer date) cause no downstream writes; 0 keeps
+                every change. Needs a store to compare against.
+            profiler: Optional stage_profiler.StageProfiler every
+                scrape_website call, save_results, render_pages,
+                create_markdown_report and Jekyll writer is profiled by
+        """
+        self.metrics = metrics if metrics is not None else ScrapeMetrics()
+        self.extractor = get_extractor(extractor)
+        self.extractor_name = extractor
+        self.parse_workers = parse_workers
+        self._parse_pool = None
+        self.cache = cache
+        self.health = health
+        self.store = store
+        self.snapshot = snapshot
+        self.link_graph = link_graph
+        self.archive = archive
+        self.journal = journal
+        self.change_threshold = change_threshold
+        self.profiler = profiler
+        self.max_bytes = max_bytes
+        self.max_headings = max_headings
+        self.max_links = max_links
+        self.max_workers = max(1, max_workers)
+        # Held from the start of a fetch until its page is parsed or handed to the parse pool
+        self._fetch_slots = threading.BoundedSemaphore(self.max_workers)
+        self.per_host_limit = max(1, min(per_host_limit, self.max_workers))
+        self.host_limiter = HostLimiter(self.per_host_limit)
+        self.renderer = PageRenderer(note_subdirs=note_subdirs)
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.max_retries = max_retries
+        self._session = None
+        self._session_lock = threading.Lock()
+    
+    @property
+    def session(self):
+        """HTTP session, created (and requests imported) on first use."""
+        with self._session_lock:
+            if self._session is None:
+                self._session = self._create_session()
+            return self._session
+    
+    @property
+    def parse_pool(self):
+        """Pool of extraction processes, started on first use."""
+        with self._session_lock:
+            if self._parse_pool is None:
+                from parse_pool import ParsePool
+                self._parse_pool = ParsePool(self.parse_workers, self.extractor_name)
+            return self._parse_pool
+    
+    def close(self):
+        """Stop the parse worker processes and close the HTTP session, if they were started."""
+        if self._parse_pool is not None:
+            self._parse_pool.close()
+            self._parse_pool = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+    
+    def _stage(self, name: str, label: Optional[str] = None):
+        """Profile the enclosed block as one call of stage name, if a profiler is set."""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.stage(name, label)
+    
+    def _create_session(self):
+        from requests.adapters import HTTPAdapter
+        from request_scheduler import ScheduledSession
+        
+        # Requests are paced per host and throttled GETs are retried with backoff
+        session = ScheduledSession(rate=self.rate_limit, burst=self.burst, max_retries=self.max_retries,
+                                   on_retry=self._on_retry)
+        session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
         
-    def scrape_website(self, url: str) -> Optional[Dict[str, Any]]:
+        # Size the connection pools so that every worker allowed onto a host
+        # gets its own keep-alive connection instead of a throwaway one.
+        if self.archive is not None:
+            # Record or replay every response, including robots.txt and redirects
+            adapter = self.archive.adapter(pool_connections=max(10, self.max_workers),
+                                           pool_maxsize=self.per_host_limit, max_bytes=self.max_bytes)
+        else:
+            adapter = HTTPAdapter(pool_connections=max(10, self.max_workers),
+                                  pool_maxsize=self.per_host_limit)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+    
+    def scrape_website(self, url: str, extractor: Optional[str] = None,
+                       source: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Scrape content from a given URL.
         
         Args:
             url: The URL to scrape
+            extractor: Name of the extraction backend for this page; the
+                scraper's own backend by default
+            source: Name of the source the page is scraped for, which its
+                snapshot is filed under; the URL by default
             
         Returns:
             Dictionary containing scraped content or None if failed
         """
+        with self._stage('scrape_website', url):
+            return self._scrape_website(url, extractor, source or url)
+    
+    def _scrape_website(self, url: str, extractor: Optional[str], source: str) -> Optional[Dict[str, Any]]:
+        import requests
+        
+        fetch_slot = self._fetch_slots
+        fetch_slot.acquire()
         try:
             print(f"Scraping {url}...")
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'lxml')
+            host = urlparse(url).netloc.lower()
+            if self.health is not None and not self.health.allow(host):
+                self.metrics.increment('circuit_open', url)
+                print(f"Circuit open for {host}, not fetching {url}")
+                return self._cached_fallback(url)
             
-            # Remove script and style elements
-            for script in soup(['script', 'style']):
-                script.decompose()
-                
-            # Extract basic information
-            title = soup.find('title')
-            title_text = title.get_text().strip() if title else 'No title'
+            headers = self.cache.conditional_headers(url) if self.cache is not None else {}
+            start = time.perf_counter()
+            response = self._get(url, headers)
             
-            # Extract meta description
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            description = meta_desc.get('content', '').strip() if meta_desc else ''
+            if response.status_code == 304 and self.cache is not None:
+                cached = self.cache.hit(url)
+                if cached:
+                    self._record_fetch(url, response, time.perf_counter() - start)
+                    self.metrics.increment('cache_hits', url)
+                    print(f"Not modified, using cached content for {url}")
+                    cached['scraped_at'] = datetime.now().isoformat()
+                    if self.snapshot is not None:
+                        self.snapshot.add(source, url, None, cached)
+                    return ScrapeResult.from_dict(cached)
+                start = time.perf_counter()
+                response = self._get(url, {})
             
-            # Extract main content
-            # Try to find main content areas
-            main_content = None
-            for tag in ['main', 'article', 'div[role="main"]', '.content', '#content']:
-                main_content = soup.select_one(tag)
-                if main_content:
-                    break
+            response.raise_for_status()
             
-            if not main_content:
-                main_content = soup.find('body')
+            if self.max_bytes is None:
+                body = response.content
+                markup = body
+            else:
+                # Streaming mode: never hold more than max_bytes of the page, and
+                # decode with the declared charset instead of sniffing the document.
+                body = self._read_capped(response)
+                markup = body.decode(_declared_encoding(response, body), errors='replace')
+            self._record_fetch(url, response, time.perf_counter() - start)
+            self.metrics.increment('bytes_downloaded', url, len(body))
             
-            content_text = main_content.get_text(separator='\n', strip=True) if main_content else ''
+            own_backend = extractor is None or extractor == self.extractor_name
+            if self.parse_workers > 0 and own_backend:
+                # CPU-bound stage: hand the markup to a worker process, blocking while the
+                # pool is full. Another thread takes the fetch slot meanwhile.
+                fetch_slot.release()
+                fetch_slot = None
+                fields, parse_seconds, extract_seconds = self.parse_pool.extract(
+                    markup, self.max_headings, self.max_links)
+                self.metrics.observe('parse', url, parse_seconds)
+                self.metrics.observe('extract', url, extract_seconds)
+            else:
+                backend = self.extractor if own_backend else get_extractor(extractor)
+                with self.metrics.phase('parse', url):
+                    tree = backend.parse(markup)
+                with self.metrics.phase('extract', url):
+                    fields = backend.extract_tree(tree, max_headings=self.max_headings,
+                                                  max_links=self.max_links)
             
-            # Extract all headings
-            headings = []
-            for heading in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-                headings.append({
-                    'level': heading.name,
-                    'text': heading.get_text().strip()
-                })
+            # Content is limited to CONTENT_LIMIT characters by the extractor
+            data = ScrapeResult.from_fields(url, fields, datetime.now().isoformat())
             
-            # Extract all links
-            links = []
-            for link in soup.find_all('a', href=True):
-                links.append({
-                    'text': link.get_text().strip(),
-                    'href': link['href']
-                })
+            if self.cache is not None:
+                self.cache.store(url, response.headers, data.to_dict(), len(body))
+            if self.snapshot is not None:
+                self.snapshot.add(source, url, body, data)
             
-            return {
-                'url': url,
-                'title': title_text,
-                'description': description,
-                'headings': headings,
-                'links': links,
-                'content': content_text[:5000],  # Limit content length
-                'scraped_at': datetime.now().isoformat()
-            }
+            self.metrics.increment('pages', url)
+            return data
             
         except requests.exceptions.RequestException as e:
+            self.metrics.increment('errors', url)
             print(f"Error scraping {url}: {e}")
             return None
         except Exception as e:
+            self.metrics.increment('errors', url)
             print(f"Unexpected error scraping {url}: {e}")
             return None
+        finally:
+            if fetch_slot is not None:
+                fetch_slot.release()
     
-    def scrape_linkedin(self, profile_url: str) -> Optional[Dict[str, Any]]:
+    def _on_retry(self, url: str, reason: str, delay: float):
+        """Count and report a retry scheduled by the session."""
+        self.metrics.increment('retries', url)
+        print(f"  Retrying {url} in {delay:.1f}s ({reason})")
+    
+    def _record_fetch(self, url: str, response, seconds: float):
+        """
+        Split the time spent fetching url into the 'connect' phase (DNS, connect
+        and waiting for the response headers) and the 'download' phase (reading
+        the body).
         """
-        Scrape LinkedIn profile.
+        elapsed = getattr(response, 'elapsed', None)
+        connect = min(elapsed.total_seconds(), seconds) if isinstance(elapsed, timedelta) else seconds
+        self.metrics.observe('connect', url, connect)
+        self.metrics.observe('download', url, seconds - connect)
+    
+    def _cached_fallback(self, url: str) -> Optional[ScrapeResult]:
+        """Return the last cached record of url without contacting its host, if there is one."""
+        cached = self.cache.peek(url) if self.cache is not None else None
+        if not cached:
+            return None
+        print(f"Using cached content for {url} (scraped {cached.get('scraped_at')})")
+        record = ScrapeResult.from_dict(cached)
+        record.stale = True
+        return record
+    
+    def _get(self, url: str, headers: Dict[str, str]):
+        """Issue the GET for scrape_website, streaming the body when it is capped."""
+        import requests
         
-        Note: LinkedIn has strict scraping policies and may block automated access.
-        This method attempts basic scraping but may not work without authentication.
+        kwargs = {'headers': headers}
+        if self.max_bytes is not None:
+            kwargs['stream'] = True
+        if self.health is None:
+            return self.session.get(url, timeout=30, **kwargs)
         
-        Args:
-            profile_url: LinkedIn profile URL
-            
-        Returns:
-            Dictionary containing scraped content or None if failed
+        host = urlparse(url).netloc.lower()
+        start = time.perf_counter()
+        try:
+            response = self._hedged_get(url, self.health.timeout(host), self.health.hedge_delay(host), kwargs)
+        except requests.exceptions.RequestException:
+            self._record_failure(host, url)
+            raise
+        
+        if is_failure_status(response.status_code):
+            self._record_failure(host, url)
+        else:
+            elapsed = getattr(response, 'elapsed', None)
+            seconds = elapsed.total_seconds() if isinstance(elapsed, timedelta) else time.perf_counter() - start
+            self.health.record_success(host, seconds)
+        return response
+    
+    def _hedged_get(self, url: str, timeout: float, hedge_delay: Optional[float], kwargs: Dict[str, Any]):
+        """
+        GET url, sending a duplicate request if no response arrived after
+        hedge_delay seconds, and return whichever response arrives first.
         """
-        print(f"Note: LinkedIn may block automated scraping. Attempting to fetch {profile_url}...")
-        return self.scrape_website(profile_url)
+        if hedge_delay is None:
+            return self.session.get(url, timeout=timeout, **kwargs)
+        
+        pool = ThreadPoolExecutor(max_workers=2)
+        try:
+            first = pool.submit(self.session.get, url, timeout=timeout, **kwargs)
+            done, _ = wait([first], timeout=hedge_delay)
+            if done:
+                return first.result()
+            
+            self.metrics.increment('hedges', url)
+            pending = {first, pool.submit(self.session.get, url, timeout=timeout, **kwargs)}
+            winner = None
+            while pending and winner is None:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is not None:
+                        continue
+                    if winner is None:
+                        winner = future
+                    else:
+                        future.result().close()
+            
+            # The slower request is left to finish in the background and its response discarded
+            for future in pending:
+                future.add_done_callback(_close_response)
+            return winner.result() if winner is not None else first.result()
+        finally:
+            pool.shutdown(wait=False)
+    
+    def _record_failure(self, host: str, url: str):
+        """Record a failed fetch against host and report when its circuit opens."""
+        if self.health.record_failure(host):
+            self.metrics.increment('circuits_opened', url)
+            print(f"  {host} keeps failing; skipping it for {self.health.cooldown / 3600:g}h")
+    
+    def _read_capped(self, response) -> bytes:
+        """Read at most max_bytes of a streamed response body and release the connection."""
+        body = bytearray()
+        try:
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                body += chunk[:self.max_bytes - len(body)]
+                if len(body) >= self.max_bytes:
+                    print(f"  Truncated {response.url} at {self.max_bytes} bytes")
+                    break
+        finally:
+            response.close()
+        return bytes(body)
     
-    def scrape_linkedin_manual(self, manual_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def fallback_record(self, url: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
-        Use manually provided LinkedIn data instead of scraping.
+        Use manually provided data for a source that could not be scraped.
+        
+        Args:
+            url: URL of the source
+            data: Record fields, which are updated in place with the URL and time
         """
-        if manual_data:
-            manual_data['url'] = 'https://linkedin.com/in/wforney'
-            manual_data['scraped_at'] = datetime.now().isoformat()
-            return manual_data
+        if data:
+            data['url'] = url
+            data['scraped_at'] = datetime.now().isoformat()
+            return data
         return None
     
+    def scrape_all(self, urls: Dict[str, str],
+                   scrape_fn: Optional[Callable[[str, str], Optional[Dict[str, Any]]]] = None
+                   ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Scrape every source, concurrently when max_workers > 1.
+        
+        Args:
+            urls: Mapping of source name to URL
+            scrape_fn: Callable taking (name, url) and returning the scraped
+                record; defaults to scrape_website on the URL
+            
+        Returns:
+            Dictionary of source name to scraped data, in the order of urls
+        """
+        if scrape_fn is None:
+            scrape_fn = lambda name, url: self.scrape_website(url, source=name)
+        
+        def task(name: str, url: str):
+            resumed = self.journal.resume(name, url) if self.journal is not None else None
+            if resumed is not None:
+                # Finished before an interruption; the store already has the record
+                print(f"Resumed {name} from the progress journal")
+                data = ScrapeResult.from_dict(resumed)
+            else:
+                data = scrape_fn(name, url)
+                if getattr(data, 'stale', False):
+                    # Served from the cache because the host is failing: nothing new to
+                    # store or journal, and the page is still unreachable
+                    if self.link_graph is not None:
+                        self.link_graph.update(name, url, None)
+                    return data
+                previous = self._previous_if_minor(name, url, data)
+                if previous is not None:
+                    # Keep the stored record so every writer downstream sees no change
+                    data = previous
+                elif self.store is not None and data is not None:
+                    self.store.append(name, data)
+            if self.link_graph is not None:
+                self.link_graph.update(name, url, data)
+            if self.journal is not None and resumed is None:
+                self.journal.record(name, url, data)
+            return data
+        
+        # A thread waiting for the parse pool has given up its fetch slot, so the
+        # pool gets a thread for every page the parse pool holds on top of the fetchers
+        threads = self.max_workers + (self.parse_pool.max_pending if self.parse_workers > 0 else 0)
+        if threads == 1:
+            return {name: task(name, url) for name, url in urls.items()}
+        
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            futures = {name: self.host_limiter.submit(pool, urls[name], task, name, urls[name])
+                       for name in _interleave_by_host(urls)}
+            return {name: futures[name].result() for name in urls}
+    
+    def _previous_if_minor(self, name: str, url: str,
+                           data: Optional[Dict[str, Any]]) -> Optional[ScrapeResult]:
+        """Return the stored record of a source if data changes only its content, and only slightly."""
+        if not self.change_threshold or data is None or self.store is None:
+            return None
+        previous = self.store.get(name)
+        if previous is None or not is_minor_change(previous, data, self.change_threshold):
+            return None
+        self.metrics.increment('minor_changes', url)
+        print(f"  Ignored a minor content change to {name}")
+        return ScrapeResult.from_dict(previous)
+    
     def save_results(self, results: Dict[str, Any], output_file: str = 'profile_data.json'):
         """
         Save scraped results to a JSON file.
@@ -138,260 +586,657 @@ class ProfileScraper:
             output_file: Output filename
         """
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(results, f, indent=2, ensure_ascii=False)
+            with self._stage('save_results'), self.metrics.phase('serialize', 'all'):
+                if self.store is not None:
+                    # Stream the stored records in the run's order; a source that
+                    # failed stays null instead of showing its last stored record
+                    self.store.export(output_file, results=results)
+                else:
+                    with open(output_file, 'w', encoding='utf-8') as f:
+                        json.dump(results, f, indent=2, ensure_ascii=False, default=json_default)
             print(f"Results saved to {output_file}")
         except Exception as e:
             print(f"Error saving results: {e}")
     
-    def create_markdown_report(self, results: Dict[str, Any], output_file: str = 'PROFILE_DATA.md'):
+    def render_pages(self, results: Dict[str, Any],
+                     manifest_file: str = '.jekyll_manifest.json') -> RenderedPages:
+        """
+        Render the Markdown report and every Jekyll page in one pass over results.
+        
+        Pass the returned pages to create_markdown_report and
+        create_jekyll_pages to write them without rendering again. Notes keep
+        the slugs recorded in manifest_file by earlier builds.
+        """
+        with self._stage('render_pages'):
+            return self.renderer.render(results, assigned_slugs=PageManifest(manifest_file).slugs)
+    
+    def create_markdown_report(self, results: Dict[str, Any], output_file: str = 'PROFILE_DATA.md',
+                               rendered: Optional[RenderedPages] = None):
         """
         Create a markdown report from scraped data.
         
         Args:
             results: Dictionary containing scraped data
             output_file: Output markdown filename
+            rendered: Pages already rendered from results by render_pages
         """
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write("# William Forney - Profile Data\n\n")
-                f.write(f"*Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n")
-                
-                for source_name, data in results.items():
-                    if data:
-                        f.write(f"## {source_name}\n\n")
-                        f.write(f"**URL:** {data.get('url', 'N/A')}\n\n")
-                        f.write(f"**Title:** {data.get('title', 'N/A')}\n\n")
-                        
-                        if data.get('description'):
-                            f.write(f"**Description:** {data['description']}\n\n")
-                        
-                        if data.get('headings'):
-                            f.write("### Headings\n\n")
-                            for heading in data['headings'][:20]:  # Limit to first 20 headings
-                                f.write(f"- **{heading['level']}:** {heading['text']}\n")
-                            f.write("\n")
-                        
-                        if data.get('content'):
-                            f.write("### Content Preview\n\n")
-                            f.write("```\n")
-                            f.write(data['content'][:2000])  # Limit content preview
-                            if len(data['content']) > 2000:
-                                f.write("\n... (content truncated)")
-                            f.write("\n```\n\n")
-                    else:
-                        f.write(f"## {source_name}\n\n")
-                        f.write("*Failed to scrape content*\n\n")
-                
+            with self._stage('create_markdown_report'), self.metrics.phase('markdown', 'all'):
+                rendered = rendered or self.render_pages(results)
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    f.write(rendered.report)
             print(f"Markdown report saved to {output_file}")
         except Exception as e:
             print(f"Error creating markdown report: {e}")
     
-    def create_jekyll_pages(self, results: Dict[str, Any]):
+    def create_jekyll_pages(self, results: Dict[str, Any], incremental: bool = False,
+                            manifest_file: str = '.jekyll_manifest.json',
+                            rendered: Optional[RenderedPages] = None):
         """
         Create Jekyll-compatible markdown pages from scraped data.
         
         Args:
             results: Dictionary containing scraped data
+            incremental: Only rewrite pages whose source data changed since the
+                last run
+            manifest_file: Manifest of page input hashes, used to skip
+                unchanged pages and to delete notes for removed sources
+            rendered: Pages already rendered from results by render_pages
         """
         try:
-            # Create a comprehensive profile data page
-            self._create_profile_data_page(results)
-            
-            # Update the about page with scraped content
-            self._update_about_page(results)
-            
-            # Create individual notes from scraped profile sources
-            self._create_profile_notes(results)
+            with self.metrics.phase('jekyll', 'all'):
+                manifest = PageManifest(manifest_file, skip_current=incremental)
+                rendered = rendered or self.render_pages(results, manifest_file)
+                manifest.slugs = dict(rendered.slugs)
+                
+                # Create a comprehensive profile data page
+                with self._stage('jekyll.profile_data'):
+                    self._create_profile_data_page(results, rendered, manifest)
+                
+                # Update the about page with scraped content
+                with self._stage('jekyll.about'):
+                    self._update_about_page(results, rendered, manifest)
+                
+                # Create individual notes from scraped profile sources
+                with self._stage('jekyll.notes'):
+                    self._create_profile_notes(results, rendered, manifest)
+                
+                # Index the notes for client-side search
+                with self._stage('jekyll.search_index'):
+                    self._update_search_index(results, rendered)
+                
+                # Notes of sources that are gone are deleted in every mode
+                with self._stage('jekyll.manifest'):
+                    manifest.remove_stale(self.renderer.notes_dir)
+                    _log_pages('Deleted', manifest.deleted)
+                    manifest.save()
+                if incremental:
+                    print(f"  {manifest.summary()}")
             
             print("✓ Jekyll pages created successfully")
         except Exception as e:
             print(f"Error creating Jekyll pages: {e}")
     
-    def _create_profile_data_page(self, results: Dict[str, Any]):
+    def _create_profile_data_page(self, results: Dict[str, Any], rendered: RenderedPages,
+                                  manifest: Optional[PageManifest] = None):
         """Create a comprehensive profile data page."""
         output_file = 'profile-data.md'
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            # Jekyll front matter
-            f.write("---\n")
-            f.write("layout: page\n")
-            f.write("title: Profile Data\n")
-            f.write("permalink: /profile-data/\n")
-            f.write("---\n\n")
-            
-            f.write("# Profile Data\n\n")
-            f.write(f"*Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n")
-            f.write("This page contains aggregated profile information from various sources.\n\n")
-            
-            for source_name, data in results.items():
-                if data:
-                    f.write(f"## {source_name}\n\n")
-                    
-                    if data.get('description'):
-                        f.write(f"{data['description']}\n\n")
-                    
-                    f.write(f"**Source:** [{data.get('url', 'N/A')}]({data.get('url', '#')})\n\n")
-                    
-                    if data.get('content'):
-                        f.write("### Content\n\n")
-                        # Split content into paragraphs for better formatting
-                        content_lines = data['content'].split('\n')
-                        for line in content_lines[:50]:  # Limit lines
-                            if line.strip():
-                                f.write(f"{line}\n\n")
-                        if len(content_lines) > 50:
-                            f.write("*[Content truncated for brevity]*\n\n")
-                else:
-                    f.write(f"## {source_name}\n\n")
-                    f.write("*Content not available*\n\n")
+        inputs = [[source_name, _page_fields(data, ('description', 'url', 'content'))]
+                  for source_name, data in results.items()]
+        if manifest is not None and manifest.is_current(output_file, inputs):
+            print(f"  - Skipped {output_file} (unchanged)")
+            return
+        
+        with atomic_open(output_file) as f:
+            f.write(rendered.profile_data)
         
+        if manifest is not None:
+            manifest.record(output_file, inputs)
         print(f"  - Created {output_file}")
     
-    def _update_about_page(self, results: Dict[str, Any]):
+    def _update_about_page(self, results: Dict[str, Any], rendered: RenderedPages,
+                           manifest: Optional[PageManifest] = None):
         """Update the about page with scraped profile information."""
         output_file = 'about.md'
         
         # Check if we have any successful scrapes
-        has_data = any(data is not None for data in results.values())
-        
-        if not has_data:
+        if rendered.about is None:
+            if manifest is not None:
+                manifest.keep(output_file)
             print(f"  - Skipped updating {output_file} (no scraped data available)")
             return
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            # Jekyll front matter
-            f.write("---\n")
-            f.write("layout: page\n")
-            f.write("title: About\n")
-            f.write("permalink: /about/\n")
-            f.write("---\n\n")
-            
-            f.write("# About Me\n\n")
-            
-            # Add content from scraped sources
-            for source_name, data in results.items():
-                if data and data.get('description'):
-                    f.write(f"{data['description']}\n\n")
-                    break  # Use first available description
-            
-            f.write("## Profile Information\n\n")
-            f.write("This page aggregates information from my various online profiles:\n\n")
-            
-            for source_name, data in results.items():
-                if data:
-                    f.write(f"- **{source_name}**: [{data.get('url', 'N/A')}]({data.get('url', '#')})\n")
-            
-            f.write("\n")
-            f.write("For detailed profile data, visit the [Profile Data](/profile-data/) page.\n\n")
-            
-            f.write("## Contact\n\n")
-            f.write("Feel free to reach out through any of the profiles listed above.\n")
+        inputs = [[source_name, _page_fields(data, ('description', 'url'))]
+                  for source_name, data in results.items()]
+        if manifest is not None and manifest.is_current(output_file, inputs):
+            print(f"  - Skipped {output_file} (unchanged)")
+            return
+        
+        with atomic_open(output_file) as f:
+            f.write(rendered.about)
         
+        if manifest is not None:
+            manifest.record(output_file, inputs)
         print(f"  - Updated {output_file}")
     
-    def _create_profile_notes(self, results: Dict[str, Any]):
-        """Create individual notes from scraped profile sources."""
-        notes_dir = '_notes'
-        
+    def _create_profile_notes(self, results: Dict[str, Any], rendered: RenderedPages,
+                              manifest: Optional[PageManifest] = None):
+        """Create individual notes from scraped profile sources, writing them in parallel."""
         # Create notes directory if it doesn't exist
-        os.makedirs(notes_dir, exist_ok=True)
+        os.makedirs(self.renderer.notes_dir, exist_ok=True)
         
+        pending = []
+        skipped = []
         for source_name, data in results.items():
-            if data:
-                # Create a filename from source name
-                filename = source_name.lower().replace(' ', '-').replace('.', '-')
-                output_file = os.path.join(notes_dir, f'{filename}.md')
-                
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    # Jekyll front matter
-                    f.write("---\n")
-                    f.write(f"title: {data.get('title', source_name)}\n")
-                    f.write(f"date: {datetime.now().strftime('%Y-%m-%d')}\n")
-                    f.write(f"categories: [profile, scraped-content]\n")
-                    f.write("---\n\n")
-                    
-                    f.write(f"# {data.get('title', source_name)}\n\n")
-                    
-                    if data.get('description'):
-                        f.write(f"{data['description']}\n\n")
-                    
-                    f.write(f"**Source:** [{data.get('url')}]({data.get('url')})\n\n")
-                    f.write(f"*Scraped on: {data.get('scraped_at', 'N/A')}*\n\n")
-                    
-                    if data.get('content'):
-                        f.write("## Content\n\n")
-                        # Format content with proper line breaks
-                        content_lines = data['content'].split('\n')
-                        for line in content_lines[:100]:
-                            if line.strip():
-                                f.write(f"{line}\n\n")
-                
-                print(f"  - Created {output_file}")
+            if not data:
+                # Keep the last good note when a source fails to scrape
+                if manifest is not None:
+                    manifest.keep(rendered.note_paths[source_name])
+                continue
+            
+            output_file, text = rendered.notes[source_name]
+            inputs = [source_name, _page_fields(data, ('title', 'description', 'url', 'content'))]
+            if manifest is not None and manifest.is_current(output_file, inputs):
+                skipped.append(output_file)
+                continue
+            pending.append((output_file, text, inputs))
+        
+        for directory in {os.path.dirname(output_file) for output_file, _, _ in pending}:
+            os.makedirs(directory, exist_ok=True)
+        
+        def write(notes):
+            for output_file, text, _ in notes:
+                with atomic_open(output_file) as f:
+                    f.write(text)
+        
+        # One batch per thread: a future per note would cost more than writing it
+        workers = min(NOTE_WRITE_WORKERS, len(pending))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(write, [pending[i::workers] for i in range(workers)]))
+        else:
+            write(pending)
+        
+        if manifest is not None:
+            for output_file, _, inputs in pending:
+                manifest.record(output_file, inputs)
+        _log_pages('Skipped', skipped, '(unchanged)')
+        _log_pages('Created', [output_file for output_file, _, _ in pending])
+    
+    def _update_search_index(self, results: Dict[str, Any], rendered: RenderedPages):
+        """Re-index the notes whose text changed in the static search index."""
+        documents = {}
+        for source_name, data in results.items():
+            slug = rendered.slugs[source_name]
+            # A failed source keeps its note, so it keeps its index entry too
+            documents[slug] = None if not data else {
+                'url': f'/notes/{slug}/',
+                'title': data.get('title', source_name),
+                'description': data.get('description'),
+                'content': data.get('content')
+            }
+        
+        index = SearchIndex()
+        if index.update(documents):
+            print(f"  - Created {index.index_file}")
+        else:
+            print(f"  - Skipped {index.index_file} (unchanged)")
+        print(f"  {index.summary()}")
 
 
-def main():
-    """Main function to run the scraper."""
-    scraper = ProfileScraper()
+def _log_pages(action: str, paths: List[str], note: str = ''):
+    """Print the generated pages an action applied to, or just their number when there are many."""
+    suffix = f' {note}' if note else ''
+    if len(paths) <= PAGE_LOG_LIMIT:
+        for path in paths:
+            print(f"  - {action} {path}{suffix}")
+    else:
+        print(f"  - {action} {len(paths)} notes{suffix}")
+
+
+def _close_response(future):
+    """Done callback that releases the connection of a response nobody will read."""
+    if future.exception() is None:
+        future.result().close()
+
+
+def _page_fields(data: Optional[Dict[str, Any]], fields) -> Optional[Dict[str, Any]]:
+    """Return the fields of a record that a page is rendered from, ignoring volatile timestamps."""
+    if not data:
+        return None
+    return {field: data.get(field) for field in fields}
+
+
+def _interleave_by_host(urls: Dict[str, str]) -> List[str]:
+    """
+    Order source names round-robin across hosts so that one busy host does
+    not hold every worker while sources on other hosts wait in the queue.
+    """
+    by_host: Dict[str, List[str]] = {}
+    for name, url in urls.items():
+        by_host.setdefault(urlparse(url).netloc.lower(), []).append(name)
     
-    # URLs to scrape
-    urls = {
-        'williamforney.com': 'https://williamforney.com',
-        'LinkedIn Profile': 'https://linkedin.com/in/wforney'
-    }
+    ordered = []
+    queues = list(by_host.values())
+    while queues:
+        for queue in queues:
+            ordered.append(queue.pop(0))
+        queues = [queue for queue in queues if queue]
+    return ordered
+
+
+def scrape_source(scraper: ProfileScraper, name: str, url: str,
+                  source: Optional[Source] = None) -> Optional[Dict[str, Any]]:
+    """Scrape a single named source with its registry settings, falling back to its manual data."""
+    print(f"\n{'='*60}")
+    print(f"Scraping: {name}")
+    print(f"{'='*60}")
+    if source is not None and source.notice:
+        print(f"Note: {source.notice} Attempting to fetch {url}...")
+    data = scraper.scrape_website(url, extractor=source.extractor if source is not None else None, source=name)
+    if not data and source is not None and source.fallback:
+        print(f"Using the registered fallback data for {name}")
+        data = scraper.fallback_record(url, copy.deepcopy(source.fallback))
+    if data:
+        print(f"✓ Successfully scraped {name}")
+    else:
+        print(f"✗ Failed to scrape {name}")
+    return data
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Scrape William Forney's profile content.")
+    parser.add_argument('--sources', default=DEFAULT_REGISTRY, metavar='FILE',
+                        help='JSON registry of the sources to scrape (default: sources.json)')
+    parser.add_argument('--shard', metavar='INDEX/COUNT',
+                        help='scrape only shard INDEX of COUNT and write its partial results, e.g. 0/4')
+    parser.add_argument('--merge', nargs='+', metavar='PARTIAL',
+                        help='merge partial results written by --shard runs and generate the pages')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of sources to fetch concurrently (default: 1)')
+    parser.add_argument('--per-host', type=int, default=2,
+                        help='maximum concurrent fetches against one host (default: 2)')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='processes pages are parsed in, 0 to parse in the fetching threads (default: 0)')
+    parser.add_argument('--rate', type=float, default=2.0,
+                        help='requests per second allowed per host, 0 for no pacing (default: 2)')
+    parser.add_argument('--burst', type=int, default=4,
+                        help='requests a host may receive back to back (default: 4)')
+    parser.add_argument('--retries', type=int, default=3,
+                        help='retries of a throttled or failed page fetch (default: 3)')
+    parser.add_argument('--health-file', default='.host_health.json',
+                        help='per-host latency and failure history (default: .host_health.json)')
+    parser.add_argument('--no-health', action='store_true',
+                        help='use fixed 30 second timeouts without hedging or circuit breaking')
+    parser.add_argument('--store-file', default='profile_data.jsonl',
+                        help='append-only JSON Lines store of every scrape (default: profile_data.jsonl)')
+    parser.add_argument('--no-export', action='store_true',
+                        help='only append to the result store instead of also exporting profile_data.json')
+    parser.add_argument('--export-only', action='store_true',
+                        help='export profile_data.json from the result store without scraping')
+    parser.add_argument('--snapshot-dir', default='.snapshots',
+                        help='directory of the page snapshot history (default: .snapshots)')
+    parser.add_argument('--no-snapshots', action='store_true',
+                        help='do not add this run to the snapshot history')
+    parser.add_argument('--snapshot-keep-days', type=float, default=None,
+                        help='delete snapshots older than this many days after the run')
+    parser.add_argument('--snapshot-at', nargs=2, metavar=('SOURCE', 'DATE'),
+                        help='print the record a source had on an ISO 8601 date and exit')
+    parser.add_argument('--snapshot-diff', nargs=2, metavar=('RUN_A', 'RUN_B'),
+                        help='list the pages that changed between two snapshot runs and exit')
+    parser.add_argument('--link-graph-file', default='.link_graph.json',
+                        help='graph of the links between scraped pages (default: .link_graph.json)')
+    parser.add_argument('--no-link-graph', action='store_true',
+                        help='do not update the link graph')
+    parser.add_argument('--links-to', metavar='URL',
+                        help='list the sources that link to a URL and exit')
+    parser.add_argument('--broken-links', action='store_true',
+                        help='list links to pages that could not be scraped and exit')
+    archive = parser.add_mutually_exclusive_group()
+    archive.add_argument('--record', metavar='ARCHIVE',
+                         help='append every HTTP response of the run to an archive file')
+    archive.add_argument('--replay', metavar='ARCHIVE',
+                         help='answer every request from an archive file without using the network')
+    parser.add_argument('--journal-file', default='.scrape_journal.jsonl',
+                        help='progress journal an interrupted run resumes from (default: .scrape_journal.jsonl)')
+    parser.add_argument('--no-journal', action='store_true',
+                        help='do not journal progress or resume an interrupted run')
+    parser.add_argument('--resume-within', type=float, default=3600, metavar='SECONDS',
+                        help='resume sources an interrupted run finished at most this long ago, '
+                             '0 to scrape everything again (default: 3600)')
+    parser.add_argument('--change-threshold', type=int, default=0, metavar='BITS',
+                        help='content fingerprint bits a page may change by and keep its stored record, '
+                             f'e.g. {DEFAULT_MAX_DISTANCE}; one-word edits can fall within it, so every '
+                             'change is kept by default (default: 0)')
+    parser.add_argument('--duplicate-threshold', type=int, default=DEFAULT_MAX_DISTANCE, metavar='BITS',
+                        help=f'content fingerprint bits near-duplicate sources may differ by '
+                             f'(default: {DEFAULT_MAX_DISTANCE})')
+    parser.add_argument('--near-duplicates', action='store_true',
+                        help='list groups of stored sources with the same or nearly the same content and exit')
+    parser.add_argument('--cache-file', default='.scrape_cache.json',
+                        help='conditional-request cache file (default: .scrape_cache.json)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='always download pages instead of revalidating cached ones')
+    parser.add_argument('--max-bytes', type=int, default=2 * 1024 * 1024,
+                        help='stream pages and stop downloading after this many bytes '
+                             '(default: 2 MiB, 0 to read whole pages)')
+    parser.add_argument('--extractor', choices=sorted(EXTRACTORS), default='bs4',
+                        help='HTML extraction backend (default: bs4)')
+    parser.add_argument('--crawl', action='store_true',
+                        help='follow same-site links from williamforney.com and note every page')
+    parser.add_argument('--crawl-depth', type=int, default=2,
+                        help='number of link hops followed when crawling (default: 2)')
+    parser.add_argument('--crawl-pages', type=int, default=50,
+                        help='maximum number of pages fetched when crawling (default: 50)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only rewrite Jekyll pages whose source data changed')
+    parser.add_argument('--note-subdirs', action='store_true',
+                        help='spread the generated notes over 256 subdirectories of _notes')
+    parser.add_argument('--metrics-json', default='scrape_metrics.json',
+                        help='file per-phase metrics are exported to as JSON (default: scrape_metrics.json)')
+    parser.add_argument('--metrics-prom', default='scrape_metrics.prom',
+                        help='file metrics are exported to in Prometheus text format '
+                             '(default: scrape_metrics.prom)')
+    parser.add_argument('--profile', nargs='?', const='profile', metavar='DIR',
+                        help='profile every stage of the run and write CPU profiles, flame graph stacks '
+                             'and top allocations to DIR (default: profile)')
+    parser.add_argument('--max-headings', type=int, default=None,
+                        help='maximum number of headings kept per page')
+    parser.add_argument('--max-links', type=int, default=None,
+                        help='maximum number of links kept per page')
+    parser.add_argument('--watch', action='store_true',
+                        help='keep running and re-scrape each source on a schedule')
+    parser.add_argument('--interval', type=float, default=3600,
+                        help='seconds between scrapes of a source in watch mode (default: 3600)')
+    parser.add_argument('--jitter', type=float, default=0.1,
+                        help='fraction by which watch intervals are randomly varied (default: 0.1)')
+    args = parser.parse_args(argv)
+    if args.watch and args.crawl:
+        parser.error('--watch cannot be combined with --crawl')
+    if not 0 <= args.duplicate_threshold < FINGERPRINT_BITS:
+        parser.error(f'--duplicate-threshold must be between 0 and {FINGERPRINT_BITS - 1}')
+    if args.shard:
+        if args.watch or args.merge:
+            parser.error('--shard cannot be combined with --watch or --merge')
+        try:
+            args.shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    return args
+
+
+def save_state(scraper: ProfileScraper, args: argparse.Namespace):
+    """Persist the result store index, response cache, host health, link graph and metrics of a run."""
+    if scraper.store is not None:
+        scraper.store.save()
     
-    results = {}
+    if scraper.snapshot is not None:
+        scraper.snapshot.save()
+        # The next watch cycle is recorded as a run of its own
+        scraper.snapshot = scraper.snapshot.store.start_run()
     
-    # Scrape each URL
-    for name, url in urls.items():
-        print(f"\n{'='*60}")
-        print(f"Scraping: {name}")
-        print(f"{'='*60}")
-        if name == 'LinkedIn Profile':
-            data = scraper.scrape_linkedin(url)
-            if not data:
-                # Manual LinkedIn data
-                manual_linkedin = {
-                    'title': 'William Forney | LinkedIn',
-                    'description': 'Professional with experience in data applications and cloud services.',
-                    'headings': [
-                        {'level': 'h1', 'text': 'William Forney'},
-                        {'level': 'h2', 'text': 'Experience'},
-                        {'level': 'h2', 'text': 'Skills'}
-                    ],
-                    'links': [
-                        {'text': 'Website', 'href': 'https://williamforney.com'}
-                    ],
-                    'content': '''William Forney
-Professional profile.
-
-Experience
-- Data applications and pipelines at Starbucks, focusing on cloud services and backend data flow.
-
-Skills
-- Programming, cloud technologies, data processing.'''
-                }
-                data = scraper.scrape_linkedin_manual(manual_linkedin)
-        else:
-            data = scraper.scrape_website(url)
-        results[name] = data
-        if data:
-            print(f"✓ Successfully scraped {name}")
+    if scraper.cache is not None:
+        scraper.cache.save()
+        print(f"\n{scraper.cache.summary()}")
+    
+    if scraper.health is not None:
+        scraper.health.save()
+        print(scraper.health.summary())
+    
+    if scraper.link_graph is not None:
+        scraper.link_graph.save()
+        print(scraper.link_graph.summary())
+    
+    if scraper.archive is not None:
+        print(scraper.archive.summary())
+    
+    if scraper.journal is not None and scraper.journal.resumed:
+        print(scraper.journal.summary())
+    
+    scraper.metrics.export_json(args.metrics_json)
+    scraper.metrics.export_prometheus(args.metrics_prom)
+
+
+def query_snapshots(snapshots: SnapshotStore, args: argparse.Namespace):
+    """Answer --snapshot-at and --snapshot-diff from the snapshot history."""
+    if args.snapshot_at:
+        source, date = args.snapshot_at
+        try:
+            record = snapshots.record_at(source, date)
+        except ValueError:
+            print(f"Error: invalid date {date!r}; expected ISO 8601, e.g. 2024-05-01 or 2024-05-01T12:00")
+            sys.exit(1)
+        if record is None:
+            print(f"No snapshot of {source} on or before {date}")
         else:
-            print(f"✗ Failed to scrape {name}")
+            print(json.dumps(record, indent=2, ensure_ascii=False))
+    
+    if args.snapshot_diff:
+        run_a, run_b = args.snapshot_diff
+        runs = snapshots.runs()
+        for run_id in (run_a, run_b):
+            if run_id not in runs:
+                print(f"Error: no snapshot run {run_id} in {snapshots.run_dir}")
+                sys.exit(1)
+        changes = snapshots.diff(run_a, run_b)
+        for source, change in changes.items():
+            fields = f" ({', '.join(change['fields'])})" if change['fields'] else ''
+            print(f"{change['status']:8} {source}{fields}")
+        print(f"{len(changes)} pages differ between {run_a} and {run_b}")
+
+
+def report_near_duplicates(records, max_distance: int):
+    """Print the groups of sources whose content is the same or nearly so."""
+    groups = near_duplicate_groups(records, max_distance)
+    for group in groups:
+        print(f"  ~ {', '.join(group)}")
+    print(f"{len(groups)} groups of near-duplicate sources")
+
+
+def query_links(graph: LinkGraph, args: argparse.Namespace):
+    """Answer --links-to and --broken-links from the saved link graph."""
+    if args.links_to:
+        sources = sorted(graph.linking_to(args.links_to))
+        for source in sources:
+            print(source)
+        print(f"{len(sources)} sources link to {args.links_to}")
+    
+    if args.broken_links:
+        broken = graph.broken()
+        for target in sorted(broken):
+            print(f"{target} <- {', '.join(sorted(broken[target]))}")
+        print(f"{len(broken)} broken link targets")
+
+
+# Per-run state files each shard keeps separately so concurrent shards never share one
+SHARD_STATE_FILES = ('store_file', 'journal_file', 'cache_file', 'health_file', 'link_graph_file', 'snapshot_dir',
+                     'metrics_json', 'metrics_prom')
+
+
+def load_partials(partial_files: List[str], sources: Dict[str, Source]) -> Dict[str, Any]:
+    """
+    Read the partial results written by --shard runs and merge them.
     
+    Raises:
+        OSError: If a partial cannot be read
+        ValueError: If a partial is not a JSON object
+    """
+    partials = []
+    for partial_file in partial_files:
+        with open(partial_file, 'r', encoding='utf-8') as f:
+            partial = json.load(f)
+        if not isinstance(partial, dict):
+            raise ValueError(f"{partial_file} does not contain scraped results")
+        partials.append(partial)
+    return merge_partials(partials, sources)
+
+
+def write_outputs(scraper: ProfileScraper, results: Dict[str, Any], args: argparse.Namespace):
+    """Save the results and generate the Markdown report and Jekyll pages."""
     # Save results
     print(f"\n{'='*60}")
     print("Saving results...")
     print(f"{'='*60}")
-    scraper.save_results(results)
-    scraper.create_markdown_report(results)
+    if not args.no_export:
+        scraper.save_results(results)
+    rendered = scraper.render_pages(results)
+    scraper.create_markdown_report(results, rendered=rendered)
     
     # Create Jekyll pages
     print(f"\n{'='*60}")
     print("Creating Jekyll pages...")
     print(f"{'='*60}")
-    scraper.create_jekyll_pages(results)
+    scraper.create_jekyll_pages(results, incremental=args.incremental, rendered=rendered)
+
+
+def finish_profile(profiler):
+    """Stop a stage profiler, write its profiles and print its summary."""
+    if profiler is None:
+        return
+    profiler.close()
+    print(f"\n{profiler.summary()}")
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main function to run the scraper."""
+    args = parse_args(argv)
+    if args.shard:
+        for option in SHARD_STATE_FILES:
+            setattr(args, option, shard_file(getattr(args, option), *args.shard))
+    store = ResultStore(args.store_file)
+    if args.export_only:
+        store.export()
+        print(f"Exported {len(store)} sources from {args.store_file} to profile_data.json")
+        return
+    
+    try:
+        sources = load_sources(args.sources)
+    except (OSError, ValueError) as e:
+        print(f"Error: cannot load sources from {args.sources}: {e}")
+        sys.exit(1)
+    
+    if args.snapshot_at or args.snapshot_diff:
+        query_snapshots(SnapshotStore(args.snapshot_dir), args)
+        return
+    
+    if args.links_to or args.broken_links:
+        query_links(LinkGraph(args.link_graph_file), args)
+        return
+    
+    if args.near_duplicates:
+        report_near_duplicates(store.items(), args.duplicate_threshold)
+        return
+    
+    if args.shard:
+        selected = select_shard(sources, *args.shard)
+        print(f"Shard {args.shard[0]}/{args.shard[1]}: {len(selected)} of {len(sources)} sources")
+    else:
+        selected = sources
+    source_urls = {name: source.url for name, source in selected.items()}
+    
+    snapshots = None if args.no_snapshots or args.merge else SnapshotStore(args.snapshot_dir)
+    cache = health = archive = None
+    if not args.merge:
+        # Merging only reads partials and writes pages, so it needs no network stack or fetch state
+        require_scraping_packages()
+        cache = None if args.no_cache else ResponseCache(args.cache_file)
+        # Replayed latencies say nothing about the live hosts, so replay must not touch their history
+        health = None if args.no_health or args.replay else HostHealth(args.health_file)
+        if args.record or args.replay:
+            from http_archive import HttpArchive
+            archive = HttpArchive(args.record or args.replay, 'record' if args.record else 'replay')
+    link_graph = None if args.no_link_graph else LinkGraph(args.link_graph_file)
+    journal = None
+    if not (args.no_journal or args.watch or args.merge):
+        # Watch mode keeps its progress in memory and rewrites the outputs after every cycle
+        from progress_journal import ProgressJournal
+        journal = ProgressJournal(args.journal_file, max_age=args.resume_within)
+        if len(journal):
+            print(f"Found {len(journal)} sources in the journal of an interrupted run")
+    profiler = None
+    if args.profile:
+        from stage_profiler import StageProfiler
+        profiler = StageProfiler(args.profile)
+        profiler.start()
+    scraper = ProfileScraper(max_workers=args.workers, per_host_limit=args.per_host, cache=cache,
+                             max_bytes=args.max_bytes or None, max_headings=args.max_headings,
+                             max_links=args.max_links, extractor=args.extractor,
+                             rate_limit=0 if args.replay else args.rate, burst=args.burst,
+                             max_retries=args.retries, health=health, store=store,
+                             snapshot=snapshots.start_run() if snapshots is not None else None,
+                             parse_workers=args.parse_workers, link_graph=link_graph, archive=archive,
+                             journal=journal, note_subdirs=args.note_subdirs,
+                             change_threshold=args.change_threshold, profiler=profiler)
+    scrape = lambda name, url: scrape_source(scraper, name, url, sources.get(name))
+    
+    if args.watch:
+        intervals = {name: source.interval for name, source in selected.items()
+                     if source.interval is not None}
+        daemon = ScrapeDaemon(scraper, source_urls, scrape,
+                              interval=args.interval, intervals=intervals, jitter=args.jitter,
+                              after_cycle=lambda: save_state(scraper, args))
+        daemon.run()
+        scraper.close()
+        finish_profile(profiler)
+        return
+    
+    if args.merge:
+        try:
+            results = load_partials(args.merge, sources)
+        except (OSError, ValueError) as e:
+            print(f"Error: cannot merge partial results: {e}")
+            sys.exit(1)
+        print(f"Merged {len(args.merge)} partial results into {len(results)} sources")
+        for name, data in results.items():
+            url = sources[name].url if name in sources else (data or {}).get('url')
+            if data is not None:
+                store.append(name, data)
+            if link_graph is not None and url:
+                link_graph.update(name, url, data)
+    else:
+        # Scrape each URL
+        results = scraper.scrape_all(source_urls, scrape)
+        
+        if args.crawl:
+            from crawler import SiteCrawler
+            for name, source in selected.items():
+                if not source.crawl:
+                    continue
+                print(f"\n{'='*60}")
+                print(f"Crawling {name}...")
+                print(f"{'='*60}")
+                crawler = SiteCrawler(scraper, max_depth=args.crawl_depth, max_pages=args.crawl_pages)
+                results.update(crawler.crawl(name, source.url, start_record=results.get(name)))
+    
+    if args.shard:
+        # Pages are generated once, by --merge, from the partials of every shard
+        partial_file = shard_file('profile_data.json', *args.shard)
+        scraper.save_results(results, partial_file)
+        save_state(scraper, args)
+        if journal is not None:
+            journal.clear()
+        scraper.close()
+        finish_profile(profiler)
+        print(f"\n✓ Shard complete! Merge the partials with --merge, e.g. --merge {partial_file} ...")
+        return
+    
+    print(f"\n{'='*60}")
+    print("Near-duplicate sources...")
+    print(f"{'='*60}")
+    report_near_duplicates(results.items(), args.duplicate_threshold)
+    
+    write_outputs(scraper, results, args)
+    
+    save_state(scraper, args)
+    if journal is not None:
+        # Everything the journal protected is now in the outputs and the store
+        journal.clear()
+    scraper.close()
+    if snapshots is not None and args.snapshot_keep_days is not None:
+        snapshots.prune(args.snapshot_keep_days)
+    finish_profile(profiler)
     
     print("\n✓ Scraping complete!")
     print("\nOutput files:")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Compact record of one scraped page.
+Headings and links are stored as parallel tuples instead of lists of small
+dicts; the dict lists are only built when a field is read through the
+mapping view, which keeps records usable wherever a scraped dict was.
+Content fingerprints and the stale flag are attributes outside the mapping
+view, so they never end up in the JSON outputs.
+"""
+
+from collections.abc import Mapping
+from typing import Dict, Any, Iterator, List, Optional
+
+from extractors import HEADING_TAGS
+from fingerprints import content_hash, simhash
+
+
+def _pack_levels(headings: List[Dict[str, str]]):
+    """
+    Return heading levels as one byte per heading, 1 for h1 up to 6 for h6.
+    
+    Records this scraper did not extract (journaled, stored or registry
+    fallback records) may use other levels, such as 'H2'; those are kept
+    verbatim as a tuple instead.
+    """
+    levels = tuple(h['level'] for h in headings)
+    if all(level in HEADING_TAGS for level in levels):
+        return bytes(HEADING_TAGS.index(level) + 1 for level in levels)
+    return levels
+
+
+class ScrapeResult(Mapping):
+    """Read-only, dict-compatible record of a scraped page."""
+    
+    __slots__ = ('url', 'title', 'description', 'content', 'scraped_at',
+                 '_heading_levels', '_heading_texts', '_link_texts', '_link_hrefs',
+                 '_simhash', '_content_hash', 'stale')
+    
+    # Keys of the mapping view, in the order scraped dicts always had them
+    FIELDS = ('url', 'title', 'description', 'headings', 'links', 'content', 'scraped_at')
+    
+    def __init__(self, url: str, title: str, description: str,
+                 headings: List[Dict[str, str]], links: List[Dict[str, str]],
+                 content: str, scraped_at: Optional[str]):
+        """
+        Args:
+            url: URL of the page
+            title: Page title
+            description: Meta description
+            headings: {'level', 'text'} dicts as returned by the extractors
+            links: {'text', 'href'} dicts as returned by the extractors
+            content: Main content text
+            scraped_at: ISO 8601 time the page was scraped
+        """
+        self.url = url
+        self.title = title
+        self.description = description
+        self.content = content
+        self.scraped_at = scraped_at
+        self._heading_levels = _pack_levels(headings)
+        self._heading_texts = tuple(h['text'] for h in headings)
+        self._link_texts = tuple(link['text'] for link in links)
+        self._link_hrefs = tuple(link['href'] for link in links)
+        self._simhash: Optional[int] = None
+        self._content_hash: Optional[str] = None
+        # Set on records served from the cache without contacting the host, e.g. while its circuit is open
+        self.stale = False
+    
+    @classmethod
+    def from_fields(cls, url: str, fields: Dict[str, Any], scraped_at: Optional[str]) -> 'ScrapeResult':
+        """Build a record from the fields an extractor returned."""
+        return cls(url, fields['title'], fields['description'], fields['headings'],
+                   fields['links'], fields['content'], scraped_at)
+    
+    @classmethod
+    def from_dict(cls, record: Dict[str, Any]) -> 'ScrapeResult':
+        """Build a record from a scraped dict, e.g. one loaded from JSON."""
+        return cls(record.get('url'), record.get('title'), record.get('description'),
+                   record.get('headings') or [], record.get('links') or [],
+                   record.get('content'), record.get('scraped_at'))
+    
+    @property
+    def headings(self) -> List[Dict[str, str]]:
+        """The headings as {'level', 'text'} dicts, built on each access."""
+        levels = self._heading_levels
+        if isinstance(levels, bytes):
+            levels = [HEADING_TAGS[level - 1] for level in levels]
+        return [{'level': level, 'text': text} for level, text in zip(levels, self._heading_texts)]
+    
+    @property
+    def links(self) -> List[Dict[str, str]]:
+        """The links as {'text', 'href'} dicts, built on each access."""
+        return [{'text': text, 'href': href} for text, href in zip(self._link_texts, self._link_hrefs)]
+    
+    @property
+    def simhash(self) -> int:
+        """64-bit simhash of the content, computed on first access."""
+        if self._simhash is None:
+            self._simhash = simhash(self.content or '')
+        return self._simhash
+    
+    @property
+    def content_hash(self) -> str:
+        """SHA-256 of the content, computed on first access."""
+        if self._content_hash is None:
+            self._content_hash = content_hash(self.content or '')
+        return self._content_hash
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.FIELDS)
+    
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self.FIELDS
+    
+    def __repr__(self) -> str:
+        return f'ScrapeResult(url={self.url!r}, title={self.title!r})'
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the record as a plain dict."""
+        return {key: self[key] for key in self.FIELDS}
+
+
+def json_default(value: Any) -> Any:
+    """json.dump default hook that serializes ScrapeResult records as their dicts."""
+    if isinstance(value, ScrapeResult):
+        return value.to_dict()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
\ No newline at end of file
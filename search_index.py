@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Prebuilt full-text search index for the generated Jekyll notes.
+Each note is tokenized into weighted term counts over its title,
+description and content, and the postings of all notes are written as a
+static JSON file the site searches client-side. Term counts are cached per
+note, so only notes whose text changed are tokenized again.
+"""
+
+import json
+import os
+import re
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+from page_manifest import atomic_open, hash_inputs
+
+
+# Score each occurrence of a term adds, by the field it occurs in
+FIELD_WEIGHTS = {'title': 10, 'description': 4, 'content': 1}
+
+# Characters of each note's description (or content) kept for result listings
+SUMMARY_LIMIT = 160
+
+# Bump when tokenization or the index layout changes so every note is re-tokenized
+INDEX_VERSION = 1
+
+# Words of two or more characters; single characters are never indexed
+_TOKEN_RE = re.compile(r'\w\w+')
+
+STOP_WORDS = frozenset(
+    'a an and are as at be but by for from has have in into is it its of on or that the '
+    'their this to was were will with you your'.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens, leaving out stop words and single characters."""
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def term_scores(document: Dict[str, str], weights: Dict[str, int] = FIELD_WEIGHTS) -> Dict[str, int]:
+    """Return the weighted occurrence count of every term in a document's fields."""
+    scores: Dict[str, int] = {}
+    for field, weight in weights.items():
+        # Counter tallies the tokens in C; each distinct term is then weighted once
+        for token, count in Counter(tokenize(document.get(field) or '')).items():
+            scores[token] = scores.get(token, 0) + count * weight
+    return scores
+
+
+class SearchIndex:
+    """Static JSON search index of the notes, rebuilt from per-note cached term scores."""
+    
+    def __init__(self, index_file: str = os.path.join('assets', 'search-index.json'),
+                 state_file: str = '.search_index_state.json'):
+        """
+        Args:
+            index_file: Path of the JSON index served with the site
+            state_file: Path of the per-note term cache used for incremental updates
+        """
+        self.index_file = index_file
+        self.state_file = state_file
+        self.added: List[str] = []
+        self.updated: List[str] = []
+        self.removed: List[str] = []
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            # Term scores cached under an older tokenization are discarded
+            self._docs: Dict[str, Dict[str, Any]] = state['docs'] if state.get('version') == INDEX_VERSION else {}
+        except (OSError, ValueError, KeyError):
+            self._docs = {}
+    
+    def update(self, documents: Dict[str, Optional[Dict[str, str]]]) -> bool:
+        """
+        Bring the index up to date with the current set of notes.
+        
+        Args:
+            documents: Note id to its 'url', 'title', 'description' and
+                'content', or None to keep a note's last indexed version
+                (e.g. its source failed this run). Notes missing from
+                documents are removed from the index.
+        
+        Returns:
+            True if the index file was rewritten
+        """
+        for doc_id in [doc_id for doc_id in self._docs if doc_id not in documents]:
+            del self._docs[doc_id]
+            self.removed.append(doc_id)
+        
+        for doc_id, document in documents.items():
+            if document is None:
+                continue
+            digest = hash_inputs([INDEX_VERSION, FIELD_WEIGHTS, document])
+            cached = self._docs.get(doc_id)
+            if cached is not None and cached['hash'] == digest:
+                continue
+            (self.updated if cached is not None else self.added).append(doc_id)
+            summary = document.get('description') or document.get('content') or ''
+            self._docs[doc_id] = {
+                'hash': digest,
+                'url': document['url'],
+                'title': document.get('title') or doc_id,
+                'summary': summary[:SUMMARY_LIMIT],
+                'terms': term_scores(document)
+            }
+        
+        if not (self.added or self.updated or self.removed) and os.path.exists(self.index_file):
+            return False
+        self._write_index()
+        self._save_state()
+        return True
+    
+    def _write_index(self):
+        """Merge the cached term scores of every note into the inverted index file."""
+        docs = []
+        postings: Dict[str, List[int]] = {}
+        for number, doc_id in enumerate(sorted(self._docs)):
+            doc = self._docs[doc_id]
+            docs.append({'url': doc['url'], 'title': doc['title'], 'summary': doc['summary']})
+            for term, score in doc['terms'].items():
+                # Flat [doc, score, doc, score, ...] lists keep the file small
+                postings.setdefault(term, []).extend((number, score))
+        
+        index = {
+            'version': INDEX_VERSION,
+            'weights': FIELD_WEIGHTS,
+            'docs': docs,
+            'index': {term: postings[term] for term in sorted(postings)}
+        }
+        directory = os.path.dirname(self.index_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # dumps runs in the C encoder; dump to a file would encode chunk by chunk in Python
+        with atomic_open(self.index_file) as f:
+            f.write(json.dumps(index, ensure_ascii=False, separators=(',', ':')))
+    
+    def _save_state(self):
+        try:
+            with atomic_open(self.state_file) as f:
+                f.write(json.dumps({'version': INDEX_VERSION, 'docs': self._docs},
+                                   ensure_ascii=False, separators=(',', ':')))
+        except OSError as e:
+            print(f"Error saving search index state: {e}")
+    
+    def __len__(self) -> int:
+        return len(self._docs)
+    
+    def summary(self) -> str:
+        """Return a one-line added/updated/removed summary."""
+        return (f"Search index: {len(self._docs)} notes, {len(self.added)} added, "
+                f"{len(self.updated)} updated, {len(self.removed)} removed")
\ No newline at end of file
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Snapshot history of scraped pages.
+Raw HTML and extracted records are stored once per distinct content as
+zlib-compressed blobs named by their SHA-256, and each run writes a small
+manifest pointing at the blobs of the pages it saw.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional
+
+from page_manifest import atomic_open
+
+
+# Format of run ids; they sort in chronological order
+RUN_ID_FORMAT = '%Y%m%dT%H%M%S%fZ'
+
+
+def _record_blob(record: Dict[str, Any]) -> bytes:
+    """Serialize a record without its scrape timestamp so unchanged pages share a blob."""
+    content = {key: value for key, value in record.items() if key != 'scraped_at'}
+    return json.dumps(content, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _parse_when(when) -> datetime:
+    """
+    Accept a datetime or an ISO 8601 string and return an aware UTC datetime.
+    
+    A bare date means the end of that day, so "on 2024-05-01" includes that day's runs.
+    """
+    if isinstance(when, str):
+        date_only = len(when.strip()) == 10
+        when = datetime.fromisoformat(when.strip())
+        if date_only:
+            when += timedelta(days=1, microseconds=-1)
+    if when.tzinfo is None:
+        when = when.astimezone()
+    return when.astimezone(timezone.utc)
+
+
+class SnapshotRun:
+    """Collects the pages of one scrape run and writes its manifest."""
+    
+    def __init__(self, store: 'SnapshotStore', run_id: str):
+        self.store = store
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self._pages: Dict[str, Dict[str, Any]] = {}
+    
+    def add(self, source: str, url: str, html: Optional[bytes], record: Dict[str, Any]):
+        """
+        Snapshot one scraped page.
+        
+        Args:
+            source: Name of the source the page was scraped for; sources
+                sharing a URL each keep their own entry
+            url: URL of the page
+            html: Raw body as downloaded, or None if it was not downloaded (e.g. a 304)
+            record: Record extracted by scrape_website
+        """
+        entry = {
+            'url': url,
+            'html': self.store.put(html) if html is not None else None,
+            'record': self.store.put(_record_blob(record)),
+            'scraped_at': record.get('scraped_at')
+        }
+        with self._lock:
+            self._pages[source] = entry
+    
+    def save(self):
+        """Write the run manifest (nothing is written for a run without pages)."""
+        with self._lock:
+            if not self._pages:
+                return
+            manifest = {'run': self.run_id, 'pages': self._pages}
+        path = self.store._manifest_path(self.run_id)
+        with atomic_open(path) as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+        print(f"Snapshot {self.run_id}: {len(manifest['pages'])} pages")
+
+
+class SnapshotStore:
+    """Content-addressed blob store plus per-run manifests under one directory."""
+    
+    def __init__(self, root: str = '.snapshots'):
+        """
+        Args:
+            root: Directory holding the blobs/ and runs/ subdirectories
+        """
+        self.root = root
+        self.blob_dir = os.path.join(root, 'blobs')
+        self.run_dir = os.path.join(root, 'runs')
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.run_dir, exist_ok=True)
+        self._manifests: Dict[str, Dict[str, Any]] = {}
+    
+    def start_run(self, started_at: Optional[datetime] = None) -> SnapshotRun:
+        """Begin a new run, identified by its start time."""
+        started_at = started_at or datetime.now(timezone.utc)
+        return SnapshotRun(self, started_at.astimezone(timezone.utc).strftime(RUN_ID_FORMAT))
+    
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], digest[2:])
+    
+    def _manifest_path(self, run_id: str) -> str:
+        return os.path.join(self.run_dir, f'{run_id}.json')
+    
+    def put(self, data: bytes) -> str:
+        """Store data compressed unless identical content is already stored, and return its hash."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            return digest
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(zlib.compress(data, 9))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest
+    
+    def get(self, digest: str) -> bytes:
+        """Return the content of a blob."""
+        with open(self._blob_path(digest), 'rb') as f:
+            return zlib.decompress(f.read())
+    
+    def runs(self) -> List[str]:
+        """Return the ids of all saved runs, oldest first."""
+        return sorted(name[:-len('.json')] for name in os.listdir(self.run_dir) if name.endswith('.json'))
+    
+    def manifest(self, run_id: str) -> Dict[str, Any]:
+        """Return the manifest of a run."""
+        if run_id not in self._manifests:
+            with open(self._manifest_path(run_id), 'r', encoding='utf-8') as f:
+                self._manifests[run_id] = json.load(f)
+        return self._manifests[run_id]
+    
+    def _entry_at(self, source: str, when, field: str) -> Optional[Dict[str, Any]]:
+        """Return the newest manifest entry for source with field set, from runs started at or before when."""
+        cutoff = _parse_when(when).strftime(RUN_ID_FORMAT)
+        runs = self.runs()
+        for run_id in reversed(runs[:bisect.bisect_right(runs, cutoff)]):
+            entry = self.manifest(run_id)['pages'].get(source)
+            if entry and entry.get(field):
+                return entry
+        return None
+    
+    def record_at(self, source: str, when) -> Optional[Dict[str, Any]]:
+        """
+        Return the record a source had at a point in time.
+        
+        Args:
+            source: Name of the source
+            when: datetime or ISO 8601 string; naive values are local time
+        
+        Returns:
+            The record from the latest run at or before when, or None
+        
+        Raises:
+            ValueError: If when is a string that is not an ISO 8601 date
+        """
+        entry = self._entry_at(source, when, 'record')
+        if entry is None:
+            return None
+        record = json.loads(self.get(entry['record']))
+        record['scraped_at'] = entry.get('scraped_at')
+        return record
+    
+    def html_at(self, source: str, when) -> Optional[str]:
+        """Return the raw HTML of source as last downloaded at or before when, or None."""
+        entry = self._entry_at(source, when, 'html')
+        if entry is None:
+            return None
+        return self.get(entry['html']).decode('utf-8', errors='replace')
+    
+    def diff(self, run_a: str, run_b: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Compare the pages of two runs.
+        
+        Pages are compared by record hash, so only changed pages are loaded
+        to list the fields that differ.
+        
+        Returns:
+            Mapping of source name to {'status': 'added'|'removed'|'changed', 'fields': [...]}
+            for every page that is not identical in both runs
+        
+        Raises:
+            OSError: If either run has no manifest
+        """
+        pages_a = self.manifest(run_a)['pages']
+        pages_b = self.manifest(run_b)['pages']
+        changes = {}
+        for source in sorted(set(pages_a) | set(pages_b)):
+            if source not in pages_a:
+                changes[source] = {'status': 'added', 'fields': []}
+            elif source not in pages_b:
+                changes[source] = {'status': 'removed', 'fields': []}
+            elif pages_a[source]['record'] != pages_b[source]['record']:
+                old = json.loads(self.get(pages_a[source]['record']))
+                new = json.loads(self.get(pages_b[source]['record']))
+                fields = sorted(key for key in set(old) | set(new) if old.get(key) != new.get(key))
+                changes[source] = {'status': 'changed', 'fields': fields}
+        return changes
+    
+    def prune(self, max_age_days: float):
+        """Delete runs older than max_age_days, then blobs no remaining run refers to."""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).strftime(RUN_ID_FORMAT)
+        for run_id in self.runs():
+            if run_id < cutoff:
+                os.remove(self._manifest_path(run_id))
+                self._manifests.pop(run_id, None)
+        
+        referenced = set()
+        for run_id in self.runs():
+            for entry in self.manifest(run_id)['pages'].values():
+                referenced.update(digest for digest in (entry['html'], entry['record']) if digest)
+        
+        removed = 0
+        for prefix in os.listdir(self.blob_dir):
+            directory = os.path.join(self.blob_dir, prefix)
+            for name in os.listdir(directory):
+                if prefix + name not in referenced:
+                    os.remove(os.path.join(directory, name))
+                    removed += 1
+        print(f"Pruned snapshots older than {max_age_days:g} days ({removed} blobs removed)")
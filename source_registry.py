@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Source registry for the profile scraper.
+Sources and their per-source settings are read from a JSON file instead of
+being hard-coded, and can be split into shards by a stable hash of their
+names so several processes or machines each scrape their own slice.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+from extractors import EXTRACTORS
+
+
+# Registry shipped next to the scraper
+DEFAULT_REGISTRY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sources.json')
+
+SOURCE_SETTINGS = {'url', 'interval', 'extractor', 'fallback', 'crawl', 'notice'}
+
+
+class Source:
+    """One registered source and its settings."""
+    
+    def __init__(self, name: str, url: str, interval: Optional[float] = None,
+                 extractor: Optional[str] = None, fallback: Optional[Dict[str, Any]] = None,
+                 crawl: bool = False, notice: Optional[str] = None):
+        """
+        Args:
+            name: Source name, used for results and note file names
+            url: URL scraped for the source
+            interval: Seconds between scrapes in watch mode; --interval by default
+            extractor: Extraction backend for this source; --extractor by default
+            fallback: Record used when the source cannot be scraped
+            crawl: Follow same-site links from the source when --crawl is given
+            notice: Message printed before the source is scraped
+        """
+        self.name = name
+        self.url = url
+        self.interval = interval
+        self.extractor = extractor
+        self.fallback = fallback
+        self.crawl = crawl
+        self.notice = notice
+    
+    @classmethod
+    def from_dict(cls, name: str, settings: Dict[str, Any]) -> 'Source':
+        """
+        Build a source from its registry entry.
+        
+        Raises:
+            ValueError: If a setting is unknown, missing or has the wrong type
+        """
+        if not isinstance(settings, dict):
+            raise ValueError(f"source '{name}' must be an object")
+        unknown = set(settings) - SOURCE_SETTINGS
+        if unknown:
+            raise ValueError(f"source '{name}' has unknown settings: {', '.join(sorted(unknown))}")
+        if not isinstance(settings.get('url'), str) or not settings['url']:
+            raise ValueError(f"source '{name}' needs a url")
+        interval = settings.get('interval')
+        if interval is not None and (not isinstance(interval, (int, float)) or interval <= 0):
+            raise ValueError(f"source '{name}' interval must be a positive number of seconds")
+        extractor = settings.get('extractor')
+        if extractor is not None and extractor not in EXTRACTORS:
+            raise ValueError(f"source '{name}' has unknown extractor '{extractor}' "
+                             f"(choose from {', '.join(EXTRACTORS)})")
+        fallback = settings.get('fallback')
+        if fallback is not None and not isinstance(fallback, dict):
+            raise ValueError(f"source '{name}' fallback must be an object")
+        return cls(name, settings['url'], interval=interval, extractor=extractor, fallback=fallback,
+                   crawl=bool(settings.get('crawl', False)), notice=settings.get('notice'))
+
+
+def load_sources(registry_file: str = DEFAULT_REGISTRY) -> Dict[str, Source]:
+    """
+    Read the registry, keeping the order sources are listed in.
+    
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not a valid registry
+    """
+    with open(registry_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get('sources'), dict):
+        raise ValueError(f"{registry_file} must contain a \"sources\" object")
+    return {name: Source.from_dict(name, settings) for name, settings in data['sources'].items()}
+
+
+def shard_of(name: str, shard_count: int) -> int:
+    """
+    Return the shard a source belongs to.
+    
+    The shard depends only on the source name and the number of shards, so
+    every process agrees on the split without coordinating.
+    """
+    digest = hashlib.sha256(name.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % shard_count
+
+
+def select_shard(sources: Dict[str, Source], shard: int, shard_count: int) -> Dict[str, Source]:
+    """Return the sources of one shard, in registry order."""
+    return {name: source for name, source in sources.items() if shard_of(name, shard_count) == shard}
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """
+    Parse an INDEX/COUNT shard specification such as '0/4'.
+    
+    Raises:
+        ValueError: If the specification is malformed or out of range
+    """
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f"shard must look like INDEX/COUNT, not '{value}'")
+    if count < 1:
+        raise ValueError("shard count must be at least 1")
+    if not 0 <= index < count:
+        raise ValueError(f"shard index must be between 0 and {count - 1}")
+    return index, count
+
+
+def shard_file(path: str, shard: int, shard_count: int) -> str:
+    """Return the per-shard variant of a file name, e.g. profile_data.shard-0-of-4.json."""
+    root, ext = os.path.splitext(path)
+    return f'{root}.shard-{shard}-of-{shard_count}{ext}'
+
+
+def merge_partials(partials: Iterable[Dict[str, Any]],
+                   sources: Dict[str, Source]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Merge the results of several shards into one results dict.
+    
+    Registered sources come first in registry order, with None for sources
+    no shard produced; other sources (e.g. crawled pages) follow in the
+    order they appear. A record from a later partial replaces an earlier
+    one, but a source is never reset to None once a partial had a record.
+    """
+    results: Dict[str, Optional[Dict[str, Any]]] = {name: None for name in sources}
+    for partial in partials:
+        for name, data in partial.items():
+            if data is not None or name not in results:
+                results[name] = data
+    return results
\ No newline at end of file
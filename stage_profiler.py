@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Per-stage profiling for the profile scraper.
+Each stage of a run (every scrape_website call, save_results, render_pages,
+create_markdown_report and each Jekyll writer) gets its own CPU profile and
+tracemalloc snapshots, so fetching, parsing and rendering no longer show up
+mixed in one profile. The call stacks of running stages are also sampled
+and written in the collapsed format flamegraph tools read.
+"""
+
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple
+
+# Seconds between stack samples; a busy thread only yields the GIL every 5 ms,
+# so CPU-bound stages are sampled at about 200 Hz
+SAMPLE_INTERVAL = 0.001
+
+# Allocation sites listed per stage in the report
+TOP_ALLOCATIONS = 10
+
+# Memory taken by the snapshots themselves and by reading the profiles is not the stage's
+_TRACE_FILTERS = (tracemalloc.Filter(False, tracemalloc.__file__),
+                  tracemalloc.Filter(False, pstats.__file__),
+                  tracemalloc.Filter(False, __file__))
+
+_UNSAFE_RE = re.compile(r'[^\w.-]')
+
+
+class StageStats:
+    """Profile of every call of one stage, added up."""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.0
+        # Highest traced memory a call reached above what was allocated when it started
+        self.peak = 0
+        # Bytes allocated by the calls and still held when they returned
+        self.net = 0
+        self.calls: List[Tuple[Optional[str], float, int]] = []
+        self.allocations: Dict[str, List[int]] = {}
+        self.samples: Counter = Counter()
+        self.cpu: Optional[pstats.Stats] = None
+        # Calls run inside or alongside another stage, whose CPU profile has them
+        self.unprofiled = 0
+    
+    def top_allocations(self, count: int = TOP_ALLOCATIONS) -> List[Tuple[str, int, int]]:
+        """Return the (site, bytes, blocks) still held by the calls, largest first."""
+        sites = sorted(self.allocations.items(), key=lambda item: item[1][0], reverse=True)
+        return [(site, size, blocks) for site, (size, blocks) in sites[:count] if size > 0]
+
+
+class StageProfiler:
+    """CPU profiles, allocation snapshots and stack samples of the stages of a run."""
+    
+    def __init__(self, output_dir: str = 'profile', interval: float = SAMPLE_INTERVAL,
+                 top: int = TOP_ALLOCATIONS):
+        """
+        Args:
+            output_dir: Directory the profiles are written to
+            interval: Seconds between stack samples
+            top: Allocation sites listed per stage in the report
+        """
+        self.output_dir = output_dir
+        self.interval = interval
+        self.top = top
+        self.stages: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+        # Stages each thread is in, innermost last
+        self._active: Dict[int, List[str]] = {}
+        self._labels: Dict[Any, str] = {}
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._tracing = False
+    
+    def start(self):
+        """Start tracing allocations and sampling the stacks of running stages."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample, name='stage-profiler', daemon=True)
+        self._sampler.start()
+    
+    def stop(self):
+        """Stop sampling, and tracing if start began it."""
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+    
+    def close(self) -> List[str]:
+        """Stop profiling and write the profiles, returning the paths written."""
+        self.stop()
+        return self.write()
+    
+    def _stats(self, name: str) -> StageStats:
+        with self._lock:
+            if name not in self.stages:
+                self.stages[name] = StageStats(name)
+            return self.stages[name]
+    
+    @contextmanager
+    def stage(self, name: str, label: Optional[str] = None):
+        """
+        Profile the enclosed block as one call of stage name.
+        
+        Args:
+            name: Stage the call is added to
+            label: What the call worked on (e.g. a URL), listed with its timing
+        """
+        stats = self._stats(name)
+        thread = threading.get_ident()
+        with self._lock:
+            nested = bool(self._active.get(thread))
+        
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            before = tracemalloc.take_snapshot().filter_traces(_TRACE_FILTERS)
+            start_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        profile = None
+        if not nested:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Python 3.12+ allows one profiler at a time, taken by a concurrent stage
+                profile = None
+        with self._lock:
+            self._active.setdefault(thread, []).append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                stack = self._active[thread]
+                stack.pop()
+                if not stack:
+                    del self._active[thread]
+            if profile is not None:
+                profile.disable()
+            peak = net = 0
+            allocations = []
+            if tracing and tracemalloc.is_tracing():
+                peak = max(0, tracemalloc.get_traced_memory()[1] - start_memory)
+                after = tracemalloc.take_snapshot().filter_traces(_TRACE_FILTERS)
+                allocations = [(str(diff.traceback[0]), diff.size_diff, diff.count_diff)
+                               for diff in after.compare_to(before, 'lineno') if diff.size_diff]
+                net = sum(size for _, size, _ in allocations)
+            cpu = pstats.Stats(profile) if profile is not None else None
+            
+            with self._lock:
+                stats.seconds += seconds
+                stats.peak = max(stats.peak, peak)
+                stats.net += net
+                stats.calls.append((label, seconds, peak))
+                for site, size, blocks in allocations:
+                    totals = stats.allocations.setdefault(site, [0, 0])
+                    totals[0] += size
+                    totals[1] += blocks
+                if cpu is None:
+                    stats.unprofiled += 1
+                elif stats.cpu is None:
+                    stats.cpu = cpu
+                else:
+                    stats.cpu.add(cpu)
+    
+    def _sample(self):
+        """Count the current stack of every thread in a stage until stopped."""
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                active = {thread: stack[-1] for thread, stack in self._active.items()}
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread, name in active.items():
+                frame = frames.get(thread)
+                if frame is not None:
+                    stack = self._collapse(frame)
+                    with self._lock:
+                        self.stages[name].samples[stack] += 1
+    
+    def _collapse(self, frame) -> str:
+        """Return the stack of frame, outermost first, as semicolon-separated frames."""
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                # Semicolons separate frames and the last space separates the count
+                label = f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+                label = self._labels[code] = label.replace(';', ':')
+            names.append(label)
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+    
+    def write(self) -> List[str]:
+        """
+        Write the profiles to output_dir.
+        
+        Each stage gets STAGE.pstats (for pstats or snakeviz) and
+        STAGE.collapsed; profile.collapsed holds the samples of every stage
+        under a root frame named after it, and allocations.txt the report.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        paths = []
+        combined = []
+        for name, stats in self.stages.items():
+            base = os.path.join(self.output_dir, _UNSAFE_RE.sub('_', name))
+            if stats.cpu is not None:
+                stats.cpu.dump_stats(base + '.pstats')
+                paths.append(base + '.pstats')
+            lines = [f'{stack} {count}\n' for stack, count in sorted(stats.samples.items())]
+            with open(base + '.collapsed', 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+            paths.append(base + '.collapsed')
+            combined.extend(f'{name};{line}' for line in lines)
+        
+        for file_name, text in (('profile.collapsed', ''.join(combined)), ('allocations.txt', self.report())):
+            path = os.path.join(self.output_dir, file_name)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            paths.append(path)
+        return paths
+    
+    def table(self) -> str:
+        """Return one line per stage with its calls, time, memory and samples."""
+        lines = [f"{'Stage':40} {'Calls':>6} {'Seconds':>9} {'Peak KiB':>10} {'Net KiB':>10} {'Samples':>8}"]
+        for name, stats in self.stages.items():
+            lines.append(f'{name:40} {len(stats.calls):6} {stats.seconds:9.3f} {stats.peak / 1024:10.1f} '
+                         f'{stats.net / 1024:10.1f} {sum(stats.samples.values()):8}')
+        return '\n'.join(lines)
+    
+    def report(self) -> str:
+        """Return the stage table followed by each stage's top allocations and calls."""
+        sections = [self.table()]
+        for name, stats in self.stages.items():
+            lines = [f'{name}: top allocations still held']
+            top = stats.top_allocations(self.top)
+            lines.extend(f'  {size / 1024:10.1f} KiB {blocks:8} blocks  {site}' for site, size, blocks in top)
+            if not top:
+                lines.append('  (none)')
+            if stats.unprofiled:
+                lines.append(f'  {stats.unprofiled} calls ran inside or alongside another stage '
+                             'and are in its CPU profile')
+            labelled = [call for call in stats.calls if call[0] is not None]
+            if labelled:
+                lines.append(f'{name}: calls')
+                lines.extend(f'  {seconds:9.3f} s {peak / 1024:10.1f} KiB peak  {label}'
+                             for label, seconds, peak in labelled)
+            sections.append('\n'.join(lines))
+        return '\n\n'.join(sections) + '\n'
+    
+    def summary(self) -> str:
+        """Return the stage table and where the profiles were written."""
+        return (f"{self.table()}\nProfiles of {len(self.stages)} stages written to {self.output_dir} "
+                f"(profile.collapsed for flame graphs, allocations.txt for the top allocations)")
\ No newline at end of file
@@ -8,11 +8,22 @@ import unittest
 from unittest.mock import Mock, patch
 import sys
 import os
+from datetime import datetime
 
 # Add parent directory to path to import the scraper
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from scrape_profile import ProfileScraper
+from response_cache import ResponseCache
+from extractors import get_extractor
+from crawler import SiteCrawler, normalize_url
+from scrape_metrics import ScrapeMetrics
+from host_health import HostHealth
+from result_store import ResultStore
+from snapshots import SnapshotStore
+from link_graph import LinkGraph
+from scrape_daemon import ScrapeDaemon
+from request_scheduler import ScheduledSession, parse_retry_after
 
 
 class TestProfileScraper(unittest.TestCase):
@@ -218,5 +229,1837 @@ class TestProfileScraper(unittest.TestCase):
             shutil.rmtree(temp_dir)
 
 
+class TestIncrementalJekyllPages(unittest.TestCase):
+    """Test cases for incremental Jekyll page generation."""
+    
+    def setUp(self):
+        """Run each test in a temporary directory."""
+        import tempfile
+        
+        self.scraper = ProfileScraper()
+        self.temp_dir = tempfile.mkdtemp()
+        self.original_dir = os.getcwd()
+        os.chdir(self.temp_dir)
+    
+    def tearDown(self):
+        """Remove the temporary directory."""
+        import shutil
+        
+        os.chdir(self.original_dir)
+        shutil.rmtree(self.temp_dir)
+    
+    def make_results(self, **contents):
+        """Build results with one source per keyword argument."""
+        return {
+            name: {
+                'url': f'https://{name}.com',
+                'title': name.title(),
+                'description': f'{name} description',
+                'content': content,
+                'scraped_at': datetime.now().isoformat()
+            }
+            for name, content in contents.items()
+        }
+    
+    def test_unchanged_pages_are_skipped(self):
+        """Test that a second run with the same data rewrites nothing."""
+        self.scraper.create_jekyll_pages(self.make_results(alpha='A', beta='B'), incremental=True)
+        mtimes = {path: os.stat(path).st_mtime_ns
+                  for path in ('profile-data.md', 'about.md', '_notes/alpha.md', '_notes/beta.md')}
+        
+        # Only the volatile scraped_at timestamp differs
+        self.scraper.create_jekyll_pages(self.make_results(alpha='A', beta='B'), incremental=True)
+        
+        for path, mtime in mtimes.items():
+            self.assertEqual(os.stat(path).st_mtime_ns, mtime, path)
+    
+    def test_only_changed_pages_are_written(self):
+        """Test that changing one source rewrites only the pages it feeds."""
+        from page_manifest import PageManifest
+        
+        self.scraper.create_jekyll_pages(self.make_results(alpha='A', beta='B'), incremental=True)
+        self.scraper.create_jekyll_pages(self.make_results(alpha='A', beta='B2'), incremental=True)
+        
+        with open('_notes/beta.md') as f:
+            self.assertIn('B2', f.read())
+        
+        manifest = PageManifest()
+        self.assertTrue(manifest.is_current('_notes/alpha.md', ['alpha', {
+            'title': 'Alpha', 'description': 'alpha description',
+            'url': 'https://alpha.com', 'content': 'A'}]))
+    
+    def test_removed_sources_are_deleted(self):
+        """Test that notes of removed sources are deleted and failed ones kept."""
+        with open('_notes_keep.md', 'w') as f:
+            f.write('unrelated')
+        self.scraper.create_jekyll_pages(self.make_results(alpha='A', beta='B', gamma='C'),
+                                         incremental=True)
+        
+        results = self.make_results(alpha='A')
+        results['beta'] = None
+        self.scraper.create_jekyll_pages(results, incremental=True)
+        
+        self.assertTrue(os.path.exists('_notes/alpha.md'))
+        self.assertTrue(os.path.exists('_notes/beta.md'))
+        self.assertFalse(os.path.exists('_notes/gamma.md'))
+        self.assertTrue(os.path.exists('_notes_keep.md'))
+
+
+class TestNoteOutput(unittest.TestCase):
+    """Test cases for note slugs, nested note directories and stale note removal."""
+    
+    def setUp(self):
+        """Run each test in a temporary directory."""
+        import tempfile
+        
+        self.temp_dir = tempfile.mkdtemp()
+        self.original_dir = os.getcwd()
+        os.chdir(self.temp_dir)
+    
+    def tearDown(self):
+        """Remove the temporary directory."""
+        import shutil
+        
+        os.chdir(self.original_dir)
+        shutil.rmtree(self.temp_dir)
+    
+    def make_results(self, *names):
+        """Build results with one source per name."""
+        return {name: {'url': f'https://example.com/{i}', 'title': name, 'content': name}
+                for i, name in enumerate(names)}
+    
+    def test_colliding_names_get_distinct_notes(self):
+        """Test that sources whose names slugify alike no longer overwrite each other's note."""
+        from page_renderer import note_slugs
+        
+        slugs = note_slugs(['a.b', 'a b', 'A/B', 'c', 'C++ Notes'])
+        self.assertEqual(slugs['a.b'], 'a-b')
+        self.assertEqual(slugs['c'], 'c')
+        self.assertEqual(slugs['C++ Notes'], 'c++-notes')
+        self.assertEqual(len(set(slugs.values())), 5)
+        
+        ProfileScraper().create_jekyll_pages(self.make_results('a.b', 'a b'))
+        self.assertEqual(len(os.listdir('_notes')), 2)
+    
+    def test_existing_notes_keep_their_slugs(self):
+        """Test that a colliding source added later gets the hashed slug, not the published one."""
+        from page_renderer import note_slugs
+        
+        ProfileScraper().create_jekyll_pages(self.make_results('b c'))
+        self.assertTrue(os.path.exists(os.path.join('_notes', 'b-c.md')))
+        
+        # 'B/C' sorts and is listed first, but 'b c' already owns the slug
+        rendered = ProfileScraper().render_pages(self.make_results('B/C', 'b c'))
+        ProfileScraper().create_jekyll_pages(self.make_results('B/C', 'b c'), rendered=rendered)
+        self.assertEqual(rendered.slugs['b c'], 'b-c')
+        self.assertTrue(rendered.slugs['B/C'].startswith('b-c-'))
+        self.assertEqual(ProfileScraper().render_pages(self.make_results('B/C', 'b c')).slugs, rendered.slugs)
+        
+        # A slug that no longer derives from the name is not kept
+        self.assertEqual(note_slugs(['C++ Notes'], {'C++ Notes': 'c---notes'}), {'C++ Notes': 'c++-notes'})
+    
+    def test_nested_notes_keep_their_urls(self):
+        """Test that notes spread over subdirectories keep /notes/SLUG/ URLs."""
+        import json
+        
+        scraper = ProfileScraper(note_subdirs=True)
+        rendered = scraper.render_pages(self.make_results('Alpha'))
+        scraper.create_jekyll_pages(self.make_results('Alpha'), rendered=rendered)
+        
+        path, text = rendered.notes['Alpha']
+        self.assertEqual(os.path.dirname(os.path.dirname(path)), '_notes')
+        self.assertTrue(os.path.exists(path))
+        self.assertIn('permalink: /notes/alpha/\n', text)
+        with open(os.path.join('assets', 'search-index.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['docs'][0]['url'], '/notes/alpha/')
+    
+    def test_stale_notes_are_removed_in_full_builds(self):
+        """Test that full builds delete notes of removed sources, including emptied subdirectories."""
+        os.makedirs('_notes')
+        with open(os.path.join('_notes', 'keep.md'), 'w') as f:
+            f.write('unrelated')
+        
+        ProfileScraper(note_subdirs=True).create_jekyll_pages(self.make_results('alpha', 'beta'))
+        ProfileScraper(note_subdirs=True).create_jekyll_pages(self.make_results('alpha'))
+        self.assertEqual(sum(len(files) for _, _, files in os.walk('_notes')), 2)
+        
+        # Switching back to flat notes moves them and removes the emptied subdirectories
+        ProfileScraper().create_jekyll_pages(self.make_results('alpha'))
+        self.assertEqual(sorted(os.listdir('_notes')), ['alpha.md', 'keep.md'])
+
+
+class TestFingerprints(unittest.TestCase):
+    """Test cases for content fingerprints, minor change detection and near-duplicate grouping."""
+    
+    def setUp(self):
+        """Set up a result store in a temporary directory."""
+        import tempfile
+        
+        self.temp_dir = tempfile.mkdtemp()
+        self.store_file = os.path.join(self.temp_dir, 'store.jsonl')
+    
+    def tearDown(self):
+        """Remove the temporary directory."""
+        import shutil
+        
+        shutil.rmtree(self.temp_dir)
+    
+    def page_text(self, seed, footer='Updated 2025-01-01'):
+        """Return 800 words of deterministic page text followed by footer."""
+        import random
+        
+        words = random.Random(seed).choices(['cloud', 'data', 'pipeline', 'azure', 'dotnet', 'profile',
+                                             'service', 'engineer', 'notes', 'backend'], k=800)
+        return ' '.join(f'{word}{i % 37}' for i, word in enumerate(words)) + f' {footer}'
+    
+    def test_simhash_separates_small_and_real_changes(self):
+        """Test that a footer change flips few simhash bits while different pages flip many."""
+        from fingerprints import DEFAULT_MAX_DISTANCE, content_hash, fingerprint, hamming, simhash
+        from scrape_result import ScrapeResult
+        
+        page = self.page_text(1)
+        footer = self.page_text(1, 'Updated 2026-03-04')
+        self.assertNotEqual(content_hash(page), content_hash(footer))
+        self.assertLessEqual(hamming(simhash(page), simhash(footer)), DEFAULT_MAX_DISTANCE)
+        self.assertGreater(hamming(simhash(page), simhash(self.page_text(2))), 4 * DEFAULT_MAX_DISTANCE)
+        
+        record = ScrapeResult.from_dict({'url': 'https://example.com', 'content': page})
+        self.assertEqual(fingerprint(record), fingerprint(record.to_dict()))
+        self.assertNotIn('simhash', record.to_dict())
+    
+    def test_minor_change_keeps_stored_record(self):
+        """Test that a re-scrape with a minor content change keeps and does not re-store the old record."""
+        from result_store import ResultStore
+        
+        versions = iter([self.page_text(1), self.page_text(1, 'Updated 2026-03-04'), self.page_text(3)])
+        
+        def scrape(name, url):
+            return {'url': url, 'title': 'Site', 'content': next(versions), 'scraped_at': 'now'}
+        
+        store = ResultStore(self.store_file)
+        scraper = ProfileScraper(store=store, change_threshold=6)
+        first = scraper.scrape_all({'site': 'https://example.com'}, scrape)['site']
+        second = scraper.scrape_all({'site': 'https://example.com'}, scrape)['site']
+        self.assertEqual(second['content'], first['content'])
+        self.assertEqual(store.garbage, 0)
+        self.assertEqual(scraper.metrics.to_dict()['sources']['https://example.com']['counters']['minor_changes'], 1)
+        
+        third = scraper.scrape_all({'site': 'https://example.com'}, scrape)['site']
+        self.assertEqual(store.get('site')['content'], third['content'])
+        self.assertNotEqual(third['content'], first['content'])
+    
+    def test_one_word_edit_is_kept_by_default(self):
+        """Test that a substantive one-word edit replaces the stored record unless a threshold is given."""
+        from fingerprints import DEFAULT_MAX_DISTANCE, hamming, simhash
+        from result_store import ResultStore
+        from scrape_profile import parse_args
+        
+        page = self.page_text(1)
+        words = page.split()
+        words[400] = 'starbucks'
+        edited = ' '.join(words)
+        self.assertLessEqual(hamming(simhash(page), simhash(edited)), DEFAULT_MAX_DISTANCE)
+        
+        args = parse_args([])
+        self.assertEqual(args.change_threshold, 0)
+        versions = iter([page, edited])
+        
+        def scrape(name, url):
+            return {'url': url, 'title': 'Site', 'content': next(versions), 'scraped_at': 'now'}
+        
+        store = ResultStore(self.store_file)
+        scraper = ProfileScraper(store=store, change_threshold=args.change_threshold)
+        scraper.scrape_all({'site': 'https://example.com'}, scrape)
+        second = scraper.scrape_all({'site': 'https://example.com'}, scrape)['site']
+        self.assertIn('starbucks', second['content'])
+        self.assertIn('starbucks', store.get('site')['content'])
+    
+    def test_near_duplicate_groups(self):
+        """Test that mirrored sources are grouped and distinct ones are not."""
+        from fingerprints import SimhashIndex, near_duplicate_groups, simhash
+        
+        records = {
+            'blog': {'content': self.page_text(1)},
+            'mirror': {'content': self.page_text(1)},
+            'old mirror': {'content': self.page_text(1, 'Updated 2020-01-01')},
+            'other': {'content': self.page_text(2)},
+            'failed': None,
+            'empty': {'content': ''}
+        }
+        self.assertEqual(near_duplicate_groups(records.items()), [['blog', 'mirror', 'old mirror']])
+        
+        index = SimhashIndex(max_distance=0)
+        for name in ('blog', 'old mirror', 'other'):
+            index.add(name, simhash(records[name]['content']))
+        self.assertEqual(index.near(simhash(self.page_text(1))), {'blog'})
+        self.assertEqual(index.groups(), [])
+
+
+class TestSearchIndex(unittest.TestCase):
+    """Test cases for the prebuilt notes search index."""
+    
+    def setUp(self):
+        """Run each test in a temporary directory."""
+        import tempfile
+        
+        self.temp_dir = tempfile.mkdtemp()
+        self.original_dir = os.getcwd()
+        os.chdir(self.temp_dir)
+    
+    def tearDown(self):
+        """Remove the temporary directory."""
+        import shutil
+        
+        os.chdir(self.original_dir)
+        shutil.rmtree(self.temp_dir)
+    
+    @staticmethod
+    def load_index():
+        import json
+        
+        with open(os.path.join('assets', 'search-index.json'), encoding='utf-8') as f:
+            return json.load(f)
+    
+    def test_fields_are_weighted(self):
+        """Test that terms score by field weight and postings point at the right notes."""
+        from search_index import SearchIndex, FIELD_WEIGHTS
+        
+        SearchIndex().update({
+            'a': {'url': '/notes/a/', 'title': 'Azure Notes', 'description': 'Cloud', 'content': 'azure azure'},
+            'b': {'url': '/notes/b/', 'title': 'Other', 'description': 'The azure cloud', 'content': ''}
+        })
+        index = self.load_index()
+        
+        self.assertEqual([doc['url'] for doc in index['docs']], ['/notes/a/', '/notes/b/'])
+        self.assertEqual(index['index']['azure'],
+                         [0, FIELD_WEIGHTS['title'] + 2 * FIELD_WEIGHTS['content'],
+                          1, FIELD_WEIGHTS['description']])
+        self.assertNotIn('the', index['index'])
+    
+    def test_only_changed_notes_are_retokenized(self):
+        """Test that an update re-indexes changed notes, keeps failed ones and drops removed ones."""
+        from unittest.mock import patch
+        from search_index import SearchIndex, term_scores
+        
+        notes = {name: {'url': f'/notes/{name}/', 'title': name, 'description': '', 'content': f'{name} text'}
+                 for name in ('alpha', 'beta', 'gamma')}
+        SearchIndex().update(notes)
+        
+        notes['beta'] = dict(notes['beta'], content='changed words')
+        notes['gamma'] = None
+        del notes['alpha']
+        with patch('search_index.term_scores', side_effect=term_scores) as scored:
+            index = SearchIndex()
+            self.assertTrue(index.update(notes))
+        
+        self.assertEqual(scored.call_count, 1)
+        self.assertEqual((index.added, index.updated, index.removed), ([], ['beta'], ['alpha']))
+        terms = self.load_index()['index']
+        self.assertIn('changed', terms)
+        self.assertIn('gamma', terms)
+        self.assertNotIn('alpha', terms)
+        self.assertFalse(SearchIndex().update(notes))
+    
+    def test_jekyll_pages_write_index(self):
+        """Test that creating the Jekyll pages indexes every note."""
+        results = {'Example Site': {'url': 'https://example.com', 'title': 'Example',
+                                    'description': 'An example', 'content': 'Searchable words'}}
+        ProfileScraper().create_jekyll_pages(results)
+        
+        index = self.load_index()
+        self.assertEqual(index['docs'][0]['url'], '/notes/example-site/')
+        self.assertEqual(index['index']['searchable'], [0, 1])
+
+
+class TestPageRenderer(unittest.TestCase):
+    """Test cases for the single-pass page renderer."""
+    
+    def test_line_limits(self):
+        """Test that long content is cut at the profile page and note line limits."""
+        from page_renderer import PageRenderer
+        
+        content = '\n'.join(f'line {i}' for i in range(150))
+        rendered = PageRenderer().render({'Site': {'url': 'https://example.com', 'content': content}})
+        _, note = rendered.notes['Site']
+        
+        self.assertIn('line 49\n\n*[Content truncated for brevity]*', rendered.profile_data)
+        self.assertNotIn('line 50', rendered.profile_data)
+        self.assertTrue(note.endswith('line 99\n\n'))
+        self.assertIn('```\nline 0\n', rendered.report)
+    
+    def test_rendered_pages_are_reused(self):
+        """Test that pages rendered once are written by both writers without rendering again."""
+        import tempfile
+        import shutil
+        
+        temp_dir = tempfile.mkdtemp()
+        original_dir = os.getcwd()
+        try:
+            os.chdir(temp_dir)
+            scraper = ProfileScraper()
+            results = {'Site': {'url': 'https://example.com', 'title': 'Site', 'content': 'Hello'}}
+            rendered = scraper.render_pages(results)
+            with patch.object(scraper.renderer, 'render') as mock_render:
+                scraper.create_markdown_report(results, rendered=rendered)
+                scraper.create_jekyll_pages(results, rendered=rendered)
+                mock_render.assert_not_called()
+            
+            with open('_notes/site.md', encoding='utf-8') as f:
+                self.assertEqual(f.read(), rendered.notes['Site'][1])
+        finally:
+            os.chdir(original_dir)
+            shutil.rmtree(temp_dir)
+
+
+class TestScheduledSession(unittest.TestCase):
+    """Test cases for the rate-limit-aware request scheduler."""
+    
+    def make_session(self, responses, **kwargs):
+        """Build a session whose underlying requests return responses in turn."""
+        session = ScheduledSession(sleep=self.sleeps.append, **kwargs)
+        patcher = patch('requests.Session.request', side_effect=responses)
+        self.request = patcher.start()
+        self.addCleanup(patcher.stop)
+        return session
+    
+    def setUp(self):
+        """Record sleeps instead of waiting."""
+        self.sleeps = []
+    
+    def test_retry_after_is_honored(self):
+        """Test that a 429 with Retry-After blocks the host and the GET is retried."""
+        throttled = Mock(status_code=429, headers={'Retry-After': '7'})
+        ok = Mock(status_code=200, headers={})
+        session = self.make_session([throttled, ok], rate=0)
+        
+        response = session.get('https://a.example.com/page')
+        
+        self.assertIs(response, ok)
+        self.assertEqual(self.request.call_count, 2)
+        self.assertEqual(len(self.sleeps), 1)
+        self.assertAlmostEqual(self.sleeps[0], 7, delta=0.5)
+    
+    def test_backoff_and_retry_limit(self):
+        """Test jittered exponential backoff and giving up after max_retries."""
+        unavailable = Mock(status_code=503, headers={})
+        session = self.make_session([unavailable] * 3, rate=0, max_retries=2,
+                                    backoff_base=1.0)
+        
+        response = session.get('https://a.example.com/page')
+        
+        self.assertIs(response, unavailable)
+        self.assertEqual(self.request.call_count, 3)
+        self.assertLessEqual(self.sleeps[0], 1.0)
+        self.assertLessEqual(self.sleeps[1], 2.0)
+    
+    def test_non_idempotent_requests_are_not_retried(self):
+        """Test that a throttled POST is returned as is."""
+        throttled = Mock(status_code=429, headers={})
+        session = self.make_session([throttled], rate=0)
+        
+        self.assertIs(session.post('https://a.example.com/form'), throttled)
+        self.assertEqual(self.sleeps, [])
+    
+    def test_throttling_is_per_host(self):
+        """Test that a blocked host does not delay requests to other hosts."""
+        session = self.make_session([Mock(status_code=200, headers={})] * 3, rate=1, burst=1)
+        session._block('a.example.com', 60)
+        
+        session.get('https://b.example.com/')
+        self.assertEqual(self.sleeps, [])
+        
+        session.get('https://b.example.com/')
+        self.assertEqual(len(self.sleeps), 1)
+        self.assertLessEqual(self.sleeps[0], 1.0)
+        
+        session.get('https://a.example.com/')
+        self.assertGreater(self.sleeps[-1], 50)
+    
+    def test_parse_retry_after(self):
+        """Test delta-seconds, HTTP-date and malformed Retry-After values."""
+        from email.utils import format_datetime
+        from datetime import timedelta, timezone
+        
+        future = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+        self.assertEqual(parse_retry_after('120'), 120)
+        self.assertAlmostEqual(parse_retry_after(future), 30, delta=2)
+        self.assertIsNone(parse_retry_after('soon'))
+
+
+class TestHostHealth(unittest.TestCase):
+    """Test cases for adaptive timeouts, hedged requests and the circuit breaker."""
+    
+    def setUp(self):
+        """Set up host health backed by a temporary file."""
+        import tempfile
+        
+        self.temp_dir = tempfile.mkdtemp()
+        self.health_file = os.path.join(self.temp_dir, 'health.json')
+    
+    def tearDown(self):
+        """Remove the temporary directory."""
+        import shutil
+        
+        shutil.rmtree(self.temp_dir)
+    
+    def test_timeouts_adapt_to_latency_history(self):
+        """Test that timeouts follow observed latencies and persist across runs."""
+        health = HostHealth(self.health_file, min_samples=5)
+        self.assertEqual(health.timeout('example.com'), 30.0)
+        self.assertIsNone(health.hedge_delay('example.com'))
+        
+        for seconds in (0.5, 0.6, 0.7, 0.8, 1.0):
+            health.record_success('example.com', seconds)
+        health.save()
+        
+        health = HostHealth(self.health_file, min_samples=5)
+        self.assertEqual(health.timeout('example.com'), 3.0)
+        self.assertEqual(health.hedge_delay('example.com'), 1.0)
+        self.assertEqual(health.timeout('other.example.com'), 30.0)
+    
+    @patch('scrape_profile.requests.Session.get')
+    def test_open_circuit_uses_fallbacks(self, mock_get):
+        """Test that a host that keeps failing is skipped in favor of cached or manual data."""
+        from scrape_profile import scrape_source
+        from scrape_result import ScrapeResult
+        from source_registry import load_sources
+        
+        linkedin = load_sources()['LinkedIn Profile']
+        
+        mock_get.return_value = Mock(status_code=999, headers={}, content=b'')
+        mock_get.return_value.raise_for_status.side_effect = Exception('999')
+        scraper = ProfileScraper(health=HostHealth(self.health_file, failure_threshold=2))
+        for _ in range(2):
+            self.assertIsNone(scraper.scrape_website('https://linkedin.com/in/wforney'))
+        self.assertTrue(scraper.health.is_open('linkedin.com'))
+        
+        mock_get.reset_mock()
+        data = scrape_source(scraper, 'LinkedIn Profile', linkedin.url, linkedin)
+        mock_get.assert_not_called()
+        self.assertEqual(data['title'], linkedin.fallback['title'])
+        
+        cache = ResponseCache(os.path.join(self.temp_dir, 'cache.json'))
+        cache.store('https://linkedin.com/other', {'ETag': '"1"'}, {'title': 'Cached'}, 10)
+        scraper.cache = cache
+        cached = scraper.scrape_website('https://linkedin.com/other')
+        self.assertIsInstance(cached, ScrapeResult)
+        self.assertEqual(cached['title'], 'Cached')
+        mock_get.assert_not_called()
+    
+    def test_cached_fallback_is_not_a_fresh_scrape(self):
+        """Test that a cached record served for an open circuit is not stored, journaled or marked reachable."""
+        from progress_journal import ProgressJournal
+        
+        url = 'https://example.com/page'
+        cache = ResponseCache(os.path.join(self.temp_dir, 'cache.json'))
+        cache.store(url, {'ETag': '"1"'}, {'url': url, 'title': 'Cached'}, 10)
+        health = HostHealth(self.health_file, failure_threshold=1)
+        health.record_failure('example.com')
+        store = ResultStore(os.path.join(self.temp_dir, 'store.jsonl'))
+        graph = LinkGraph(os.path.join(self.temp_dir, 'graph.json'))
+        graph.update('page', url, None)
+        journal = ProgressJournal(os.path.join(self.temp_dir, 'journal.jsonl'))
+        scraper = ProfileScraper(cache=cache, health=health, store=store, link_graph=graph, journal=journal)
+        
+        data = scraper.scrape_all({'page': url})['page']
+        self.assertEqual(data['title'], 'Cached')
+        self.assertTrue(data.stale)
+        self.assertNotIn('page', store)
+        self.assertEqual(len(journal), 0)
+        self.assertIn(url, graph._unreachable)
+    
+    def test_slow_request_is_hedged(self):
+        """Test that a duplicate request is sent when a response is slower than usual."""
+        import threading
+        import time
+        
+        release = threading.Event()
+        slow = Mock(status_code=200)
+        fast = Mock(status_code=200)
+        
+        def get(url, **kwargs):
+            if mock_get.call_count == 1:
+                release.wait(5)
+                return slow
+            return fast
+        
+        scraper = ProfileScraper(health=HostHealth(self.health_file, min_samples=1))
+        scraper.health.record_success('example.com', 0.05)
+        with patch('scrape_profile.requests.Session.get', side_effect=get) as mock_get:
+            response = scraper._get('https://example.com/', {})
+            release.set()
+        
+        self.assertIs(response, fast)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(scraper.metrics.counter('hedges', 'https://example.com/'), 1)
+        for _ in range(50):
+            if slow.close.called:
+                break
+            time.sleep(0.01)
+        slow.close.assert_called_once()
+
+
+class TestScrapeDaemon(unittest.TestCase):
+    """Test cases for watch mode."""
+    
+    def setUp(self):
+        """Set up a daemon with a fake clock and scrape function."""
+        self.now = 0.0
+        self.pages = {'fast': {'title': 'Fast v1'}, 'slow': {'title': 'Slow v1'}}
+        self.scraped = []
+        
+        def scrape_fn(name, url):
+            self.scraped.append(name)
+            page = self.pages[name]
+            return dict(page, scraped_at=str(self.now)) if page else None
+        
+        self.daemon = ScrapeDaemon(ProfileScraper(), {'fast': 'https://a.example.com', 'slow': 'https://b.example.com'},
+                                   scrape_fn, interval=100, intervals={'slow': 1000}, jitter=0,
+                                   clock=lambda: self.now)
+        patcher = patch.object(ScrapeDaemon, '_write_outputs')
+        self.write_outputs = patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_sources_follow_their_own_intervals(self):
+        """Test that each source is re-scraped on its own schedule."""
+        self.assertEqual(self.daemon.poll(), 100)
+        self.assertEqual(self.scraped, ['fast', 'slow'])
+        
+        self.now = 100
+        self.assertEqual(self.daemon.poll(), 100)
+        self.assertEqual(self.scraped, ['fast', 'slow', 'fast'])
+        
+        self.now = 1000
+        self.daemon.poll()
+        self.assertEqual(self.scraped[-2:], ['fast', 'slow'])
+    
+    def test_outputs_rewritten_only_on_change(self):
+        """Test that outputs are regenerated only when content changed and failures keep old data."""
+        self.daemon.poll()
+        self.assertEqual(self.write_outputs.call_count, 1)
+        
+        self.now = 100
+        self.daemon.poll()
+        self.assertEqual(self.write_outputs.call_count, 1)
+        
+        self.pages['fast'] = {'title': 'Fast v2'}
+        self.now = 200
+        self.daemon.poll()
+        self.assertEqual(self.write_outputs.call_count, 2)
+        
+        self.pages['fast'] = None
+        self.now = 300
+        self.daemon.poll()
+        self.assertEqual(self.write_outputs.call_count, 2)
+        self.assertEqual(self.daemon.results['fast']['title'], 'Fast v2')
+    
+    def test_stop_ends_run(self):
+        """Test that stop() (the signal handler) ends the loop after the current cycle."""
+        self.daemon.after_cycle = self.daemon.stop
+        self.daemon.run()
+        self.assertEqual(self.daemon.cycles, 1)
+
+
+class TestScrapeMetrics(unittest.TestCase):
+    """Test cases for per-phase instrumentation."""
+    
+    @patch('scrape_profile.requests.Session.get')
+    def test_phases_and_counters_are_recorded(self, mock_get):
+        """Test that a scrape records fetch, parse and extract timings per source."""
+        from datetime import timedelta
+        
+        body = b'<html><head><title>T</title></head><body>x</body></html>'
+        mock_get.return_value = Mock(status_code=200, content=body, elapsed=timedelta(0))
+        finished = []
+        
+        metrics = ScrapeMetrics()
+        metrics.add_hook(after=lambda phase, source, seconds, error: finished.append(phase))
+        scraper = ProfileScraper(metrics=metrics)
+        scraper.scrape_website('https://example.com')
+        
+        self.assertEqual(finished, ['connect', 'download', 'parse', 'extract'])
+        self.assertEqual(metrics.histogram('parse', 'https://example.com').count, 1)
+        self.assertEqual(metrics.counter('pages', 'https://example.com'), 1)
+        self.assertEqual(metrics.counter('bytes_downloaded', 'https://example.com'), len(body))
+    
+    def test_exports(self):
+        """Test the JSON and Prometheus text exports."""
+        metrics = ScrapeMetrics(buckets=(0.1, 1.0))
+        metrics.observe('parse', 'https://a.com/"x"', 0.5)
+        metrics.increment('errors', 'https://a.com/"x"')
+        
+        data = metrics.to_dict()['sources']['https://a.com/"x"']
+        self.assertEqual(data['phases']['parse']['buckets'], {'0.1': 0, '1.0': 1})
+        self.assertEqual(data['counters'], {'errors': 1})
+        
+        text = metrics.prometheus_text()
+        self.assertIn('scrape_phase_seconds_bucket{source="https://a.com/\\"x\\"",phase="parse",le="+Inf"} 1',
+                      text)
+        self.assertIn('# TYPE scrape_errors_total counter', text)
+        
+        metrics.increment('bytes_downloaded', 'https://a.com', 123456789)
+        metrics.observe('parse', 'https://a.com', 0.1234567891)
+        text = metrics.prometheus_text()
+        self.assertIn('scrape_bytes_downloaded_total{source="https://a.com"} 123456789\n', text)
+        self.assertIn('scrape_phase_seconds_sum{source="https://a.com",phase="parse"} 0.1234567891\n', text)
+
+
+class TestScrapeAll(unittest.TestCase):
+    """Test cases for concurrent scraping of the source list."""
+    
+    def test_results_keep_source_order(self):
+        """Test that concurrent results come back in the order of the urls dict."""
+        import time
+        
+        scraper = ProfileScraper(max_workers=4, per_host_limit=2)
+        urls = {
+            'slow': 'https://a.example.com/slow',
+            'fast': 'https://b.example.com/fast',
+            'failed': 'https://a.example.com/failed'
+        }
+        
+        def fake_scrape(name, url):
+            if name == 'slow':
+                time.sleep(0.05)
+            return None if name == 'failed' else {'url': url}
+        
+        results = scraper.scrape_all(urls, fake_scrape)
+        
+        self.assertEqual(list(results), ['slow', 'fast', 'failed'])
+        self.assertEqual(results['slow'], {'url': 'https://a.example.com/slow'})
+        self.assertIsNone(results['failed'])
+    
+    def test_per_host_limit(self):
+        """Test that no more than per_host_limit fetches hit one host at once."""
+        import threading
+        import time
+        
+        scraper = ProfileScraper(max_workers=8, per_host_limit=2)
+        urls = {f'page{i}': f'https://example.com/{i}' for i in range(8)}
+        lock = threading.Lock()
+        active = [0]
+        peak = [0]
+        
+        def fake_scrape(name, url):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return {'url': url}
+        
+        scraper.scrape_all(urls, fake_scrape)
+        
+        self.assertLessEqual(peak[0], 2)
+    
+    def test_slow_host_does_not_hold_workers(self):
+        """Test that pages over a host's cap wait without taking the workers other hosts need."""
+        import threading
+        
+        scraper = ProfileScraper(max_workers=2, per_host_limit=1)
+        urls = {f'slow{i}': f'https://slow.example.com/{i}' for i in range(3)}
+        urls.update({f'fast{i}': f'https://fast.example.com/{i}' for i in range(3)})
+        fast_done = threading.Event()
+        finished = []
+        
+        def fake_scrape(name, url):
+            if name.startswith('slow'):
+                # The slow host answers only once every fast page is in
+                fast_done.wait(2)
+            finished.append(name)
+            if len([done for done in finished if done.startswith('fast')]) == 3:
+                fast_done.set()
+            return {'url': url}
+        
+        results = scraper.scrape_all(urls, fake_scrape)
+        
+        self.assertEqual(finished[:3], ['fast0', 'fast1', 'fast2'])
+        self.assertEqual(list(results), list(urls))
+    
+    def test_connection_pool_sized_to_host_limit(self):
+        """Test that the session keeps one pooled connection per host slot."""
+        scraper = ProfileScraper(max_workers=8, per_host_limit=3)
+        adapter = scraper.session.get_adapter('https://example.com')
+        self.assertEqual(adapter._pool_maxsize, 3)
+
+
+class TestStreamingFetch(unittest.TestCase):
+    """Test cases for byte-capped streaming fetches."""
+    
+    def make_response(self, body, content_type='text/html'):
+        """Build a mock streamed response that serves body in small chunks."""
+        response = Mock(status_code=200, url='https://example.com',
+                        headers={'Content-Type': content_type})
+        response.iter_content.side_effect = lambda chunk_size: (
+            body[i:i + 1024] for i in range(0, len(body), 1024))
+        return response
+    
+    @patch('scrape_profile.requests.Session.get')
+    def test_download_is_capped(self, mock_get):
+        """Test that no more than max_bytes of the body are read."""
+        body = b'<html><body><main>' + b'<p>word</p>' * 100000 + b'</main></body></html>'
+        response = self.make_response(body)
+        mock_get.return_value = response
+        
+        scraper = ProfileScraper(max_bytes=8 * 1024)
+        result = scraper.scrape_website('https://example.com')
+        
+        self.assertTrue(mock_get.call_args.kwargs['stream'])
+        self.assertTrue(response.close.called)
+        self.assertLessEqual(len(result['content']), 5000)
+        self.assertTrue(result['content'].startswith('word\nword'))
+    
+    @patch('scrape_profile.requests.Session.get')
+    def test_charset_from_headers(self, mock_get):
+        """Test that the body is decoded with the charset from Content-Type."""
+        body = '<html><head><title>Café</title></head><body>x</body></html>'.encode('cp1252')
+        mock_get.return_value = self.make_response(body, 'text/html; charset=windows-1252')
+        
+        result = ProfileScraper(max_bytes=1024 * 1024).scrape_website('https://example.com')
+        
+        self.assertEqual(result['title'], 'Café')
+    
+    @patch('scrape_profile.requests.Session.get')
+    def test_heading_and_link_limits(self, mock_get):
+        """Test that extraction stops once the heading and link lists are full."""
+        body = b'<html><body>' + b'<h2>H</h2><a href="/x">L</a>' * 50 + b'</body></html>'
+        mock_get.return_value = self.make_response(body)
+        
+        scraper = ProfileScraper(max_bytes=1024 * 1024, max_headings=3, max_links=5)
+        result = scraper.scrape_website('https://example.com')
+        
+        self.assertEqual(len(result['headings']), 3)
+        self.assertEqual(len(result['links']), 5)
+
+
+# Pages that both extraction backends must handle identically
+PARITY_CORPUS = {
+    'basic': '''<html><head><title> Test Page </title>
+        <meta name="description" content=" Test description "></head>
+        <body><h1>Test Heading</h1><p>Test content</p><a href="/link">Test Link</a></body></html>''',
+    'scripts_and_comments': '''<html><head><title>T<!-- c -->itle</title>
+        <style>h1 { color: red }</style></head>
+        <body><h2>Head<script>var x = 1;</script>ing</h2>
+        <p>before<script>ignored()</script>after</p><!-- hidden --><p>tail</p></body></html>''',
+    'main_preferred_over_article': '''<html><body><article><h2>A</h2>article</article>
+        <main><h1>M</h1>main text</main></body></html>''',
+    'role_main': '''<html><body><div>outside</div><div role="main">inside <b>bold</b></div></body></html>''',
+    'content_class_and_id': '''<html><body><div id="content">by id</div>
+        <section class="wide content">by class</section></body></html>''',
+    'nested_headings_and_links': '''<html><body><h1>Outer <a href="#a">link <span>one</span></a></h1>
+        <a href="">empty href</a><a name="anchor">no href</a>
+        <h3><em>Deep</em> &amp; entity</h3><a href="/x"><img src="i.png"></a></body></html>''',
+    'no_title_or_body_text': '''<html><head><meta name="description"></head><body></body></html>''',
+    'first_meta_description_wins': '''<html><head><meta name="Description" content="wrong case">
+        <meta name="description"><meta name="description" content="second"></head>
+        <body>&nbsp;x&nbsp;</body></html>''',
+    'whitespace_template_and_ruby': '''<html><body><h1><span>A</span>
+        <span>B</span></h1><pre>  keep   this  </pre><template><h2>hidden</h2></template>
+        <h2>漢<ruby>字<rp>(</rp><rt>ji</rt><rp>)</rp></ruby></h2></body></html>''',
+    'fragment': '''<p>Just a <a href="http://example.com">fragment</a></p>''',
+    'xhtml_with_declaration': '''<?xml version='1.0' encoding='utf-8'?>
+<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Strict//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-strict.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml"><head><title>B</title></head>
+<body><main><p>Page B</p></main></body></html>''',
+    'empty': '',
+    'long_content': '<html><body><main>' + '<p>paragraph text</p>' * 2000 + '</main></body></html>',
+}
+
+
+class TestScrapeResult(unittest.TestCase):
+    """Test cases for the compact scraped record."""
+    
+    FIELDS = {
+        'title': 'Title',
+        'description': 'Description',
+        'headings': [{'level': 'h1', 'text': 'Top'}, {'level': 'h3', 'text': 'Deep'}],
+        'links': [{'text': 'Home', 'href': '/'}],
+        'content': 'Body text'
+    }
+    
+    def test_mapping_view_matches_dict(self):
+        """Test that a record reads, compares and serializes like the dict it replaces."""
+        import json
+        from scrape_result import ScrapeResult, json_default
+        
+        expected = {'url': 'https://example.com', **self.FIELDS, 'scraped_at': '2024-01-01T00:00:00'}
+        record = ScrapeResult.from_fields('https://example.com', self.FIELDS, '2024-01-01T00:00:00')
+        
+        self.assertEqual(record, expected)
+        self.assertEqual(list(record), list(expected))
+        self.assertEqual(record.get('headings'), expected['headings'])
+        self.assertIsNone(record.get('missing'))
+        self.assertEqual(json.dumps({'page': record}, indent=2, default=json_default),
+                         json.dumps({'page': expected}, indent=2))
+        self.assertEqual(ScrapeResult.from_dict(expected), record)
+    
+    def test_unknown_heading_levels_are_kept(self):
+        """Test that records not produced by the extractors keep heading levels outside h1-h6."""
+        from scrape_result import ScrapeResult
+        
+        headings = [{'level': 'H2', 'text': 'Upper'}, {'level': 'h2', 'text': 'Lower'},
+                    {'level': 'section', 'text': 'Other'}]
+        record = ScrapeResult.from_dict({'url': 'https://example.com', 'headings': headings})
+        self.assertEqual(record['headings'], headings)
+        self.assertEqual(record.to_dict()['headings'], headings)
+        self.assertIsInstance(ScrapeResult.from_dict({'headings': headings[1:2]})._heading_levels, bytes)
+    
+    def test_writers_accept_records(self):
+        """Test that saving results and rendering pages work with records as with dicts."""
+        import tempfile
+        import shutil
+        from scrape_result import ScrapeResult
+        
+        record = ScrapeResult.from_fields('https://example.com', self.FIELDS, '2024-01-01T00:00:00')
+        plain = {'Example': record.to_dict()}
+        scraper = ProfileScraper()
+        self.assertEqual(scraper.render_pages({'Example': record}).notes,
+                         scraper.render_pages(plain).notes)
+        
+        temp_dir = tempfile.mkdtemp()
+        original_dir = os.getcwd()
+        try:
+            os.chdir(temp_dir)
+            scraper.save_results({'Example': record}, 'records.json')
+            scraper.save_results(plain, 'dicts.json')
+            with open('records.json', encoding='utf-8') as a, open('dicts.json', encoding='utf-8') as b:
+                self.assertEqual(a.read(), b.read())
+        finally:
+            os.chdir(original_dir)
+            shutil.rmtree(temp_dir)
+
+
+class TestParsePool(unittest.TestCase):
+    """Test cases for parsing pages in worker processes."""
+    
+    def test_pool_matches_inline_extraction(self):
+        """Test that worker processes extract the same fields as the inline extractor."""
+        from parse_pool import ParsePool
+        
+        pool = ParsePool(1, 'bs4')
+        try:
+            for name in ('basic', 'nested_headings_and_links', 'long_content'):
+                with self.subTest(page=name):
+                    fields, parse_seconds, extract_seconds = pool.extract(PARITY_CORPUS[name], 2, 3)
+                    expected = get_extractor('bs4').extract(PARITY_CORPUS[name], max_headings=2, max_links=3)
+                    self.assertEqual(fields, expected)
+                    self.assertGreaterEqual(parse_seconds, 0)
+                    self.assertGreaterEqual(extract_seconds, 0)
+        finally:
+            pool.close()
+    
+    @patch('scrape_profile.requests.Session.get')
+    def test_scrape_website_parses_in_pool(self, mock_get):
+        """Test that scrape_website hands pages to the pool and still records the parse phases."""
+        response = Mock(status_code=200, url='https://example.com', headers={'Content-Type': 'text/html'})
+        response.iter_content.side_effect = lambda chunk_size: iter([PARITY_CORPUS['basic'].encode('utf-8')])
+        mock_get.return_value = response
+        metrics = ScrapeMetrics()
+        
+        scraper = ProfileScraper(max_bytes=1024 * 1024, metrics=metrics, parse_workers=1)
+        try:
+            result = scraper.scrape_website('https://example.com')
+            self.assertIsNotNone(scraper._parse_pool)
+        finally:
+            scraper.close()
+        
+        self.assertEqual(result['title'], 'Test Page')
+        self.assertEqual(result['headings'], [{'level': 'h1', 'text': 'Test Heading'}])
+        self.assertEqual(metrics.histogram('parse', 'https://example.com').count, 1)
+        self.assertEqual(metrics.histogram('extract', 'https://example.com').count, 1)
+        self.assertIsNone(scraper._parse_pool)
+    
+    @patch('scrape_profile.requests.Session.get')
+    def test_downloads_continue_while_pages_are_parsed(self, mock_get):
+        """Test that a page waiting for the parse pool does not hold the only fetch slot."""
+        import threading
+        
+        urls = {f'page{i}': f'https://host{i}.example.com/' for i in range(3)}
+        downloaded = threading.Event()
+        waited = []
+        
+        def fake_get(url, **kwargs):
+            if mock_get.call_count == len(urls):
+                downloaded.set()
+            return Mock(status_code=200, headers={}, content=PARITY_CORPUS['basic'].encode('utf-8'))
+        
+        class WaitingPool:
+            """Parses only once every page has been downloaded."""
+            max_pending = len(urls) - 1
+            
+            def extract(self, markup, max_headings, max_links):
+                waited.append(downloaded.wait(2))
+                return get_extractor('bs4').extract(markup), 0.0, 0.0
+            
+            def close(self):
+                pass
+        
+        mock_get.side_effect = fake_get
+        scraper = ProfileScraper(max_workers=1, parse_workers=1)
+        scraper._parse_pool = WaitingPool()
+        results = scraper.scrape_all(urls)
+        
+        self.assertEqual(waited, [True] * len(urls))
+        self.assertEqual([record['title'] for record in results.values()], ['Test Page'] * len(urls))
+
+
+class TestExtractorParity(unittest.TestCase):
+    """Test that the lxml and BeautifulSoup extractors produce identical output."""
+    
+    def test_backends_agree_on_corpus(self):
+        """Test every corpus page against both backends."""
+        bs4_extractor = get_extractor('bs4')
+        lxml_extractor = get_extractor('lxml')
+        
+        for name, html in PARITY_CORPUS.items():
+            with self.subTest(page=name):
+                self.assertEqual(lxml_extractor.extract(html), bs4_extractor.extract(html))
+                self.assertEqual(lxml_extractor.extract(html.encode('utf-8')),
+                                 bs4_extractor.extract(html.encode('utf-8')))
+    
+    def test_backends_agree_with_limits(self):
+        """Test that heading and link limits are applied the same way."""
+        html = PARITY_CORPUS['nested_headings_and_links']
+        for backend in ('bs4', 'lxml'):
+            with self.subTest(backend=backend):
+                fields = get_extractor(backend).extract(html, max_headings=1, max_links=2)
+                self.assertEqual([h['text'] for h in fields['headings']], ['Outer link one'])
+                self.assertEqual([l['href'] for l in fields['links']], ['#a', ''])
+    
+    @patch('scrape_profile.requests.Session.get')
+    def test_scraper_uses_selected_backend(self, mock_get):
+        """Test that scrape_website returns the same record with either backend."""
+        mock_get.return_value = Mock(status_code=200, content=PARITY_CORPUS['basic'].encode('utf-8'))
+        
+        records = [ProfileScraper(extractor=backend).scrape_website('https://example.com').to_dict()
+                   for backend in ('bs4', 'lxml')]
+        for record in records:
+            record.pop('scraped_at')
+        
+        self.assertEqual(records[0], records[1])
+        self.assertEqual(list(records[0]),
+                         ['url', 'title', 'description', 'headings', 'links', 'content'])
+    
+    def test_unknown_backend(self):
+        """Test that an unknown backend name is rejected."""
+        with self.assertRaises(ValueError):
+            ProfileScraper(extractor='regex')
+
+
+class TestSiteCrawler(unittest.TestCase):
+    """Test cases for the same-domain crawler."""
+    
+    SITE = {
+        'https://example.com/robots.txt': 'User-agent: *\nDisallow: /private',
+        'https://example.com/': '''<html><head><title>Home</title></head><body>
+            <a href="/about">About</a><a href="about#team">About again</a>
+            <a href="https://EXAMPLE.com:443/posts/">Posts</a><a href="/private/x">Secret</a>
+            <a href="https://other.com/">Elsewhere</a><a href="mailto:me@example.com">Mail</a>
+            <a href="/cv.pdf">CV</a></body></html>''',
+        'https://example.com/about': '<html><head><title>About</title></head><body><a href="/">Home</a></body></html>',
+        'https://example.com/posts/': '''<html><head><title>Posts</title></head><body>
+            <a href="first">First</a></body></html>''',
+        'https://example.com/posts/first': '<html><head><title>First</title></head><body>Post</body></html>',
+    }
+    
+    def fake_get(self, url, **kwargs):
+        """Serve pages from SITE, with a 404 for anything else."""
+        self.requested.append(url)
+        if url not in self.SITE:
+            return Mock(status_code=404, text='', content=b'',
+                        raise_for_status=Mock(side_effect=Exception('404')))
+        body = self.SITE[url]
+        return Mock(status_code=200, text=body, content=body.encode('utf-8'), headers={})
+    
+    def setUp(self):
+        """Patch the session to serve the fake site."""
+        self.requested = []
+        patcher = patch('scrape_profile.requests.Session.get', side_effect=self.fake_get)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_normalize_url(self):
+        """Test resolving and normalizing hrefs."""
+        self.assertEqual(normalize_url('../a?q=1#frag', 'https://Example.com:443/x/y'),
+                         'https://example.com/a?q=1')
+        self.assertEqual(normalize_url('HTTP://example.com'), 'http://example.com/')
+        self.assertIsNone(normalize_url('javascript:void(0)', 'https://example.com/'))
+    
+    def test_crawl_follows_same_site_links(self):
+        """Test that the crawl dedupes links, stays on site and respects robots.txt."""
+        scraper = ProfileScraper(max_workers=4)
+        results = SiteCrawler(scraper, max_depth=2).crawl('example', 'https://example.com')
+        
+        self.assertEqual(list(results), ['example', 'example/about', 'example/posts', 'example/posts/first'])
+        self.assertEqual(results['example/posts/first']['title'], 'First')
+        self.assertNotIn('https://example.com/private/x', self.requested)
+        self.assertNotIn('https://other.com/', self.requested)
+        self.assertNotIn('https://example.com/cv.pdf', self.requested)
+        self.assertEqual(self.requested.count('https://example.com/about'), 1)
+    
+    def test_depth_and_page_limits(self):
+        """Test that depth and page limits stop the crawl."""
+        scraper = ProfileScraper()
+        shallow = SiteCrawler(scraper, max_depth=1).crawl('example', 'https://example.com')
+        self.assertNotIn('example/posts/first', shallow)
+        
+        capped = SiteCrawler(scraper, max_pages=2).crawl('example', 'https://example.com')
+        self.assertEqual(len(capped), 2)
+    
+    def test_start_record_is_not_fetched_again(self):
+        """Test that an already scraped start page seeds the frontier."""
+        scraper = ProfileScraper()
+        start = scraper.scrape_website('https://example.com/')
+        self.requested.clear()
+        
+        results = SiteCrawler(scraper, max_depth=1).crawl('example', 'https://example.com',
+                                                           start_record=start)
+        
+        self.assertIs(results['example'], start)
+        self.assertNotIn('https://example.com/', self.requested)
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test cases for the conditional-request response cache."""
+    
+    def setUp(self):
+        """Set up a cache backed by a temporary file."""
+        import tempfile
+        
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.temp_dir, 'cache.json')
+    
+    def tearDown(self):
+        """Remove the temporary cache directory."""
+        import shutil
+        
+        shutil.rmtree(self.temp_dir)
+    
+    @patch('scrape_profile.requests.Session.get')
+    def test_not_modified_uses_cached_record(self, mock_get):
+        """Test that a 304 returns the cached record without parsing."""
+        full = Mock(status_code=200, headers={'ETag': '"v1"'},
+                    content=b'<html><head><title>Cached</title></head><body>Hi</body></html>')
+        not_modified = Mock(status_code=304, headers={}, content=b'')
+        mock_get.side_effect = [full, not_modified]
+        
+        scraper = ProfileScraper(cache=ResponseCache(self.cache_file))
+        first = scraper.scrape_website('https://example.com')
+        scraper.cache.save()
+        
+        # A later run reloads the cache from disk
+        scraper = ProfileScraper(cache=ResponseCache(self.cache_file))
+        with patch('bs4.BeautifulSoup') as mock_soup:
+            second = scraper.scrape_website('https://example.com')
+            mock_soup.assert_not_called()
+        
+        self.assertEqual(mock_get.call_args_list[1].kwargs['headers'], {'If-None-Match': '"v1"'})
+        self.assertEqual(second['title'], first['title'])
+        self.assertEqual(scraper.cache.hits, 1)
+        self.assertEqual(scraper.cache.bytes_saved, len(full.content))
+    
+    def test_eviction_by_size_and_age(self):
+        """Test that least recently used and expired entries are evicted."""
+        cache = ResponseCache(self.cache_file, max_entries=2)
+        for i in range(3):
+            cache.store(f'https://example.com/{i}', {'ETag': f'"{i}"'}, {'title': str(i)}, 100)
+        
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.conditional_headers('https://example.com/0'), {})
+        
+        cache.max_age = -1
+        cache.evict()
+        self.assertEqual(len(cache), 0)
+
+
+class TestResultStore(unittest.TestCase):
+    """Test cases for the append-only result store."""
+    
+    def setUp(self):
+        """Set up a store in a temporary directory."""
+        import tempfile
+        
+        self.temp_dir = tempfile.mkdtemp()
+        self.store_file = os.path.join(self.temp_dir, 'results.jsonl')
+    
+    def tearDown(self):
+        """Remove the temporary directory."""
+        import shutil
+        
+        shutil.rmtree(self.temp_dir)
+    
+    def test_latest_record_survives_reopen(self):
+        """Test lookups by index, catching up on unindexed appends and dropping a torn write."""
+        store = ResultStore(self.store_file)
+        store.append('a', {'title': 'A1'})
+        store.append('b', {'title': 'B1'})
+        store.append('a', {'title': 'A2'})
+        store.save()
+        store.append('b', {'title': 'B2'})
+        with open(self.store_file, 'ab') as f:
+            f.write(b'{"source":"c","da')
+        
+        store = ResultStore(self.store_file)
+        self.assertEqual(store.get('a'), {'title': 'A2'})
+        self.assertEqual(store.get('b'), {'title': 'B2'})
+        self.assertNotIn('c', store)
+        
+        store.append('c', {'title': 'C1'})
+        self.assertEqual(ResultStore(self.store_file).get('c'), {'title': 'C1'})
+    
+    def test_compaction(self):
+        """Test that save() compacts once most records are superseded."""
+        store = ResultStore(self.store_file, compact_ratio=0.5)
+        for i in range(4):
+            store.append('a', {'title': f'A{i}'})
+        store.append('b', {'title': 'B'})
+        store.save()
+        
+        with open(self.store_file, 'rb') as f:
+            self.assertEqual(len(f.readlines()), 2)
+        self.assertEqual(store.garbage, 0)
+        self.assertEqual(ResultStore(self.store_file).get('a'), {'title': 'A3'})
+    
+    def test_export_matches_profile_data_format(self):
+        """Test that scrape results appended by scrape_all export to the usual profile_data.json."""
+        import json
+        
+        results = {
+            'site': {'title': 'Caf\u00e9', 'headings': [{'level': 'h1', 'text': 'Hi'}], 'links': []},
+            'failed': None
+        }
+        scraper = ProfileScraper(store=ResultStore(self.store_file))
+        scraper.scrape_all({name: f'https://{name}.example.com' for name in results},
+                           lambda name, url: results[name])
+        
+        output_file = os.path.join(self.temp_dir, 'profile_data.json')
+        scraper.save_results(results, output_file)
+        with open(output_file, encoding='utf-8') as f:
+            self.assertEqual(f.read(), json.dumps(results, indent=2, ensure_ascii=False))
+    
+    def test_save_results_writes_this_runs_results(self):
+        """Test that a failed source is not replaced by its stored record and new records are kept."""
+        import json
+        
+        store = ResultStore(self.store_file)
+        store.append('failed', {'title': 'Old'})
+        scraper = ProfileScraper(store=store)
+        results = {'failed': None, 'new': {'title': 'Fresh', 'headings': [], 'links': []}}
+        
+        output_file = os.path.join(self.temp_dir, 'profile_data.json')
+        scraper.save_results(results, output_file)
+        with open(output_file, encoding='utf-8') as f:
+            self.assertEqual(json.load(f), results)
+    
+    def test_unchanged_records_are_not_appended(self):
+        """Test that rescraping unchanged pages neither grows the store nor triggers compaction."""
+        import json
+        
+        store = ResultStore(self.store_file, compact_ratio=0.5)
+        self.assertTrue(store.append('a', {'title': 'A', 'scraped_at': '2024-05-01T00:00:00'}))
+        self.assertFalse(store.append('a', {'title': 'A', 'scraped_at': '2024-05-02T00:00:00'}))
+        self.assertTrue(store.append('b', {'title': 'B'}))
+        store.save()
+        size = os.path.getsize(self.store_file)
+        
+        scraper = ProfileScraper(store=store)
+        results = scraper.scrape_all({'b': 'https://b.example.com', 'a': 'https://a.example.com'},
+                                     lambda name, url: {'title': name.upper(), 'scraped_at': '2024-05-03T00:00:00'})
+        store.save()
+        self.assertEqual(os.path.getsize(self.store_file), size)
+        self.assertEqual(store.garbage, 0)
+        
+        output_file = os.path.join(self.temp_dir, 'profile_data.json')
+        scraper.save_results(results, output_file)
+        with open(output_file, encoding='utf-8') as f:
+            exported = json.load(f)
+        self.assertEqual(list(exported), ['b', 'a'])
+        self.assertEqual(exported['a'], {'title': 'A', 'scraped_at': '2024-05-01T00:00:00'})
+
+
+class TestSnapshots(unittest.TestCase):
+    """Test cases for the content-addressed snapshot history."""
+    
+    def setUp(self):
+        """Set up a snapshot store in a temporary directory."""
+        import tempfile
+        
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = SnapshotStore(os.path.join(self.temp_dir, 'snapshots'))
+    
+    def tearDown(self):
+        """Remove the temporary directory."""
+        import shutil
+        
+        shutil.rmtree(self.temp_dir)
+    
+    def snapshot(self, day, pages):
+        """Save a run started at noon UTC on day with {url: (html, title)} pages."""
+        from datetime import timezone
+        
+        run = self.store.start_run(datetime(2024, 5, day, 12, tzinfo=timezone.utc))
+        for url, (html, title) in pages.items():
+            run.add(url, url, html, {'url': url, 'title': title, 'scraped_at': f'2024-05-{day:02d}'})
+        run.save()
+        return run.run_id
+    
+    def count_blobs(self):
+        """Return the number of stored blobs."""
+        return sum(len(files) for _, _, files in os.walk(self.store.blob_dir))
+    
+    def test_unchanged_pages_are_deduplicated(self):
+        """Test that identical content is stored once and point-in-time queries resolve."""
+        self.snapshot(1, {'https://a.example.com': (b'<p>v1</p>', 'A v1')})
+        blobs = self.count_blobs()
+        self.snapshot(2, {'https://a.example.com': (b'<p>v1</p>', 'A v1')})
+        self.assertEqual(self.count_blobs(), blobs)
+        self.snapshot(3, {'https://a.example.com': (None, 'A v2')})
+        
+        self.assertIsNone(self.store.record_at('https://a.example.com', '2024-04-30'))
+        record = self.store.record_at('https://a.example.com', '2024-05-02')
+        self.assertEqual(record, {'url': 'https://a.example.com', 'title': 'A v1', 'scraped_at': '2024-05-02'})
+        self.assertEqual(self.store.record_at('https://a.example.com', '2024-06-01')['title'], 'A v2')
+        # The latest run did not download the page, so its HTML comes from the run before
+        self.assertEqual(self.store.html_at('https://a.example.com', '2024-06-01'), '<p>v1</p>')
+    
+    def test_diff_between_runs(self):
+        """Test that a diff lists added, removed and changed pages with their changed fields."""
+        run_a = self.snapshot(1, {'https://a.example.com': (b'a', 'A'), 'https://b.example.com': (b'b', 'B'),
+                                  'https://c.example.com': (b'c', 'C')})
+        run_b = self.snapshot(2, {'https://a.example.com': (b'a', 'A'), 'https://b.example.com': (b'b2', 'B2'),
+                                  'https://d.example.com': (b'd', 'D')})
+        
+        self.assertEqual(self.store.diff(run_a, run_b), {
+            'https://b.example.com': {'status': 'changed', 'fields': ['title']},
+            'https://c.example.com': {'status': 'removed', 'fields': []},
+            'https://d.example.com': {'status': 'added', 'fields': []}
+        })
+    
+    @patch('scrape_profile.requests.Session.get')
+    def test_scrape_website_snapshots_pages(self, mock_get):
+        """Test that scraped pages are snapshotted and pruning drops unreferenced blobs."""
+        html = b'<html><head><title>Snap</title></head><body>Hi</body></html>'
+        mock_get.return_value = Mock(status_code=200, headers={}, content=html)
+        scraper = ProfileScraper(snapshot=self.store.start_run())
+        scraper.scrape_website('https://example.com')
+        scraper.snapshot.save()
+        self.snapshot(1, {'https://old.example.com': (b'old', 'Old')})
+        
+        self.assertEqual(self.store.html_at('https://example.com', datetime.now()), html.decode())
+        self.assertEqual(self.store.record_at('https://example.com', datetime.now())['title'], 'Snap')
+        
+        self.store.prune(max_age_days=30)
+        self.assertEqual(len(self.store.runs()), 1)
+        self.assertEqual(self.count_blobs(), 2)
+    
+    @patch('scrape_profile.requests.Session.get')
+    def test_sources_sharing_a_url_keep_their_own_entries(self, mock_get):
+        """Test that snapshots are filed by source name, not URL."""
+        html = b'<html><head><title>Shared</title></head><body>Hi</body></html>'
+        mock_get.return_value = Mock(status_code=200, headers={}, content=html)
+        scraper = ProfileScraper(snapshot=self.store.start_run())
+        scraper.scrape_all({'blog': 'https://example.com/', 'home': 'https://example.com/'})
+        scraper.snapshot.save()
+        
+        run_id = self.store.runs()[-1]
+        self.assertEqual(set(self.store.manifest(run_id)['pages']), {'blog', 'home'})
+        for source in ('blog', 'home'):
+            record = self.store.record_at(source, datetime.now())
+            self.assertEqual((record['url'], record['title']), ('https://example.com/', 'Shared'))
+    
+    def test_queries_reject_bad_dates_and_runs(self):
+        """Test that the snapshot queries exit with an error instead of a traceback."""
+        import argparse
+        from scrape_profile import query_snapshots
+        
+        run_id = self.snapshot(1, {'a': (b'a', 'A')})
+        queries = [argparse.Namespace(snapshot_at=['a', 'last tuesday'], snapshot_diff=None),
+                   argparse.Namespace(snapshot_at=None, snapshot_diff=[run_id, '20240502T000000000000Z'])]
+        for args in queries:
+            with patch('builtins.print') as printed, self.assertRaises(SystemExit) as raised:
+                query_snapshots(self.store, args)
+            self.assertEqual(raised.exception.code, 1)
+            self.assertTrue(printed.call_args[0][0].startswith('Error: '))
+
+
+class TestLinkGraph(unittest.TestCase):
+    """Test cases for the cross-source link graph."""
+    
+    def setUp(self):
+        """Set up a graph file in a temporary directory."""
+        import tempfile
+        
+        self.temp_dir = tempfile.mkdtemp()
+        self.graph_file = os.path.join(self.temp_dir, 'links.json')
+    
+    def tearDown(self):
+        """Remove the temporary directory."""
+        import shutil
+        
+        shutil.rmtree(self.temp_dir)
+    
+    @staticmethod
+    def record(*hrefs):
+        return {'links': [{'text': href, 'href': href} for href in hrefs]}
+    
+    def test_links_are_resolved_and_indexed(self):
+        """Test that hrefs are resolved, deduplicated and answerable by target and domain."""
+        graph = LinkGraph(self.graph_file)
+        graph.update('blog', 'https://blog.example.com/posts/', self.record(
+            'about', '/about#team', 'HTTPS://Example.com:443', '#top', 'mailto:me@example.com',
+            'https://github.com/wforney'))
+        graph.update('site', 'https://example.com/', self.record('https://github.com/wforney/'))
+        
+        self.assertEqual(graph.linking_to('https://github.com/wforney'), {'blog'})
+        self.assertEqual(graph.linking_to('https://github.com/wforney/'), {'site'})
+        self.assertEqual(graph.linking_to('https://example.com'), {'blog'})
+        self.assertEqual(graph.outbound_domains('blog'),
+                         {'blog.example.com': 2, 'example.com': 1, 'github.com': 1})
+    
+    def test_rescrape_updates_indexes_incrementally(self):
+        """Test that a re-scraped source only keeps its new links and failures mark targets broken."""
+        graph = LinkGraph(self.graph_file)
+        graph.update('a', 'https://a.com/', self.record('https://b.com/', 'https://c.com/'))
+        graph.update('b', 'https://b.com/', None)
+        self.assertEqual(graph.broken(), {'https://b.com/': {'a'}})
+        
+        graph.update('a', 'https://a.com/', self.record('https://c.com/'))
+        self.assertEqual(graph.linking_to('https://b.com/'), set())
+        self.assertEqual(graph.broken(), {})
+        self.assertEqual(graph.outbound_domains('a'), {'c.com': 1})
+        
+        graph.update('b', 'https://b.com/', self.record())
+        graph.update('a', 'https://a.com/', self.record('https://b.com/'))
+        self.assertEqual(graph.broken(), {})
+    
+    def test_graph_persists(self):
+        """Test that a saved graph is reloaded with its indexes."""
+        graph = LinkGraph(self.graph_file)
+        graph.update('a', 'https://a.com/', self.record('https://b.com/x'))
+        graph.update('b', 'https://b.com/x', None)
+        graph.save()
+        
+        reloaded = LinkGraph(self.graph_file)
+        self.assertEqual(reloaded.linking_to('https://b.com/x'), {'a'})
+        self.assertEqual(reloaded.broken(), {'https://b.com/x': {'a'}})
+        self.assertEqual(reloaded.outbound_domains('a'), {'b.com': 1})
+
+
+class TestHttpArchive(unittest.TestCase):
+    """Test cases for recording and replaying HTTP responses."""
+    
+    def setUp(self):
+        """Set up an archive path in a temporary directory."""
+        import tempfile
+        
+        self.temp_dir = tempfile.mkdtemp()
+        self.archive_file = os.path.join(self.temp_dir, 'archive.jsonl')
+    
+    def tearDown(self):
+        """Remove the temporary directory."""
+        import shutil
+        
+        shutil.rmtree(self.temp_dir)
+    
+    def test_replay_matches_recording_offline(self):
+        """Test that a replayed run returns the recorded records after the server is gone."""
+        from bench_scraper import corpus_server
+        from http_archive import HttpArchive
+        
+        with corpus_server() as base_url:
+            urls = {f'page {i}': f'{base_url}/page/4096/{i}' for i in range(3)}
+            recorder = ProfileScraper(rate_limit=0, max_bytes=1024 * 1024,
+                                      archive=HttpArchive(self.archive_file, 'record'))
+            recorded = recorder.scrape_all(urls)
+            recorder.close()
+        
+        archive = HttpArchive(self.archive_file, 'replay')
+        replayer = ProfileScraper(rate_limit=0, max_bytes=1024 * 1024, archive=archive)
+        replayed = replayer.scrape_all(dict(urls, missing=f'{base_url}/page/4096/9'))
+        
+        self.assertEqual(archive.urls(), list(urls.values()))
+        for name in urls:
+            self.assertIsNotNone(recorded[name])
+            self.assertEqual({k: v for k, v in replayed[name].items() if k != 'scraped_at'},
+                             {k: v for k, v in recorded[name].items() if k != 'scraped_at'})
+        self.assertIsNone(replayed['missing'])
+        self.assertEqual((archive.replayed, archive.missed), (3, 1))
+    
+    def test_recording_respects_max_bytes(self):
+        """Test that record mode only downloads and archives the capped part of a page."""
+        import json
+        from bench_scraper import corpus_server
+        from http_archive import HttpArchive, entry_body
+        
+        with corpus_server() as base_url:
+            url = f'{base_url}/page/65536/1'
+            recorder = ProfileScraper(rate_limit=0, max_bytes=4096,
+                                      archive=HttpArchive(self.archive_file, 'record'))
+            recorded = recorder.scrape_website(url)
+            recorder.close()
+            plain = ProfileScraper(rate_limit=0, max_bytes=4096)
+            expected = plain.scrape_website(url)
+            plain.close()
+        
+        with open(self.archive_file, encoding='utf-8') as f:
+            entry = json.loads(f.readline())
+        self.assertEqual(len(entry_body(entry)), 4096)
+        self.assertTrue(entry['truncated'])
+        self.assertEqual(recorded['content'], expected['content'])
+    
+    def test_replay_leaves_host_health_alone(self):
+        """Test that a replayed run neither loads nor saves the live host health."""
+        import json
+        from scrape_profile import main
+        
+        registry = os.path.join(self.temp_dir, 'sources.json')
+        with open(registry, 'w', encoding='utf-8') as f:
+            json.dump({'sources': {'site': {'url': 'https://example.com/'}}}, f)
+        original_dir = os.getcwd()
+        os.chdir(self.temp_dir)
+        try:
+            main(['--replay', self.archive_file, '--sources', registry, '--no-snapshots'])
+        finally:
+            os.chdir(original_dir)
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir, '.host_health.json')))
+    
+    def test_replay_answers_conditional_requests(self):
+        """Test that replay returns 304 when the request carries the archived ETag."""
+        from http_archive import HttpArchive
+        
+        with open(self.archive_file, 'w', encoding='utf-8') as f:
+            f.write('{"method":"GET","url":"https://example.com/","status":200,"reason":"OK",'
+                    '"headers":{"ETag":"\\"v1\\"","Content-Type":"text/html"},'
+                    '"body":"eJyzySjJzbHjAgAJ3QI6"}\n')
+        
+        session = ProfileScraper(archive=HttpArchive(self.archive_file)).session
+        
+        self.assertEqual(session.get('https://example.com/').text, '<html>\n')
+        self.assertEqual(session.get('https://example.com/', headers={'If-None-Match': '"v1"'}).status_code, 304)
+        self.assertEqual(session.get('https://example.com/', headers={'If-None-Match': '"v0"'}).status_code, 200)
+
+
+class TestProgressJournal(unittest.TestCase):
+    """Test cases for resuming an interrupted run from the progress journal."""
+    
+    def setUp(self):
+        """Set up a journal path in a temporary directory."""
+        import tempfile
+        
+        self.temp_dir = tempfile.mkdtemp()
+        self.journal_file = os.path.join(self.temp_dir, 'journal.jsonl')
+    
+    def tearDown(self):
+        """Remove the temporary directory."""
+        import shutil
+        
+        shutil.rmtree(self.temp_dir)
+    
+    def test_interrupted_run_resumes(self):
+        """Test that a restarted run skips the sources the interrupted run finished."""
+        from progress_journal import ProgressJournal
+        
+        urls = {name: f'https://example.com/{name}' for name in ('a', 'b', 'c')}
+        
+        def crash_at_c(name, url):
+            if name == 'c':
+                raise KeyboardInterrupt
+            return {'url': url, 'title': name.upper()}
+        
+        scraper = ProfileScraper(journal=ProgressJournal(self.journal_file))
+        with self.assertRaises(KeyboardInterrupt):
+            scraper.scrape_all(urls, crash_at_c)
+        
+        scraped = []
+        
+        def scrape(name, url):
+            scraped.append(name)
+            return {'url': url, 'title': name.upper()}
+        
+        journal = ProgressJournal(self.journal_file)
+        results = ProfileScraper(journal=journal).scrape_all(urls, scrape)
+        
+        self.assertEqual(scraped, ['c'])
+        self.assertEqual({name: data['title'] for name, data in results.items()}, {'a': 'A', 'b': 'B', 'c': 'C'})
+        self.assertEqual(journal.resumed, 2)
+        journal.clear()
+        self.assertFalse(os.path.exists(self.journal_file))
+    
+    def test_stale_failed_and_moved_sources_are_scraped_again(self):
+        """Test that only fresh successful entries for the same URL are resumed."""
+        import time
+        from progress_journal import ProgressJournal
+        
+        journal = ProgressJournal(self.journal_file, max_age=60)
+        journal.record('ok', 'https://example.com/', {'title': 'OK'})
+        journal.record('failed', 'https://example.com/failed', None)
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write('{"source": "torn"')
+        
+        journal = ProgressJournal(self.journal_file, max_age=60)
+        self.assertEqual(len(journal), 2)
+        self.assertEqual(journal.resume('ok', 'https://example.com/')['title'], 'OK')
+        self.assertIsNone(journal.resume('ok', 'https://example.com/moved'))
+        self.assertIsNone(journal.resume('ok', 'https://example.com/', now=time.time() + 120))
+        self.assertIsNone(journal.resume('failed', 'https://example.com/failed'))
+
+
+class TestSourceRegistry(unittest.TestCase):
+    """Test cases for the config-driven source registry and sharding."""
+    
+    def setUp(self):
+        """Set up a registry path in a temporary directory."""
+        import tempfile
+        
+        self.temp_dir = tempfile.mkdtemp()
+        self.registry_file = os.path.join(self.temp_dir, 'sources.json')
+    
+    def tearDown(self):
+        """Remove the temporary directory."""
+        import shutil
+        
+        shutil.rmtree(self.temp_dir)
+    
+    def write_registry(self, sources):
+        """Write a registry with the given sources."""
+        import json
+        
+        with open(self.registry_file, 'w', encoding='utf-8') as f:
+            json.dump({'sources': sources}, f)
+    
+    def test_load_validates_settings(self):
+        """Test that sources keep their order and settings and bad entries are rejected."""
+        from source_registry import load_sources
+        
+        self.write_registry({'b': {'url': 'https://b.example.com/', 'interval': 60, 'extractor': 'lxml'},
+                             'a': {'url': 'https://a.example.com/', 'crawl': True}})
+        sources = load_sources(self.registry_file)
+        self.assertEqual(list(sources), ['b', 'a'])
+        self.assertEqual((sources['b'].interval, sources['b'].extractor), (60, 'lxml'))
+        self.assertTrue(sources['a'].crawl)
+        
+        for bad in ({'a': {}}, {'a': {'url': 'https://a/', 'interval': 0}},
+                    {'a': {'url': 'https://a/', 'extractor': 'nope'}}, {'a': {'url': 'https://a/', 'urls': []}}):
+            with self.subTest(bad=bad):
+                self.write_registry(bad)
+                with self.assertRaises(ValueError):
+                    load_sources(self.registry_file)
+    
+    def test_shards_partition_sources_stably(self):
+        """Test that every source lands in exactly one shard, the same one on every run."""
+        from source_registry import Source, parse_shard, select_shard, shard_file
+        
+        sources = {f'source {i}': Source(f'source {i}', f'https://example.com/{i}') for i in range(50)}
+        shards = [select_shard(sources, i, 4) for i in range(4)]
+        self.assertEqual(sorted(name for shard in shards for name in shard), sorted(sources))
+        self.assertEqual(sum(len(shard) for shard in shards), len(sources))
+        self.assertEqual(select_shard(sources, 2, 4), shards[2])
+        
+        self.assertEqual(parse_shard('1/4'), (1, 4))
+        for bad in ('4/4', '1', 'a/b', '0/0'):
+            with self.subTest(bad=bad), self.assertRaises(ValueError):
+                parse_shard(bad)
+        self.assertEqual(shard_file('profile_data.json', 1, 4), 'profile_data.shard-1-of-4.json')
+    
+    def test_merge_does_no_network_setup(self):
+        """Test that --merge generates pages without loading the network stack or fetch state."""
+        import json
+        from scrape_profile import main
+        
+        self.write_registry({'a': {'url': 'https://a.example.com/'}})
+        partial = os.path.join(self.temp_dir, 'profile_data.shard-0-of-1.json')
+        with open(partial, 'w', encoding='utf-8') as f:
+            json.dump({'a': {'url': 'https://a.example.com/', 'title': 'A', 'content': 'A'}}, f)
+        original_dir = os.getcwd()
+        os.chdir(self.temp_dir)
+        try:
+            with patch('scrape_profile.require_scraping_packages') as require:
+                main(['--merge', partial, '--sources', self.registry_file])
+            require.assert_not_called()
+            self.assertTrue(os.path.exists(os.path.join('_notes', 'a.md')))
+            self.assertFalse(os.path.exists('.scrape_cache.json'))
+            self.assertFalse(os.path.exists('.host_health.json'))
+        finally:
+            os.chdir(original_dir)
+    
+    def test_merge_partials(self):
+        """Test that partials merge in registry order without losing records to failed shards."""
+        from source_registry import Source, merge_partials
+        
+        sources = {name: Source(name, f'https://{name}.example.com/') for name in ('a', 'b', 'c')}
+        merged = merge_partials([{'b': {'title': 'B'}, 'b/page': {'title': 'B page'}},
+                                 {'a': {'title': 'A'}, 'b': None}], sources)
+        
+        self.assertEqual(list(merged), ['a', 'b', 'c', 'b/page'])
+        self.assertEqual(merged['b'], {'title': 'B'})
+        self.assertIsNone(merged['c'])
+
+
+class TestStageProfiler(unittest.TestCase):
+    """Test cases for the per-stage profiling mode."""
+    
+    def setUp(self):
+        """Run in a temporary directory the pages and profiles are written to."""
+        import tempfile
+        
+        self.original_dir = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+    
+    def tearDown(self):
+        """Remove the temporary directory."""
+        import shutil
+        
+        os.chdir(self.original_dir)
+        shutil.rmtree(self.temp_dir)
+    
+    def test_stages_get_separate_profiles(self):
+        """Test that each stage gets its own CPU profile, stack samples and allocations."""
+        import pstats
+        import time
+        from stage_profiler import StageProfiler
+        
+        profiler = StageProfiler('profile')
+        profiler.start()
+        with profiler.stage('allocate'):
+            held = [str(i) * 10 for i in range(20000)]
+        with profiler.stage('spin', label='busy loop'):
+            deadline = time.perf_counter() + 0.2
+            while time.perf_counter() < deadline:
+                pass
+        paths = profiler.close()
+        
+        allocate, spin = profiler.stages['allocate'], profiler.stages['spin']
+        self.assertGreater(allocate.net, 20000 * 10)
+        self.assertIn(__file__, allocate.top_allocations()[0][0])
+        self.assertEqual(spin.calls[0][0], 'busy loop')
+        self.assertGreater(sum(spin.samples.values()), 0)
+        self.assertIn(os.path.join('profile', 'spin.pstats'), paths)
+        self.assertTrue(pstats.Stats(os.path.join('profile', 'spin.pstats')).total_calls > 0)
+        
+        with open(os.path.join('profile', 'profile.collapsed'), encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(' ', 1)
+            self.assertIn(stack.split(';')[0], ('allocate', 'spin'))
+            self.assertGreater(int(count), 0)
+        self.assertTrue(any(line.startswith('spin;') and 'test_stages_get_separate_profiles' in line
+                            for line in lines))
+        with open(os.path.join('profile', 'allocations.txt'), encoding='utf-8') as f:
+            self.assertIn('allocate: top allocations still held', f.read())
+        del held
+    
+    @patch('scrape_profile.requests.Session.get')
+    def test_scraper_stages(self, mock_get):
+        """Test that every scrape and writer of a run is profiled as its own stage."""
+        from generate_sample_pages import create_sample_data
+        from stage_profiler import StageProfiler
+        
+        mock_get.return_value = Mock(status_code=200, content=b'<html><title>Page</title></html>')
+        profiler = StageProfiler('profile')
+        scraper = ProfileScraper(profiler=profiler)
+        scraper.scrape_website('https://example.com/a')
+        scraper.scrape_website('https://example.com/b')
+        data = create_sample_data()
+        scraper.save_results(data)
+        rendered = scraper.render_pages(data)
+        scraper.create_markdown_report(data, rendered=rendered)
+        scraper.create_jekyll_pages(data, rendered=rendered)
+        profiler.close()
+        
+        self.assertEqual(list(profiler.stages), [
+            'scrape_website', 'save_results', 'render_pages', 'create_markdown_report',
+            'jekyll.profile_data', 'jekyll.about', 'jekyll.notes', 'jekyll.search_index', 'jekyll.manifest'])
+        self.assertEqual([call[0] for call in profiler.stages['scrape_website'].calls],
+                         ['https://example.com/a', 'https://example.com/b'])
+        self.assertTrue(os.path.exists(os.path.join('profile', 'jekyll.notes.pstats')))
+        self.assertTrue(os.path.exists(os.path.join('_notes', 'williamforney-com.md')))
+    
+    def test_nested_stage_is_in_outer_cpu_profile(self):
+        """Test that a stage entered inside another is counted but profiled with the outer one."""
+        from stage_profiler import StageProfiler
+        
+        profiler = StageProfiler('profile')
+        with profiler.stage('outer'):
+            with profiler.stage('inner'):
+                sorted(range(1000), reverse=True)
+        
+        self.assertIsNotNone(profiler.stages['outer'].cpu)
+        self.assertIsNone(profiler.stages['inner'].cpu)
+        self.assertEqual(profiler.stages['inner'].unprofiled, 1)
+        self.assertIn('inside or alongside another stage', profiler.report())
+
+
+class TestLazyImports(unittest.TestCase):
+    """Test cases for keeping the rendering path free of the network stack."""
+    
+    def test_rendering_does_not_import_network_stack(self):
+        """Test that rendering pages in a fresh interpreter imports neither the network stack nor the parsers."""
+        import subprocess
+        import tempfile
+        
+        program = (
+            'import sys\n'
+            f'sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})\n'
+            'from generate_sample_pages import create_sample_data\n'
+            'from scrape_profile import ProfileScraper\n'
+            'scraper = ProfileScraper()\n'
+            'data = create_sample_data()\n'
+            'scraper.save_results(data)\n'
+            'scraper.create_markdown_report(data)\n'
+            'scraper.create_jekyll_pages(data)\n'
+            "print(sorted(m for m in ('requests', 'urllib3', 'bs4', 'lxml', 'ssl', 'http.client') "
+            "if m in sys.modules))\n"
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output = subprocess.run([sys.executable, '-c', program], cwd=temp_dir,
+                                    capture_output=True, text=True, check=True).stdout
+            self.assertTrue(os.path.exists(os.path.join(temp_dir, 'profile-data.md')))
+        self.assertEqual(output.strip().splitlines()[-1], '[]')
+    
+    def test_session_is_created_on_first_use(self):
+        """Test that the HTTP session is built lazily and only once."""
+        scraper = ProfileScraper()
+        self.assertIsNone(scraper._session)
+        session = scraper.session
+        self.assertIs(scraper.session, session)
+
+
+class TestBenchmarkHelpers(unittest.TestCase):
+    """Test cases for the benchmark suite helpers."""
+    
+    def test_generated_pages_reach_requested_size(self):
+        """Test that generated corpus pages are at least the requested size."""
+        from bench_scraper import generate_page
+        
+        page = generate_page(10 * 1024, index=3)
+        self.assertGreaterEqual(len(page), 10 * 1024)
+        self.assertEqual(get_extractor('lxml').extract(page)['title'], 'Benchmark page 3')
+    
+    def test_compare_flags_regressions(self):
+        """Test that slower or bigger runs are reported against a baseline."""
+        import json
+        import tempfile
+        from bench_scraper import compare, percentile
+        
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2.5)
+        
+        baseline = {'benchmarks': [{'name': 'a', 'seconds': 1.0, 'peak_memory_mb': 10.0},
+                                   {'name': 'b', 'seconds': 1.0, 'peak_memory_mb': 10.0}]}
+        current = {'benchmarks': [{'name': 'a', 'seconds': 1.05, 'peak_memory_mb': 10.0},
+                                  {'name': 'b', 'seconds': 1.0, 'peak_memory_mb': 20.0}]}
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump(baseline, f)
+        try:
+            regressions = compare(current, f.name, threshold=0.10)
+        finally:
+            os.remove(f.name)
+        
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith('b: peak memory'))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+URL normalization shared by the crawler and the link graph.
+Kept apart from the crawler so that the link graph, and every run that
+only renders pages, never imports urllib.robotparser and with it
+urllib.request, http.client and ssl.
+"""
+
+from typing import Optional
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    Resolve url against base and normalize it for deduplication.
+    
+    Lowercases the scheme and host, drops default ports and fragments and
+    gives an empty path a trailing slash.
+    
+    Args:
+        url: Absolute or relative URL (e.g. an href)
+        base: URL of the page the link was found on
+    
+    Returns:
+        Normalized absolute http(s) URL, or None for other schemes
+    """
+    if base:
+        url = urljoin(base, url.strip())
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+    
+    netloc = parts.hostname.lower()
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f'{netloc}:{port}'
+    path = parts.path or '/'
+    return urlunsplit((scheme, netloc, path, parts.query, ''))
\ No newline at end of file